@@ -16,13 +16,14 @@ from PyQt6.QtGui import QIcon
 
 import time
 import os
-import qdarkstyle
+from visu.darkStyle import styleSheet
 from scipy.integrate import solve_ivp
 from scipy.interpolate import interp1d, RectBivariateSpline
 import matplotlib.pyplot as plt
 import pyqtgraph as pg
 from scipy.constants import c, m_e, e
 from visu import WinCut
+from visu.textFrame import loadText
 
 # La coordonnee y decrit l'axe de l'aimant et x decrit la coordonnee transverse
 # (0,0) correspond au centre de l'aimant.
@@ -335,7 +336,7 @@ class WINTRAJECTOIRE(QMainWindow):
         MainWidget = QWidget()
         MainWidget.setLayout(vbox1)
         self.setCentralWidget(MainWidget)
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
 
     def actionButton(self):
 
@@ -644,7 +645,7 @@ class CALCULTHREAD(QtCore.QThread):
         uy0 = np.ones(self.parent.Nt) * gamma * beta * np.cos(self.parent.theta_e)
 
         if self.parent.checkB.isChecked() is False:
-            data_B = np.loadtxt(str(self.parent.BFileName))
+            data_B = loadText(self.parent.BFileName)
             self.xmap = data_B[0, 1:]
             print('bMax',max(self.xmap))
             self.xmap = data_B[0, 1:] 
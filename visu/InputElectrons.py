@@ -3,7 +3,7 @@ import sys
 from PyQt6.QtWidgets import QApplication
 import pathlib
 from PyQt6.QtGui import QIcon
-import qdarkstyle
+from visu.darkStyle import styleSheet
 import os
 import pyqtgraph as pg
 import numpy as np
@@ -19,7 +19,7 @@ class InputE(QtWidgets.QWidget):
         sepa = os.sep
         self.icon = str(p.parent) + sepa+'icons' + sepa
         self.isWinOpen = False
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.defvalfile = QtCore.QSettings(str(pathlib.Path(__file__).parent / 'default_values.ini'), QtCore.QSettings.Format.IniFormat)
         self.buttonSelected = False
         self.buttonSelectedBack = False
@@ -248,7 +248,7 @@ class InputE(QtWidgets.QWidget):
         
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = InputE()
     e.show()
     appli.exec_()
\ No newline at end of file
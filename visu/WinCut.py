@@ -7,7 +7,7 @@ Windows for plot
 """
 
 import pyqtgraph as pg  # pyqtgraph biblio permettent l'affichage
-import qdarkstyle  # pip install qdakstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 
 from PyQt6 import QtCore, QtGui
 from PyQt6.QtWidgets import QApplication, QHBoxLayout, QWidget, QStatusBar
@@ -89,7 +89,7 @@ class WINDOWMEAS(QWidget):
         self.icon = str(p.parent) + sepa+'icons' + sepa
         self.setWindowTitle(self.title)
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.setup()
         self.setGeometry(50, 100, 200, 350)
     
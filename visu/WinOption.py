@@ -6,11 +6,11 @@ Created on Wed Feb 13 16:02:40 2019
 @author: juliengautier
 """
 
-import qdarkstyle
+from visu.darkStyle import styleSheet
 from PyQt6.QtCore import pyqtSignal as Signal
 from PyQt6 import QtCore, QtGui
 from PyQt6.QtWidgets import QApplication, QCheckBox, QVBoxLayout, QHBoxLayout, QPushButton
-from PyQt6.QtWidgets import QWidget, QLabel, QSpinBox, QLineEdit, QMessageBox, QFileDialog
+from PyQt6.QtWidgets import QWidget, QLabel, QSpinBox, QLineEdit, QMessageBox, QFileDialog, QComboBox
 from PyQt6.QtGui import QIcon
 import sys
 import os
@@ -20,6 +20,10 @@ import pathlib
 import time
 import zmq
 import uuid
+from visu.latency import LatencyHistogram
+from visu.messaging import getContext, ControlChannel
+from visu.frameStore import FORMATS
+from visu.imageReader import readImage, fileFilter
 
 class OPTION(QWidget):
     
@@ -34,7 +38,7 @@ class OPTION(QWidget):
         p = pathlib.Path(__file__)
 
         self.parent = parent
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         if conf is None:
             self.conf = QtCore.QSettings(str(p.parent / 'confVisu.ini'), QtCore.QSettings.Format.IniFormat)
         else:
@@ -101,7 +105,30 @@ class OPTION(QWidget):
         self.checkBoxDate = QCheckBox('add date', self)
         self.checkBoxDate.setChecked(False)
         hbox2.addWidget(self.checkBoxDate)
+
+        # autosave format : TIFF / txt (as Save as TIFF), npy + json, hdf5
+        hbox3.addWidget(QLabel('Autosave format : '))
+        self.formatBox = QComboBox()
+        self.formatBox.addItems(FORMATS)
+        fmt = str(self.conf.value(self.name+"/autoSaveFormat", 'TIFF'))
+        if fmt in FORMATS:
+            self.formatBox.setCurrentText(fmt)
+        self.checkBoxTiff.setChecked(self.formatBox.currentText() != 'txt')
+        hbox3.addWidget(self.formatBox)
+        self.checkBoxCompress = QCheckBox('compress (hdf5)', self)
+        self.checkBoxCompress.setChecked(str(self.conf.value(self.name+"/autoSaveCompress", 'false')) == 'true')
+        hbox3.addWidget(self.checkBoxCompress)
         vbox1.addLayout(hbox3)
+
+        # campaign file : one hdf5 per run with spectra, features, measurements (visu.campaignStore)
+        hboxCampaign = QHBoxLayout()
+        self.checkBoxCampaign = QCheckBox('Campaign file (spectra, features, measurements)', self)
+        self.checkBoxCampaign.setChecked(str(self.conf.value(self.name+"/campaign", 'false')) == 'true')
+        hboxCampaign.addWidget(self.checkBoxCampaign)
+        self.checkBoxCampaignFrames = QCheckBox('with frames', self)
+        self.checkBoxCampaignFrames.setChecked(str(self.conf.value(self.name+"/campaignFrames", 'false')) == 'true')
+        hboxCampaign.addWidget(self.checkBoxCampaignFrames)
+        vbox1.addLayout(hboxCampaign)
         
         hbox4 = QHBoxLayout()
         labelTirNumber = QLabel('Next number : ')
@@ -112,8 +139,14 @@ class OPTION(QWidget):
         self.tirNumberBox = QSpinBox()
         self.tirNumberBox.setMaximum(100000)
         self.tirNumberBox.setValue(self.shoot)
+        self.tirNumber = self.tirNumberBox.value()  # read by THREADCLIENT, not the widget
         hbox4.addWidget(labelTirNumber)
         hbox4.addWidget(self.tirNumberBox)
+        self.labelServerState = QLabel('')
+        hbox4.addWidget(self.labelServerState)
+        self.buttonLatency = QPushButton('Export latency')
+        self.buttonLatency.setEnabled(False)
+        hbox4.addWidget(self.buttonLatency)
         vbox1.addLayout(hbox4)
         
         hbox5 = QHBoxLayout()
@@ -128,7 +161,7 @@ class OPTION(QWidget):
         hMainLayout = QHBoxLayout()
         hMainLayout.addLayout(vbox1)
         self.setLayout(hMainLayout)
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         
     def actionButton(self):
         self.buttonPath.clicked.connect(self.PathChanged)
@@ -138,6 +171,15 @@ class OPTION(QWidget):
         self.buttonFileBg.clicked.connect(self.selectBg)
         # self.fileBgBox.textChanged.connect(self.bgTextChanged)
         self.checkBoxServer.stateChanged.connect(self.checkBoxServerChange)
+        self.buttonLatency.clicked.connect(self.exportLatency)
+        self.formatBox.currentTextChanged.connect(self.formatChanged)
+        self.checkBoxTiff.stateChanged.connect(self.tiffChanged)
+        self.checkBoxCompress.stateChanged.connect(
+            lambda: self.conf.setValue(self.name+"/autoSaveCompress", self.checkBoxCompress.isChecked()))
+        self.checkBoxCampaign.stateChanged.connect(
+            lambda: self.conf.setValue(self.name+"/campaign", self.checkBoxCampaign.isChecked()))
+        self.checkBoxCampaignFrames.stateChanged.connect(
+            lambda: self.conf.setValue(self.name+"/campaignFrames", self.checkBoxCampaignFrames.isChecked()))
 
     def pathTextChanged(self):
         self.pathAutoSave = self.pathBox.text()
@@ -157,9 +199,22 @@ class OPTION(QWidget):
             
     def TirNumberChange(self):
         self.tirNumber = self.tirNumberBox.value()
+        # called at each shot : written to the file by QSettings later
         self.conf.setValue(self.name+"/tirNumber", self.tirNumber)
-        self.conf.sync()
         
+    def formatChanged(self, fmt):
+        self.conf.setValue(self.name+"/autoSaveFormat", fmt)
+        if fmt in ('TIFF', 'txt'):
+            self.checkBoxTiff.setChecked(fmt == 'TIFF')
+
+    def tiffChanged(self):
+        if self.formatBox.currentText() in ('TIFF', 'txt'):
+            self.formatBox.setCurrentText('TIFF' if self.checkBoxTiff.isChecked() else 'txt')
+
+    def autoSaveFormat(self):
+        # one of visu.frameStore.FORMATS
+        return self.formatBox.currentText()
+
     def setTirNumber(self, tirNumber):
         self.tirNumber = tirNumber
         self.tirNumberBox.setValue(self.tirNumber)
@@ -167,15 +222,13 @@ class OPTION(QWidget):
     def selectBg(self):
         
         fname = QFileDialog.getOpenFileName(
-            self, "Select a background file", self.pathBg, 
-        "Images (*.txt *.spe *.TIFF *.sif);;Text File(*.txt);;Ropper File (*.SPE);;Andor File(*.sif);; TIFF file(*.TIFF)")
+            self, "Select a background file", self.pathBg, fileFilter())
         
         fichier = fname[0]
         self.loadBg(fichier)
          
     def loadBg(self, fichier):
-        ext = os.path.splitext(fichier)[1]
-        print(f"ext = {ext}")
+        print(f"background = {fichier}")
         self.fileBgBox.setText(fichier)
         
         self.conf.setValue(self.name+"/pathBg", os.path.dirname(fichier))
@@ -185,26 +238,13 @@ class OPTION(QWidget):
             self.parent.checkBoxBg.setChecked(True)
             self.parent.BackgroundF()
 
-        if ext == '.txt':  # text file
-            self.dataBg = np.loadtxt(str(fichier))
-            self.dataBg = np.rot90(self.dataBg, 3)
-        elif ext == '.spe' or ext == '.SPE':  # SPE file
-            from winspec import SpeFile
-            dataSPE = SpeFile(fichier)
-            data1 = dataSPE.data[0]  # .transpose() # first frame
-            self.dataBg = data1  # np.flipud(data1)
-        elif ext == '.TIFF':  # tiff File
-            from PIL import Image
-            dat = Image.open(fichier)
-            dat = np.rot90(dat, 3)
-            self.dataBg = np.array(dat)
-        elif ext == '.sif':
-            from andor import SifFile
-            sifop = SifFile()
-            im = sifop.openA(fichier)
-            self.dataBg = np.rot90(im, 3)
-            
-        else:
+        try:
+            self.dataBg, meta = readImage(fichier)
+            if meta['format'] == 'txt':
+                # text background saved by SEE.SaveF (rotated by rot90(data, 1))
+                self.dataBg = np.rot90(self.dataBg, 3)
+        except Exception as e:
+            print('background not loaded :', e)
             self.dataBgExist = False
             if self.parent is not None:
                 self.parent.checkBoxBg.setChecked(False)
@@ -222,17 +262,28 @@ class OPTION(QWidget):
         
         if self. checkBoxServer.isChecked():
             # print('start number of shot Client')
+            self.nameBox.setText(self.name)
             self.threadClient = THREADCLIENT(self)
-            self.threadClient.start()
             self.threadClient.newShotnumber.connect(self.receiveNewNumber)
             self.threadClient.pathSignal.connect(self.receiveNewPath)
             self.threadClient.autoSignal.connect(self.receiveAuto)
+            self.threadClient.stateSignal.connect(self.labelServerState.setText)
+            self.threadClient.start()
+            self.buttonLatency.setEnabled(True)
         else:
             # print('close client')
             self.threadClient.stopClientThread()
     
-    def receiveNewNumber(self, nbShot):
+    def receiveNewNumber(self, nbShot, received):
+        # received : time of this shot in the client thread (shots may wait in the queue)
+        self.threadClient.guiLatency.add(time.perf_counter() - received)
         self.tirNumberBox.setValue(nbShot)
+
+    def exportLatency(self):
+        fname = QFileDialog.getSaveFileName(self, "Export latency histograms", str(self.pathAutoSave),
+                                            "Json (*.json);;CSV (*.csv)")
+        if fname[0] != '':
+            self.threadClient.exportLatency(fname[0])
         
     def receiveNewPath(self,path):
         self.pathBox.setText(path)
@@ -274,10 +325,14 @@ class THREADCLIENT(QtCore.QThread):
     '''
     Thread client ZMQ 
     Tous les événements (SHOOT, CONFIG) sont reçus via PUB/SUB
+    Si le serveur ne répond plus (pas de heartbeat pendant heartbeatTimeout s)
+    ou en cas d'erreur réseau le client se reconnecte automatiquement
+    avec un délai qui double à chaque essai (jusqu'à reconnectDelayMax s).
     '''
-    newShotnumber = Signal(int)   # Signal pour le numéro de tir
+    newShotnumber = Signal(int, float)   # numéro de tir, heure de réception (perf_counter)
     pathSignal = Signal(str)      # Signal pour le path
     autoSignal = Signal(str)      # Signal pour autosave
+    stateSignal = Signal(str)     # Signal pour l'état de la connexion
     
     def __init__(self, parent):
         super(THREADCLIENT, self).__init__(parent)
@@ -288,126 +343,134 @@ class THREADCLIENT(QtCore.QThread):
         # Lire la configuration
         self.serverHost = str(self.conf.value(self.name + "/server"))
         self.serverPort = int(self.conf.value(self.name + "/serverPort", "5009"))
+        self.heartbeatTimeout = float(self.conf.value(self.name + "/heartbeatTimeout", "10"))
+        self.reconnectDelayMin = 0.5
+        self.reconnectDelayMax = float(self.conf.value(self.name + "/reconnectDelayMax", "30"))
         
         self.ClientIsConnected = False
+        self.running = False
         self.client_id = str(uuid.uuid4())
         
-        # ZMQ context et sockets
-        self.context = None
+        # ZMQ context (partagé par le process) et sockets
+        self.context = getContext()
         self.sub_socket = None
         self.pub_socket = None
+        # canal inproc pour interrompre le poll bloquant (voir stopClientThread)
+        self.control = ControlChannel(f"threadclient-{self.name}")
+
+        # latences : serveur -> client (horloges synchronisées) et client -> GUI
+        self.shotLatency = LatencyHistogram('shot server to client')
+        self.guiLatency = LatencyHistogram('shot client to GUI')
         
     def run(self):
+        self.running = True
+        delay = self.reconnectDelayMin
+
+        while self.running:
+            try:
+                self._connect()
+                if self._listen():
+                    # au moins un message reçu : la connexion était bonne
+                    delay = self.reconnectDelayMin
+            except Exception as e:
+                print(f'Connection error: {e}')
+            self._close_sockets()
+
+            if not self.running:
+                break
+            print(f"Server {self.serverHost}:{self.serverPort} lost, reconnecting in {delay:.1f} s")
+            self.stateSignal.emit(f'reconnecting in {delay:.1f} s')
+            if self.control.poll(int(delay * 1000)):  # stop demandé pendant l'attente
+                self.control.recv()
+                self.running = False
+                break
+            delay = min(2 * delay, self.reconnectDelayMax)
+
+        self.control.close()
+        self.stateSignal.emit('disconnected')
+
+    def _connect(self):
         print(f"Connecting to ZMQ server: {self.serverHost}:{self.serverPort}")
-        
-        try:
-            # Créer le contexte ZMQ
-            self.context = zmq.Context()
-            
-            # Socket SUB pour recevoir les événements du serveur
-            self.sub_socket = self.context.socket(zmq.SUB)
-            self.sub_socket.connect(f"tcp://{self.serverHost}:{self.serverPort}")
-            
-            # S'abonner à tous les types d'événements
-            self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "SHOOT")      # Événements de tir
-            self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "CONFIG")     # Mises à jour path/autosave
-            self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "REGISTERED") # Confirmation d'enregistrement client
-            self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "HEARTBEAT")  # Heartbeat serveur pour gerer si deconnection
-
-            # Socket PUB pour envoyer notre enregistrement
-            self.pub_socket = self.context.socket(zmq.PUB)
-            self.pub_socket.connect(f"tcp://{self.serverHost}:{self.serverPort + 1}")
-            
-            # Petite pause pour que la connexion s'établisse
-            time.sleep(0.1)
-            
-            # S'enregistrer auprès du serveur
-            self._send_register()
-            
-            self.ClientIsConnected = True
-            #print(f'Client connected to server {self.serverHost}')
-            
-            # Mettre à jour l'interface
-            self.parent.nameBox.setText(self.parent.name)
-            
-        except Exception as e:
-            print(f'Connection error: {e}')
-            print('Do you start the server?')
-            self.ClientIsConnected = False
-            self.parent.checkBoxServer.setChecked(False)
+        # Socket SUB pour recevoir les événements du serveur
+        self.sub_socket = self.context.socket(zmq.SUB)
+        self.sub_socket.setsockopt(zmq.LINGER, 0)
+        self.sub_socket.connect(f"tcp://{self.serverHost}:{self.serverPort}")
+        
+        # S'abonner à tous les types d'événements
+        self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "SHOOT")      # Événements de tir
+        self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "CONFIG")     # Mises à jour path/autosave
+        self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "REGISTERED") # Confirmation d'enregistrement client
+        self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, "HEARTBEAT")  # Heartbeat serveur pour gerer si deconnection
+
+        # Socket PUB pour envoyer notre enregistrement
+        self.pub_socket = self.context.socket(zmq.PUB)
+        self.pub_socket.setsockopt(zmq.LINGER, 0)
+        self.pub_socket.connect(f"tcp://{self.serverHost}:{self.serverPort + 1}")
+        
+        # Petite pause pour que la connexion s'établisse (interrompue par un stop)
+        if self.control.poll(100):
+            self.control.recv()
+            self.running = False
             return
-        
-        # Poller pour gérer les timeouts
+
+        # S'enregistrer auprès du serveur
+        self._send_register()
+
+    def _listen(self):
+        '''
+        Écouter les événements jusqu'au timeout du heartbeat, une erreur ou un stop.
+        Le poll est bloquant : le thread ne se réveille que sur un message
+        Retourne True si au moins un message a été reçu
+        '''
+        received = False
         poller = zmq.Poller()
         poller.register(self.sub_socket, zmq.POLLIN)
-        
-        # Variables pour détecter la déconnexion
+        poller.register(self.control.receiver, zmq.POLLIN)
         last_heartbeat = time.time()
-        heartbeat_timeout = 10.0  # 10 secondes sans heartbeat = déconnecté
 
-        # Boucle principale - Écouter les événements
-        while self.ClientIsConnected:
+        while self.running:
+            remaining = self.heartbeatTimeout - (time.time() - last_heartbeat)
+            if remaining <= 0:
+                print(f"❌ Server timeout ({self.heartbeatTimeout:.1f}s without response)")
+                break
             try:
-                # Attendre un événement avec timeout de 100ms
-                socks = dict(poller.poll(100))
-                
-                if self.sub_socket in socks and socks[self.sub_socket] == zmq.POLLIN:
-                    # Recevoir l'événement
-                    topic = self.sub_socket.recv_string()
-                    event = self.sub_socket.recv_json()
-                    
-                    # Dispatcher selon le type d'événement
-                    if topic == "SHOOT":
-                        #print('client : shoot nb received')
-                        self._handle_shoot_event(event)
-                        last_heartbeat = time.time()  # Reset heartbeat
-                    elif topic == "CONFIG":
-                        self._handle_config_event(event)
-                        last_heartbeat = time.time()  # Reset heartbeat
-                    elif topic == "REGISTERED":
-                        self._handle_registered_event(event)
-                        last_heartbeat = time.time()  # Reset heartbeat
-                    elif topic == "HEARTBEAT":
-                        last_heartbeat = time.time()
-                        # print("💓 Heartbeat received")
-                else:
-                    # vérifier si serveur toujours vivant
-                    time_since_heartbeat = time.time() - last_heartbeat
-                    
-                    if time_since_heartbeat > heartbeat_timeout:
-                        print(f"❌ Server timeout ({time_since_heartbeat:.1f}s without response)")
-                        self.ClientIsConnected = False
-                        # Fermer les sockets
-                        if self.sub_socket:
-                            self.sub_socket.close()
-                        if self.pub_socket:
-                            self.pub_socket.close()
-                        if self.context:
-                            self.context.term()
-                        self.parent.checkBoxServer.setChecked(False)
-                        time.sleep(1)
-                        break
-
-                # Petite pause pour ne pas surcharger le CPU
-                time.sleep(0.01)
-                
+                socks = dict(poller.poll(int(remaining * 1000) + 1))
             except zmq.ZMQError as e:
-                if e.errno == zmq.ETERM:
-                    break  # Context terminé
-                #print(f'ZMQ Error: {e}')
-                self.ClientIsConnected = False
-                self.parent.checkBoxServer.setChecked(False)
+                print(f'ZMQ Error: {e}')
                 break
-            except Exception as e:
-                #print(f'Error in client loop: {e}')
-                import traceback
-                traceback.print_exc()
-                self.ClientIsConnected = False
-                self.parent.checkBoxServer.setChecked(False)
+
+            if self.control.receiver in socks:
+                self.control.recv()
+                self.running = False
                 break
-        
-        # Nettoyage
-        self._cleanup()
+
+            if self.sub_socket in socks:
+                # Recevoir l'événement
+                topic = self.sub_socket.recv_string()
+                try:
+                    event = self.sub_socket.recv_json()
+                except ValueError as e:  # json invalide
+                    event = e
+                last_heartbeat = time.time()
+                received = True
+                if self.ClientIsConnected is False:
+                    self.ClientIsConnected = True
+                    self.stateSignal.emit('connected')
+
+                # Dispatcher selon le type d'événement
+                if not isinstance(event, dict):
+                    # message malformé : ignoré, la connexion est gardée
+                    print(f'Bad {topic} message: {event!r}')
+                elif topic == "SHOOT":
+                    self._handle_shoot_event(event)
+                elif topic == "CONFIG":
+                    self._handle_config_event(event)
+                elif topic == "REGISTERED":
+                    self._handle_registered_event(event)
+                # HEARTBEAT : rien d'autre à faire
+
+        self.ClientIsConnected = False
+        return received
     
     def _send_register(self):
         """Envoyer notre enregistrement au serveur"""
@@ -444,12 +507,22 @@ class THREADCLIENT(QtCore.QThread):
         Gérer un événement de tir reçu
     
         """
-        nbshot = event.get('number')
-        timestamp = event.get('timestamp') # pour aline si besoin
+        try:
+            nbshot = int(event['number'])
+            timestamp = event.get('timestamp') # pour aline si besoin
+            if timestamp is not None:
+                timestamp = float(timestamp)
+        except (KeyError, ValueError, TypeError) as e:
+            # message malformé : ignoré, la connexion est gardée
+            print(f'Bad SHOOT message {event!r}: {e}')
+            return
+        if timestamp is not None:
+            self.shotLatency.add(max(time.time() - timestamp, 0.))
          # print('clien shoot receveid,nbshot', nbshot)
         # Émettre le signal si le numéro a changé
-        if int(self.parent.tirNumberBox.value()) != nbshot:
-            self.newShotnumber.emit(nbshot)
+        # valeur mise à jour par le thread GUI (TirNumberChange) : pas de widget lu ici
+        if self.parent.tirNumber != nbshot:
+            self.newShotnumber.emit(nbshot, time.perf_counter())
         
     
     def _handle_config_event(self, event):
@@ -483,40 +556,46 @@ class THREADCLIENT(QtCore.QThread):
                 self.autoSignal.emit(autosave)
                 # print(f"Autosave updated to: {autosave}")
     
-    def _cleanup(self):
-        """Nettoyer les ressources"""
+    def _close_sockets(self):
+        """Fermer les sockets (on se désenregistre si possible)"""
         try:
             # Envoyer un événement de déconnexion
             unregister_event = {
                 'client_id': self.client_id,
                 'name': self.name
             }
-            self.pub_socket.send_string("UNREGISTER", zmq.SNDMORE)
-            self.pub_socket.send_json(unregister_event)
-            self.parent.checkBoxServer.setChecked(False)
-        except:
+            self.pub_socket.send_string("UNREGISTER", zmq.SNDMORE | zmq.NOBLOCK)
+            self.pub_socket.send_json(unregister_event, zmq.NOBLOCK)
+        except Exception:
             pass
         
         # Fermer les sockets
         if self.sub_socket:
             self.sub_socket.close()
+            self.sub_socket = None
         if self.pub_socket:
             self.pub_socket.close()
-        if self.context:
-            self.context.term()
+            self.pub_socket = None
     
+    def exportLatency(self, path):
+        """Sauver les histogrammes de latence (json ou csv)"""
+        root, ext = os.path.splitext(path)
+        self.shotLatency.export(root + '_server' + ext)
+        self.guiLatency.export(root + '_gui' + ext)
+
     def stopClientThread(self):
-        """Arrêter le thread client"""
-        self.ClientIsConnected = False
-        time.sleep(0.1)
-        self.quit()
+        """Arrêter le thread client : réveille le poll par le canal inproc"""
+        self.running = False
+        if self.isRunning():
+            self.control.send(b'STOP')
         self.wait()
+        self.control.close()
 
 
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = OPTION()
     e.show()
     appli.exec_() 
\ No newline at end of file
@@ -6,7 +6,7 @@ Created on Wed Feb 13 16:02:40 2019
 @author: juliengautier
 """
 
-import qdarkstyle
+from visu.darkStyle import styleSheet
 from PyQt6 import QtCore
 from PyQt6.QtWidgets import QApplication, QCheckBox, QVBoxLayout, QHBoxLayout, QDoubleSpinBox
 from PyQt6.QtWidgets import QWidget, QLabel, QSpinBox, QLineEdit, QComboBox
@@ -37,7 +37,7 @@ class PREFERENCES(QWidget):
         sepa = os.sep
         self.icon = str(p.parent) + sepa+'icons' + sepa
         self.isWinOpen = False
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
        
         self.setWindowTitle('Preferences visualisation')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
@@ -92,6 +92,9 @@ class PREFERENCES(QWidget):
         self.checkBoxFwhm = QCheckBox('FWHM ', self)
         self.checkBoxFwhm.setChecked(False)
         hbox7.addWidget(self.checkBoxFwhm)
+        self.checkBoxFwhmSpline = QCheckBox('spline (accurate)', self)
+        self.checkBoxFwhmSpline.setChecked(False)
+        hbox7.addWidget(self.checkBoxFwhmSpline)
         
         labelRotate = QLabel('Img Rotation  90°:')
         hbox7.addWidget(labelRotate)
@@ -113,6 +116,9 @@ class PREFERENCES(QWidget):
         self.energy.setMaximum(1000)
         self.energy.setValue(1)
         hbox8.addWidget(self.energy)
+        self.checkBoxRobustLevels = QCheckBox('Robust auto scale (0.1-99.9 %)', self)
+        self.checkBoxRobustLevels.setChecked(False)
+        hbox8.addWidget(self.checkBoxRobustLevels)
         vbox1.addLayout(hbox8)
         
         hbox9 = QHBoxLayout()
@@ -188,7 +194,7 @@ class PREFERENCES(QWidget):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = PREFERENCES()
     e.show()
     appli.exec_()
\ No newline at end of file
@@ -4,30 +4,37 @@
 Created on Mon Mar 18 10:50:06 2019
 Data vizualisation
 @author: juliengautier
-modified  : 2025/06/12
+modified  : 2026/10/19
 """
 __version__='2025.09'
 __author__='julien Gautier'
 
+import importlib
+
+# SEE, SEELIGHT, runVisu and the modules are imported at their first use
+# (import visu is fast : PyQt, pyqtgraph, scipy... are loaded when needed)
+_lazy = {'SEE': 'visu.visual',
+         'runVisu': 'visu.visual',
+         'SEELIGHT': 'visu.visualLight'}
+_modules = ('visual', 'visualLight', 'andor', 'WinCut', 'winMeas', 'winspec', 'winSuppE',
+            'winFFT', 'winZoom', 'winMath', 'winPointing', 'winHist')
+
+__all__ = list(_lazy) + list(_modules)
+
+
+def __getattr__(name):
+    if name in _lazy:
+        return getattr(importlib.import_module(_lazy[name]), name)
+    if name in _modules:
+        return importlib.import_module('visu.' + name)
+    raise AttributeError("module 'visu' has no attribute %r" % name)
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
 
-from visu import visual
-from visu import visualLight
-from visu.visualLight import SEELIGHT
-from visu.visual import SEE
-from visu.visual import runVisu
-from visu import andor
-from visu import WinCut
-from visu import winMeas
-from visu import winspec
-from visu import winSuppE
-from visu import winFFT
-from visu import winZoom
-from visu import winMath
-from visu import winPointing
-from visu import winHist
 # try:
 #     from visu import Win3D
 # except :
 #     print('')
 # #from visu import moteurRSAI as RSAI
-
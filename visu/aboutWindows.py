@@ -15,7 +15,7 @@ import visu
 import pathlib
 import os
 import sys
-import qdarkstyle
+from visu.darkStyle import styleSheet
 
 __version__ = visu.__version__
 __author__ = visu.__author__
@@ -34,7 +34,7 @@ class ABOUT(QWidget):
         self.isWinOpen = False
         self.setWindowTitle(self.title)
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.setup()
         
     def setup(self):
@@ -80,7 +80,7 @@ class ABOUT(QWidget):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv) 
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = ABOUT()  
     e.show()
     appli.exec_()     
@@ -14,7 +14,9 @@
 # """
 
 
+import os
 import numpy as np
+from visu.sifData import SIFFRAMES, checkSif
  
 
 class SifFile:
@@ -75,35 +77,29 @@ class SifFile:
 #        else:
 #            raise ValueError('Wrong extension.')
 
-        sif = opener(path, 'rb')
+        with opener(path, 'rb') as sif:
 
-        # Verify we have a SIF file
-        if sif.readline().strip() != b"Andor Technology Multi-Channel File":
-            sif.close()
-            raise Exception("File %s is not an Andor SIF file." % path)
+            # Verify we have a SIF file
+            checkSif(sif, path)
 
-        # Ignore lines until we get to camera model
-        for i in range(2):
+            # Ignore lines until we get to camera model
+            for i in range(2):
+                sif.readline()
+
+            # Get camera model
+            self.cammodel = sif.readline().strip()
+
+            # Get CCD dimension in pixels
+            shape = sif.readline().split()
+            self.ccd_size = (int(shape[1]), int(shape[0]))
+
+            # Read superpixeling data
             sif.readline()
+            # self.shape = (self.ccd_size[1]/int(line[5]), self.ccd_size[0]/int(line[6]))
 
-        # Get camera model
-        self.cammodel = sif.readline().strip()
-
-        # Get CCD dimension in pixels
-        shape = sif.readline().split()
-        self.ccd_size = (int(shape[1]), int(shape[0]))
-        
-        # Read superpixeling data
-        line = sif.readline().split()
-        # self.shape = (self.ccd_size[1]/int(line[5]), self.ccd_size[0]/int(line[6]))
-        for i in range(0):
-            line = sif.readline()
-            print(line)
-        # Read data
-        raw_data = sif.read()
-        raw_data = raw_data[len(raw_data) - 4*np.prod(self.ccd_size):]
-        
-        self.data = np.fromstring(raw_data, dtype=np.float32)
+        # Data : the last ccd_size float32 of the file, mapped (only the frame is read)
+        offset = os.path.getsize(path) - 4*np.prod(self.ccd_size)
+        self.frames = SIFFRAMES(path, offset, self.ccd_size, 1)
         # self.data = self.data[:len(self.data)-2]
         # if line[3] < line[2]:
         #    self.shape = (len(self.data)/int(line[3]), int(line[3]))
@@ -111,7 +107,8 @@ class SifFile:
         #    # I'm not sure if this is correct...
         #    # Needs more testing.
         #    self.shape = (int(line[2]), len(self.data)/int(line[2]))
-        
-        self.data = np.reshape(self.data, self.ccd_size)
-       
+
+        self.data = self.frames[0]  # copy : the file is not kept mapped
+        self.frames.close()
+
         return self.data
\ No newline at end of file
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Autosave written by background threads : the acquisition never waits for
+the disk (NAS...).
+
+    writer = AUTOSAVEWRITER(maxQueued=64)
+    writer.saveError.connect(...)            # message of the failed writes
+    writer.submit(data, nomFichier, fmt)     # False if the queue is full
+    writer.close(timeout=10)                 # write what is queued and stop
+
+write(data, nomFichier, *args, owner=writer) writes a frame, the files it
+keeps open are closed by close(owner=writer) when the writer stops : the
+files of the other writers (other windows) stay open.
+
+The frames of a run (key(nomFichier, *args), default the run of saveFrame)
+are written in order by one thread : the rows of a shot in the files common
+to the run (<run>.h5, <run>.jsonl) are in the same order. Different runs
+are written in parallel.
+
+The frames submitted must not be modified afterwards (visu gives the result
+of the processing, a new array for each frame).
+"""
+
+import queue
+import threading
+import time
+from PyQt6 import QtCore
+
+from visu.frameStore import saveFrame, closeStores
+
+__all__ = ['AUTOSAVEWRITER', 'runKey']
+
+
+def runKey(nomFichier, fmt=None, meta=None, run=None, *args):
+    # run of visu.frameStore.saveFrame : its frames share the files (h5, jsonl)
+    return nomFichier if run is None else run
+
+
+class AUTOSAVEWRITER(QtCore.QObject):
+    '''
+    nbThreads threads call write(data, nomFichier, *args) for the submitted frames,
+    each one with its own queue : the frames of a run (key) go to the same
+    thread and are written in order.
+    At most maxQueued frames wait : when full, submit returns False at once
+    and the frame is counted in rejected (backpressure).
+    Failed writes are counted in failed and reported by saveError (queued
+    to the GUI thread).
+    '''
+    saveError = QtCore.pyqtSignal(str)
+
+    def __init__(self, maxQueued=64, nbThreads=2, write=saveFrame, close=closeStores,
+                 key=runKey, profiler=None, parent=None):
+        super().__init__(parent)
+        self.write = write
+        self.closeFiles = close
+        self.key = key
+        self.profiler = profiler  # visu.profiling.PROFILER : time of the writes
+        self.maxQueued = maxQueued
+        self._queues = [queue.Queue() for i in range(nbThreads)]  # bounded by submit
+        self._lock = threading.Lock()
+        self.saved = 0
+        self.failed = 0
+        self.rejected = 0
+        self.lastError = ''
+        self._threads = [threading.Thread(target=self._run, args=(q,), name='autosave-%i' % i,
+                                          daemon=True)
+                         for i, q in enumerate(self._queues)]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self):
+        # frames submitted not written yet
+        return sum(q.unfinished_tasks for q in self._queues)
+
+    def submit(self, data, nomFichier, *args):
+        '''
+        queue the frame, never blocks. Return False if the queue is full
+        '''
+        with self._lock:
+            if self.pending >= self.maxQueued:
+                self.rejected += 1
+                full = True
+            else:
+                q = self._queues[hash(self.key(nomFichier, *args)) % len(self._queues)]
+                q.put((data, nomFichier, args))
+                full = False
+        if full:
+            print(nomFichier, 'not saved : autosave queue full')
+            return False
+        return True
+
+    def _run(self, q):
+        while True:
+            item = q.get()
+            try:
+                if item is None:
+                    break
+                data, nomFichier, args = item
+                try:
+                    if self.profiler is not None:
+                        with self.profiler.stage('autosave'):
+                            self.write(data, nomFichier, *args, owner=self)
+                    else:
+                        self.write(data, nomFichier, *args, owner=self)
+                except Exception as e:
+                    with self._lock:
+                        self.failed += 1
+                        self.lastError = '%s : %s' % (nomFichier, e)
+                    print('autosave error', self.lastError)
+                    self.saveError.emit(self.lastError)
+                else:
+                    with self._lock:
+                        self.saved += 1
+            finally:
+                q.task_done()
+
+    def flush(self, timeout=None):
+        '''
+        wait until the queued frames are written. Return False after timeout (s)
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for q in self._queues:
+            with q.all_tasks_done:
+                while q.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    q.all_tasks_done.wait(remaining)
+        return True
+
+    def resetCounters(self):
+        with self._lock:
+            self.saved = 0
+            self.failed = 0
+            self.rejected = 0
+
+    def close(self, timeout=10.):
+        '''
+        write the queued frames then stop the threads and close the files
+        opened by this writer. After timeout (s, None : no limit) the close
+        gives up (write hanging on a NAS...) : the threads write what is left
+        in the background and the files stay open
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for q in self._queues:
+            q.put(None)
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        alive = sum(thread.is_alive() for thread in self._threads)
+        if alive:
+            # pending counts the None of the threads still alive
+            print('autosave : %i frames not written after %s s' % (self.pending - alive, timeout))
+            return False
+        self.closeFiles(owner=self)
+        return True
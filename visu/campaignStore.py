@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Campaign file : one HDF5 file per run with the results of all the shots
+(frames optional, deconvolved spectra, spectrum features, measurements and
+the calibration used), written shot by shot and readable during the run.
+
+    store = CAMPAIGNSTORE(path, frameShape=(H, W), energySize=E)
+    store.update(shot, frame=data, name='tir_0042')
+    store.update(shot, spectrum=s, features=f, calibration=(energy, params))
+    store.update(shot, measurement={'max': ..., 'sum': ...})
+
+    with CAMPAIGNREADER(path) as run:      # an other process, during the run
+        run.refresh()
+        run.shots(), run.spectra(), run.features(), run.measurements()
+
+One row per shot number : the values of a shot can come from different
+places at different times (spectro in the processing thread, measurements in
+the GUI), the row is appended at the first value of the shot. Values never
+given stay at their fill value (NaN, -1, 0).
+
+Layout (all datasets N rows, resizable, chunked, lzf by default) :
+    shot_number (N,)  timestamp (N,)  name (N,)
+    frames (N, H, W)                       if frameShape, chunk one frame
+    spectra (N, E)  spectrum_calibration (N,)   if energySize
+    features (N,)   Spectrum_Features.FEATURES_DTYPE
+    measurements (N,)  MEAS_COLUMNS float64
+    calibration_energy (K, E)  calibration_params (K,) json : one row per
+                                                calibration used
+E grows if a calibration of the run has a longer energy axis (calibration or
+lanex offset changed) : the shorter rows are padded with NaN,
+CAMPAIGNREADER.spectrum(i) gives the spectrum on its own energy axis.
+The file is written in SWMR mode (single writer multiple readers) : all the
+datasets are created when the file is created, readers open it with
+CAMPAIGNREADER (swmr=True) and see the new shots after refresh().
+Needs h5py.
+"""
+
+import json
+import threading
+import time
+import numpy as np
+
+from visu.spectrum_analysis.Spectrum_Features import FEATURES_DTYPE
+
+__all__ = ['CAMPAIGNSTORE', 'CAMPAIGNREADER', 'MEAS_COLUMNS', 'campaign', 'closeCampaigns',
+           'writeShot']
+
+# values of visu.winMeas.MEAS for a shot
+MEAS_COLUMNS = ('max', 'min', 'x_max', 'y_max', 'sum', 'mean', 'x_cmass', 'y_cmass',
+                'sum_threshold', 'user1', 'position')
+MEAS_DTYPE = np.dtype([(c, np.float64) for c in MEAS_COLUMNS])
+
+_campaigns = {}  # files opened : path -> CAMPAIGNSTORE
+_owners = {}  # path -> owners of the file (closeCampaigns)
+_campaignsLock = threading.Lock()
+
+
+def _json(obj):
+    return json.dumps(obj, default=lambda o: o.tolist() if hasattr(o, 'tolist') else str(o))
+
+
+def _trim(values):
+    # row without the NaN padding of the longer rows
+    valid = np.flatnonzero(~np.isnan(values))
+    return values[:valid[-1] + 1] if valid.size else values[:0]
+
+
+def _nanRecord(dtype):
+    # record of dtype filled with NaN (-1 for the integers)
+    record = np.zeros((), dtype)
+    for name in dtype.names:
+        record[name] = -1 if dtype[name].base.kind in 'iu' else np.nan
+    return record
+
+
+def campaign(path, owner=None, **layout):
+    '''
+    CAMPAIGNSTORE of path, opened (with layout) at the first call
+    '''
+    with _campaignsLock:
+        store = _campaigns.get(path)
+        if store is None:
+            store = _campaigns[path] = CAMPAIGNSTORE(path, **layout)
+        _owners.setdefault(path, set()).add(owner)
+        return store
+
+
+def closeCampaigns(owner=None):
+    '''
+    close the files used by owner (all the files if None). A file also used
+    by another owner stays open
+    '''
+    with _campaignsLock:
+        for path in list(_campaigns):
+            owners = _owners[path]
+            if owner is not None:
+                if owner not in owners:
+                    continue
+                owners.discard(owner)
+                if owners:
+                    continue
+            _campaigns.pop(path).close()
+            del _owners[path]
+
+
+def writeShot(frame, path, layout, shot, name=None, values=None, owner=None):
+    '''
+    write function of visu.autosave.AUTOSAVEWRITER for the campaign files
+    layout : {'frames': store the frames, 'energySize': E or None,
+    'compression'} used if the file is created (frame shape of the first frame)
+    values : other arguments of CAMPAIGNSTORE.update (spectrum, measurement...)
+    owner : user of the file kept open, closed by closeCampaigns(owner)
+    '''
+    frames = layout.get('frames', False) and frame is not None
+    store = campaign(path, owner, frameShape=frame.shape if frames else None,
+                     frameDtype=frame.dtype if frames else np.float64,
+                     energySize=layout.get('energySize'),
+                     compression=layout.get('compression', 'lzf'))
+    store.update(shot, frame=frame if frames else None, name=name, **(values or {}))
+
+
+class CAMPAIGNSTORE():
+    '''
+    writer of the campaign file path (created, or opened to append if it
+    exists : its layout is kept). frameShape / frameDtype : frames stored if
+    given, energySize : size of the first spectra (widened for a longer energy
+    axis), compression : 'lzf', 'gzip' or None
+    '''
+
+    def __init__(self, path, frameShape=None, frameDtype=np.float64, energySize=None,
+                 compression='lzf', swmr=True):
+        import h5py  # optional : only for the campaign files
+        self._h5py = h5py
+        self.path = str(path)
+        self.compression = compression
+        self._lock = threading.Lock()
+        self.file = h5py.File(self.path, 'a', libver='latest')
+        if 'shot_number' not in self.file:
+            self._create(frameShape, frameDtype, energySize)
+        self.rows = {int(s): i for i, s in enumerate(self.file['shot_number'][:])}
+        self._calibration = None  # (energy, params json) of the last calibration row
+        if 'calibration_params' in self.file and self.file['calibration_params'].shape[0]:
+            self._calibration = (_trim(self.file['calibration_energy'][-1]),
+                                 self.file['calibration_params'].asstr()[-1])
+        if swmr:
+            self.file.swmr_mode = True
+
+    def _dataset(self, name, shape, dtype, chunkRows, fillvalue=None, widen=False):
+        # widen : the rows can get longer (no dataset can be added in SWMR mode)
+        maxshape = (None,) + ((None,) * len(shape) if widen else shape)
+        self.file.create_dataset(name, shape=(0,) + shape, maxshape=maxshape, dtype=dtype,
+                                 chunks=(chunkRows,) + shape, fillvalue=fillvalue,
+                                 compression=self.compression if shape else None)
+
+    def _fit(self, name, values):
+        # values padded with NaN to the rows of name, widened if longer.
+        # None if the dataset can't be widened (file of an older layout)
+        values = np.asarray(values, dtype=np.float64).ravel()
+        dataset = self.file[name]
+        width = dataset.shape[1]
+        if values.size > width:
+            if dataset.maxshape[1] is not None:
+                print('campaign : %i points not saved in %s, %i in %s'
+                      % (values.size, name, width, self.path))
+                return None
+            dataset.resize(values.size, axis=1)
+        elif values.size < width:
+            values = np.concatenate([values, np.full(width - values.size, np.nan)])
+        return values
+
+    def _create(self, frameShape, frameDtype, energySize):
+        string = self._h5py.string_dtype()
+        self._dataset('shot_number', (), np.int64, 1024, -1)
+        self._dataset('timestamp', (), np.float64, 1024, np.nan)
+        self._dataset('name', (), string, 1024)
+        if frameShape is not None:
+            self._dataset('frames', tuple(frameShape), np.dtype(frameDtype), 1)
+        if energySize:
+            self._dataset('spectra', (int(energySize),), np.float64, 64, np.nan, widen=True)
+            self._dataset('spectrum_calibration', (), np.int32, 1024, -1)
+            self._dataset('calibration_energy', (int(energySize),), np.float64, 1, np.nan,
+                          widen=True)
+            self._dataset('calibration_params', (), string, 16)
+            self._dataset('features', (), FEATURES_DTYPE, 1024, _nanRecord(FEATURES_DTYPE))
+        self._dataset('measurements', (), MEAS_DTYPE, 1024, _nanRecord(MEAS_DTYPE))
+        self.file.attrs['created'] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _row(self, shot):
+        # row of the shot, appended to all the datasets if it is a new shot
+        row = self.rows.get(shot)
+        if row is not None:
+            return row
+        row = len(self.rows)
+        for name in ('shot_number', 'timestamp', 'name', 'frames', 'spectra',
+                     'spectrum_calibration', 'features', 'measurements'):
+            if name in self.file:
+                self.file[name].resize(row + 1, axis=0)
+        self.file['shot_number'][row] = shot
+        self.file['timestamp'][row] = time.time()
+        self.rows[shot] = row
+        return row
+
+    def _calibrationRow(self, energy, params):
+        # index of the calibration (energy axis, params), appended if it changed
+        # None if its energy axis can't be saved
+        energy = np.asarray(energy, dtype=np.float64)
+        params = _json(params)
+        last = self._calibration
+        k = self.file['calibration_params'].shape[0]
+        if last is not None and last[1] == params and np.array_equal(last[0], energy):
+            return k - 1
+        row = self._fit('calibration_energy', energy)
+        if row is None:
+            return None
+        for name in ('calibration_energy', 'calibration_params'):
+            self.file[name].resize(k + 1, axis=0)
+        self.file['calibration_energy'][k] = row
+        self.file['calibration_params'][k] = params
+        self._calibration = (energy, params)
+        return k
+
+    def update(self, shot, frame=None, name=None, spectrum=None, features=None,
+               calibration=None, measurement=None):
+        '''
+        write the values given for the shot (row appended at the first value)
+        calibration : (energy, params dict) of spectrum
+        measurement : dict column (MEAS_COLUMNS) -> value
+        values of a kind not in the file (no frames...) are ignored
+        '''
+        shot = int(shot)
+        with self._lock:
+            row = self._row(shot)
+            f = self.file
+            if name is not None:
+                f['name'][row] = str(name)
+            if frame is not None and 'frames' in f:
+                frame = np.asarray(frame)
+                if frame.shape != f['frames'].shape[1:]:
+                    print('campaign : frame %s not saved, shape %s in %s'
+                          % (frame.shape, f['frames'].shape[1:], self.path))
+                else:
+                    f['frames'][row] = frame
+            if 'spectra' in f:
+                if features is not None:
+                    f['features'][row] = features
+                if spectrum is not None:
+                    spectrum = self._fit('spectra', spectrum)
+                    k = self._calibrationRow(*calibration) if calibration is not None else None
+                    if spectrum is not None and (calibration is None or k is not None):
+                        f['spectra'][row] = spectrum
+                        if k is not None:
+                            f['spectrum_calibration'][row] = k
+            if measurement is not None:
+                record = _nanRecord(MEAS_DTYPE)
+                for key, value in measurement.items():
+                    if key in MEAS_COLUMNS and value is not None:
+                        record[key] = value
+                f['measurements'][row] = record
+            f.flush()
+        return row
+
+    def close(self):
+        with self._lock:
+            if self.file.id.valid:
+                self.file.close()
+
+
+class CAMPAIGNREADER():
+    '''
+    reader of a campaign file, possibly written at the same time (SWMR)
+    '''
+
+    def __init__(self, path):
+        import h5py
+        self.path = str(path)
+        self.file = h5py.File(self.path, 'r', libver='latest', swmr=True)
+
+    def refresh(self):
+        # see the shots written since the opening, return the number of shots
+        for dataset in self.file.values():
+            dataset.refresh()
+        return len(self)
+
+    def __len__(self):
+        return self.file['shot_number'].shape[0]
+
+    def shots(self):
+        return self.file['shot_number'][:]
+
+    def names(self):
+        return self.file['name'].asstr()[:]
+
+    def frame(self, i):
+        return self.file['frames'][i]
+
+    def spectra(self):
+        # (N, E) spectra, NaN for the shots without spectrum and after the end
+        # of a shorter energy axis (see spectrum)
+        return self.file['spectra'][:]
+
+    def spectrum(self, i):
+        # (energy, spectrum) of the row i on the energy axis of its calibration
+        energy = self.calibration(int(self.file['spectrum_calibration'][i]))[0]
+        return energy, self.file['spectra'][i][:energy.size]
+
+    def calibration(self, k=-1):
+        # (energy axis, params dict) of the calibration k
+        return (_trim(self.file['calibration_energy'][k]),
+                json.loads(self.file['calibration_params'].asstr()[k]))
+
+    def features(self):
+        return self.file['features'][:]
+
+    def measurements(self):
+        return self.file['measurements'][:]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def selfTest():
+    '''
+    run written with a calibration change in the middle (longer then shorter
+    energy axis), reopened to append, and read back
+    '''
+    import os
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'test_campaign.h5')
+        axes = [np.linspace(10, 100, 5), np.linspace(5, 200, 8), np.linspace(50, 80, 3)]
+        store = CAMPAIGNSTORE(path, energySize=axes[0].size)
+        for shot, energy in enumerate(axes):
+            features = _nanRecord(FEATURES_DTYPE)
+            features['charge'] = shot
+            store.update(shot, spectrum=energy / 10, features=features,
+                         calibration=(energy, {'lanex_offset_mm': shot}))
+            store.update(shot, measurement={'max': 10 * shot})
+        store.close()
+        store = CAMPAIGNSTORE(path)
+        store.update(3, spectrum=axes[2] / 10, calibration=(axes[2], {'lanex_offset_mm': 2}),
+                     measurement={'max': 30})
+        store.close()
+        with CAMPAIGNREADER(path) as run:
+            assert len(run) == 4 and run.spectra().shape == (4, 8)
+            assert list(run.file['spectrum_calibration'][:]) == [0, 1, 2, 2]
+            for i, energy in enumerate(axes + axes[2:]):
+                axis, spectrum = run.spectrum(i)
+                assert np.array_equal(axis, energy) and np.allclose(spectrum, energy / 10)
+            assert list(run.features()['charge'][:3]) == [0, 1, 2]
+            assert list(run.measurements()['max']) == [0, 10, 20, 30]
+            assert run.calibration(1)[1] == {'lanex_offset_mm': 1}
+    print('campaignStore : ok')
+
+
+if __name__ == "__main__":
+    selfTest()
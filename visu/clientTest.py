@@ -1,11 +1,5 @@
-import zmq
+from visu.messaging import request
 
-context = zmq.Context()
-socket = context.socket(zmq.REQ)
-socket.connect("tcp://localhost:1230")
-
-# send message to get answer
-socket.send_string("__GET__")
-
-reply = socket.recv_string()
+# send message to get answer (pooled REQ socket, shared zmq context)
+reply = request("tcp://localhost:1230", "__GET__", timeout=2000)
 print("Server answer:", reply)
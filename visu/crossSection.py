@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Cross section (profiles on the cross) and FWHM for visu
+
+fwhmLinear : half maximum crossings around the peak by linear interpolation
+             (fast, used while the cross moves)
+fwhmSpline : spline roots (splrep / sproot), the accurate mode
+CROSSSECTION : axes kept from one call to the other, maximum of the frame
+               computed again only if the data or the region changed
+"""
+
+import numpy as np
+
+__all__ = ['fwhmLinear', 'fwhmSpline', 'CROSSSECTION']
+
+
+def fwhmLinear(x, y, smooth=5):
+    '''
+    full width at half maximum of the peak of y
+    the crossings are the first points under half maximum on each side of the
+    maximum, interpolated linearly. None if the peak reaches the border
+    smooth: sigma (points) of the gaussian smoothing to reduce noise (0: none)
+    '''
+    y = np.asarray(y, dtype=np.float64)
+    if smooth > 0:
+        from scipy.ndimage import gaussian_filter1d  # scipy imported at the first use
+        y = gaussian_filter1d(y, smooth)
+    ipeak = int(y.argmax())
+    half = y[ipeak] / 2.
+    below = y < half
+    left = np.flatnonzero(below[:ipeak])
+    right = np.flatnonzero(below[ipeak:])
+    if left.size == 0 or right.size == 0:
+        return None
+    i0 = left[-1]            # y[i0] < half <= y[i0 + 1]
+    i1 = ipeak + right[0]    # y[i1 - 1] >= half > y[i1]
+    x0 = x[i0] + (half - y[i0]) * (x[i0 + 1] - x[i0]) / (y[i0 + 1] - y[i0])
+    x1 = x[i1 - 1] + (half - y[i1 - 1]) * (x[i1] - x[i1 - 1]) / (y[i1] - y[i1 - 1])
+    return np.around(abs(x1 - x0), decimals=2)
+
+
+def fwhmSpline(x, y, order=3):
+    """
+        Determine full-with-half-maximum of
+          a peaked set of points, x and y.
+        None if the half maximum is not crossed exactly twice
+    """
+    from scipy.interpolate import splrep, sproot
+    from scipy.ndimage import gaussian_filter1d
+    y = gaussian_filter1d(np.asarray(y, dtype=np.float64), 5)  # filtre for reducing noise
+    half_max = np.amax(y)/2.0
+    s = splrep(x, y - half_max, k=order)  # F
+    roots = sproot(s)  # Given the knots .
+    if len(roots) == 2:
+        return np.around(abs(roots[1] - roots[0]), decimals=2)
+    return None
+
+
+class CROSSSECTION():
+    '''
+    state kept between the calls of SEE.Coupe (every mouse move and every frame)
+    '''
+
+    def __init__(self):
+        self._axes = {}
+        self._maxData = None
+        self._maxKey = None
+        self._max = None
+
+    def axis(self, n):
+        # np.arange(n), created once for each size
+        axis = self._axes.get(n)
+        if axis is None:
+            if len(self._axes) > 8:
+                self._axes.clear()
+            axis = self._axes[n] = np.arange(n)
+        return axis
+
+    def maximum(self, data, key, compute):
+        '''
+        compute() -> position of the maximum, called only if data (same object)
+        or key (region...) changed since the last call
+        '''
+        if data is not self._maxData or key != self._maxKey:
+            self._max = compute()
+            self._maxData = data
+            self._maxKey = key
+        return self._max
+
+    def fwhm(self, x, y, accurate=False):
+        '''
+        fwhm of the profile y, spline if accurate (slower) otherwise linear crossings
+        '''
+        try:
+            return fwhmSpline(x, y) if accurate else fwhmLinear(x, y)
+        except Exception:
+            return None
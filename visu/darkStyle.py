@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Dark style sheet of the visu windows (qdarkstyle), loaded once
+
+    self.setStyleSheet(styleSheet())
+
+qdarkstyle.load_stylesheet reads and formats the style sheet and its
+resources at each call (a few ms) : every window of SEE called it.
+"""
+
+__all__ = ['styleSheet']
+
+_styleSheet = None
+
+
+def styleSheet():
+    # qdarkstyle style sheet for pyqt6, loaded at the first call
+    global _styleSheet
+    if _styleSheet is None:
+        import qdarkstyle  # pip install qdarkstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet
+        _styleSheet = qdarkstyle.load_stylesheet(qt_api='pyqt6')
+    return _styleSheet
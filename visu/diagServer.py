@@ -4,6 +4,7 @@ import threading
 import time
 import os
 import configparser
+from visu.messaging import getContext, ControlChannel
 
 cfg = configparser.ConfigParser()
 
@@ -28,6 +29,12 @@ class diagServer(threading.Thread):
         To update the dictionnary, use 'setData' method:
             serv.setData(newData)
 
+        or 'publish' to send a result tagged with its shot number:
+            serv.publish(shotNumber, result, name="spectrum")
+
+        Both methods can be called from any thread: the dictionary is
+        swapped under a lock, a client never receive a half updated one.
+
         To close the server, use the 'stop' method:
             serv.stop()
 
@@ -52,9 +59,13 @@ class diagServer(threading.Thread):
         self.name = name
         self._host = host
         self._data = data or {}
-        self.context = zmq.Context()
+        self._json = None # 'data' serialized, computed once per update
+        self._lock = threading.Lock()
+        self.verbose = True # print the messages received
+        self.context = getContext() # zmq context shared by the process
         self.socket = self.context.socket(zmq.REP)
         self.socket.bind(self._address)
+        self._control = ControlChannel(f"diagServer-{name}") # to stop the thread
 
         self._parent = parent
         if parent is not None:
@@ -83,7 +94,8 @@ class diagServer(threading.Thread):
         property to avoid 'data' direct modification.
         To modify the 'data', use 'setData'.
         '''
-        return self._data
+        with self._lock:
+            return self._data
     
     @property
     def running(self):
@@ -109,20 +121,51 @@ class diagServer(threading.Thread):
 
     def _setup_signal(self) -> None:
         '''
-        Subscribe to event from spectrometer
+        Register the server to the spectrometer: the spectrometer publish
+        its results directly (no Qt signal, no GUI event loop in between)
         '''
-        if self._parent.spectro is not None:
-            self._parent.winSpectro.signalSpectroDict.connect(self._foo)
-    
-    def _foo(self, spectro_data_dict):
-        print(f'Spectrometer dictionary: {spectro_data_dict}')
-
+        if getattr(self._parent, 'spectro', False) is not True:
+            return
+        winBuilt = getattr(self._parent, 'winBuilt', None)
+        if winBuilt is None or winBuilt('winSpectro'):
+            self._parent.winSpectro.setServer(self)
+        # otherwise SEE registers the server when it creates its window
 
     def setData(self, newData: dict) -> None:
         '''
         Set a new dictionary to transmit.
         '''
-        self._data = newData
+        with self._lock:
+            self._data = newData
+            self._json = None
+
+    def _serialized(self) -> str:
+        '''
+        'data' as a json string. Serialized at the first '__GET__' after
+        an update only, the following clients get the same string.
+        '''
+        with self._lock:
+            data, response = self._data, self._json
+        if response is None:
+            response = json.dumps(data)
+            with self._lock:
+                if self._data is data:
+                    self._json = response
+        return response
+
+    def publish(self, shotNumber: int, result: dict, name: str = "spectrum") -> None:
+        '''
+        Set a new result to transmit, tagged with the shot number it was
+        computed from. 'result' must be json serialisable.
+        '''
+        newData = {
+            "state": "running",
+            "shotNumber": int(shotNumber),
+            "timestamp": time.time(),
+            "data": result,
+            "name": name
+        }
+        self.setData(newData)
 
     def run(self) -> None:
         '''
@@ -138,13 +181,23 @@ class diagServer(threading.Thread):
         '''
         print(f"[diagServer {self.name}] Running on {self.address}")
 
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        poller.register(self._control.receiver, zmq.POLLIN)
+
         while self._running.is_set():
             
             try:
-                
-                if self.socket.poll(100): # poll for 100 ms
+                socks = dict(poller.poll()) # wait for a client or a stop command
+
+                if self._control.receiver in socks:
+                    self._control.recv()
+                    break
+
+                if self.socket in socks:
                     message = self.socket.recv_string()
-                    print(f"[diagServer] Received: '{message}'")
+                    if self.verbose:
+                        print(f"[diagServer] Received: '{message}'")
                     
                     # stop the thread on message '__STOP__'
                     if message == "__STOP__":
@@ -153,7 +206,7 @@ class diagServer(threading.Thread):
                     
                     # send the dictionnary on message '__GET__'
                     elif message == "__GET__":
-                        response = json.dumps(self.data)
+                        response = self._serialized()
                         self.socket.send_string(response)
                     
                     elif message == "__NAME__":
@@ -171,45 +224,29 @@ class diagServer(threading.Thread):
                     else :
                         self.socket.send_string("unable to understand the demande")
 
-                else:
-                    time.sleep(0.01) # wait 10 ms
-
             except zmq.error.ContextTerminated:
                 break
 
         print(f"[diagServer {self.name}] Closing socket...")
-        self.socket.close(0) # close the server
-        self.context.term() # close the context
+        self.socket.close(0) # close the server (the shared context stays open)
+        self._control.close()
         print(f"[diagServer {self.name}] Stopped")
 
     def stop(self) -> None:
         """
         Proper way to stop the thread where the server is running.
-        The function send a '__STOP__' message to the server,
-        which then close itself. To do so, the function create
-        a client that will send the message, wait for the server to
-        stop and then close itself.
+        The function send a stop command on the inproc control channel,
+        the server wakes up from its poll, close itself and the function
+        wait for the thread to terminate.
         """
         print("[diagServer] Stopping...")
-
-        # create a client ZMQ
-        ctx = zmq.Context()
-        sock = ctx.socket(zmq.REQ)
-        print(self.address)
-        sock.connect(self.addressForClient)
-
-        try:
-            # try to send '__STOP__' to the server
-            sock.send_string("__STOP__")
-            sock.recv_string()  # response is mandatory in REP
-        except Exception as e:
-            print(f"[diagServer {self.name}] Stop error:", e)
-
-        sock.close(0) # close the client
-        ctx.term() # close the client context
-
         self._running.clear() # update the flag
-        self.join() # wait until the thrad terminates
+        if self.is_alive():
+            self._control.send(b"STOP")
+            self.join() # wait until the thread terminates
+        else: # never started
+            self.socket.close(0)
+            self._control.close()
 
 
 if __name__ == "__main__":
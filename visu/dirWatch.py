@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Watch of a directory : the image files written in it by an acquisition are
+read and sent to SEE (live viewer of a DAQ writing on a disk or on the NAS)
+
+    watcher = DIRWATCHER(path)
+    watcher.newFrame.connect(func)         # func(data, shotNumber, path)
+    watcher.start() ... watcher.stop()
+
+The new files are found by inotify (Linux, ctypes : no dependency) or by
+scanning the directory every interval s (other systems, or poll=True : the
+network file systems (NFS, SMB) do not send the inotify events of the files
+written by an other computer).
+A file is read (visu.imageReader, in the thread of the watcher) once its size
+and modification time did not change for settle s, again if it can not be read
+yet (file being written) until timeout s. The files present at the start are
+not read. shotNumber : last number of the name (shot_0042.tif -> 42) or None
+"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+from PyQt6 import QtCore
+
+__all__ = ['DIRWATCHER', 'shotFromName', 'EXTENSIONS']
+
+EXTENSIONS = ('.tif', '.tiff', '.sif', '.spe')
+
+# inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def shotFromName(path):
+    # last number of the file name, None if there is none
+    numbers = re.findall(r'\d+', os.path.splitext(os.path.basename(path))[0])
+    return int(numbers[-1]) if numbers else None
+
+
+class _Inotify():
+    '''
+    inotify watch of one directory : wait(timeout) -> names changed
+    '''
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, 'inotify_add_watch %s' % path)
+
+    def wait(self, timeout):
+        names = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return names
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        i = 0
+        while i + _EVENT.size <= len(buf):
+            wd, mask, cookie, length = _EVENT.unpack_from(buf, i)
+            i += _EVENT.size
+            name = buf[i:i + length].rstrip(b'\0')
+            i += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Poll():
+    '''
+    scan of the directory every interval s : wait(timeout) -> names changed
+    '''
+
+    def __init__(self, path, interval=0.5):
+        self.path = path
+        self.interval = interval
+        self.state = self.scan()
+        self.next = time.monotonic() + interval
+
+    def scan(self):
+        state = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                state[entry.name] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def wait(self, timeout):
+        delay = self.next - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(delay, 0))
+        self.next = time.monotonic() + self.interval
+        try:
+            state = self.scan()
+        except OSError as e:
+            print('watch : scan of', self.path, e)
+            return set()
+        names = set(name for name, st in state.items() if self.state.get(name) != st)
+        self.state = state
+        return names
+
+    def close(self):
+        pass
+
+
+class DIRWATCHER(QtCore.QThread):
+    '''
+    thread sending newFrame(data, shotNumber, path) for the image files
+    (extensions) written in path
+    poll : scan the directory instead of inotify (always if inotify fails)
+    '''
+    newFrame = QtCore.pyqtSignal(object, object, str)
+
+    def __init__(self, path, extensions=EXTENSIONS, poll=False, interval=0.5, settle=0.3,
+                 timeout=30, parent=None):
+        super().__init__(parent)
+        self.path = str(path)
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.poll = poll
+        self.interval = interval
+        self.settle = settle
+        self.timeout = timeout
+        self.stopped = False
+        self.nbFrames = 0
+        self.mode = None  # 'inotify' or 'poll' when started
+
+    def stop(self):
+        self.stopped = True
+        self.wait()
+
+    def backend(self):
+        if not self.poll and sys.platform.startswith('linux'):
+            try:
+                backend = _Inotify(self.path)
+                self.mode = 'inotify'
+                return backend
+            except (OSError, AttributeError) as e:
+                print('watch : inotify not available (%s), scan of the directory' % e)
+        self.mode = 'poll'
+        return _Poll(self.path, self.interval)
+
+    def run(self):
+        backend = self.backend()
+        print('watch %s (%s)' % (self.path, self.mode))
+        pending = {}  # path -> [size, mtime, time of the last change, time first seen]
+        try:
+            while not self.stopped:
+                for name in backend.wait(min(self.settle, 0.2) if pending else 0.2):
+                    if os.path.splitext(name)[1].lower() in self.extensions:
+                        path = os.path.join(self.path, name)
+                        if path not in pending:
+                            now = time.monotonic()
+                            pending[path] = [None, None, now, now]
+                for path in sorted(pending):
+                    if self.stopped:
+                        break
+                    entry = pending[path]
+                    if not self.ready(path, entry):
+                        if time.monotonic() - entry[3] > self.timeout:
+                            del pending[path]  # removed, or written for too long
+                        continue
+                    del pending[path]
+                    error = self.ingest(path)
+                    if error is not None:
+                        now = time.monotonic()
+                        if now - entry[3] < self.timeout:  # probably still being written
+                            pending[path] = [None, None, now, entry[3]]
+                        else:
+                            print('watch : file not read', path, error)
+        finally:
+            backend.close()
+
+    def ready(self, path, entry):
+        # size and mtime unchanged for settle s
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        now = time.monotonic()
+        if (st.st_size, st.st_mtime_ns) != (entry[0], entry[1]):
+            entry[0], entry[1], entry[2] = st.st_size, st.st_mtime_ns, now
+            return False
+        return st.st_size > 0 and now - entry[2] >= self.settle
+
+    def ingest(self, path):
+        # read path and send it, the exception if it can not be read
+        from visu.imageReader import readImage
+        try:
+            data, meta = readImage(path)
+        except Exception as e:
+            return e
+        self.nbFrames += 1
+        self.newFrame.emit(data, shotFromName(path), path)
+        return None
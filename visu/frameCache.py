@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Cache of the frames of the files browsed with the slider of SEE
+
+    cache = FRAMECACHE(budget=512 * 2**20)
+    data = cache.get(path)                 # from the cache, or read now
+    cache.prefetch([next, next + 1, previous])   # read in the background
+
+LRU of the decoded frames (first frame, visu.imageReader) bounded by budget
+bytes. The files given to prefetch are read by a small thread pool, the ones
+asked before and not started yet are dropped (the slider moved). A file is
+known by its path, modification time and size : a file written again is read
+again. The frames are read only (shared between the cache and the display).
+"""
+
+import collections
+import concurrent.futures
+import os
+import threading
+
+__all__ = ['FRAMECACHE']
+
+
+def _read(path):
+    from visu.imageReader import readImage
+    return readImage(path)[0]
+
+
+class FRAMECACHE():
+    '''
+    LRU of frames by file, budget in bytes, workers : threads of prefetch
+    '''
+
+    def __init__(self, budget=512 * 2**20, workers=2, read=_read):
+        self.budget = budget
+        self.read = read
+        self.frames = collections.OrderedDict()  # key -> frame, last used at the end
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._running = {}  # key -> future of the prefetch
+        self._lock = threading.RLock()  # done callbacks may run in prefetch
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    @staticmethod
+    def key(path):
+        st = os.stat(path)
+        return (str(path), st.st_mtime_ns, st.st_size)
+
+    def _store(self, key, data):
+        # with self._lock
+        data.flags.writeable = False
+        if key in self.frames:
+            return self.frames[key]
+        self.frames[key] = data
+        self.size += data.nbytes
+        while self.size > self.budget and len(self.frames) > 1:
+            old, frame = self.frames.popitem(last=False)
+            self.size -= frame.nbytes
+        return data
+
+    def get(self, path):
+        '''
+        frame of path : cached, being prefetched (wait for it) or read now
+        exceptions of the reader are raised
+        '''
+        key = self.key(path)
+        with self._lock:
+            data = self.frames.get(key)
+            if data is not None:
+                self.frames.move_to_end(key)
+                self.hits += 1
+                return data
+            future = self._running.get(key)
+        if future is not None and not future.cancel():
+            data = future.result()  # read by the prefetch (started)
+            with self._lock:
+                self.hits += 1
+                return self.frames.get(key, data)
+        data = self.read(path)
+        with self._lock:
+            self.misses += 1
+            return self._store(key, data)
+
+    def _prefetched(self, key, future):
+        with self._lock:
+            if self._running.get(key) is future:
+                del self._running[key]
+            if not future.cancelled() and future.exception() is None:
+                self._store(key, future.result())
+
+    def prefetch(self, paths):
+        '''
+        read paths (in this order) in the background, the prefetch of the
+        other files not started yet is canceled
+        '''
+        keys = []
+        for path in paths:
+            try:
+                keys.append((self.key(path), path))
+            except OSError:
+                pass
+        wanted = set(key for key, path in keys)
+        with self._lock:
+            for key, future in list(self._running.items()):
+                if key not in wanted:
+                    future.cancel()  # its callback removes it from _running
+            for key, path in keys:
+                if key in self.frames or key in self._running:
+                    continue
+                future = self._pool.submit(self.read, path)
+                self._running[key] = future
+                future.add_done_callback(lambda f, key=key: self._prefetched(key, f))
+
+    def clear(self):
+        with self._lock:
+            for future in list(self._running.values()):
+                future.cancel()
+            self._running.clear()
+            self.frames.clear()
+            self.size = 0
+
+    def close(self):
+        self.clear()
+        self._pool.shutdown(wait=True)
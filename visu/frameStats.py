@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Statistics of a frame for the display (colour levels, histogram, palette)
+
+    stats = FRAMESTATS(data)               # once per frame, strided subsample
+    imh = STATSIMAGEITEM()                 # ImageItem using stats for the
+    imh.stats = stats                      # histogram of the HistogramLUTItem
+    imh.setImage(data, levels=stats.levels(robust=True), autoLevels=False)
+
+min, max, percentiles and histogram come from a subsample of about
+samples pixels (one pixel every step in each direction) : no full pass over
+the frame. The robust levels (percentiles) ignore the few hot pixels.
+"""
+
+import math
+import numpy as np
+import pyqtgraph as pg
+
+__all__ = ['FRAMESTATS', 'STATSIMAGEITEM']
+
+
+class FRAMESTATS():
+    '''
+    statistics of data computed on a strided subsample
+    min, max : of the subsample
+    percentile(p) and histogram are computed at the first call and kept
+    '''
+
+    ROBUST = (0.1, 99.9)  # percentiles of the robust levels
+
+    def __init__(self, data, samples=512 * 512, bins=256):
+        self.shape = data.shape
+        self.step = max(1, int(math.sqrt(data.size / samples)))
+        sample = data[::self.step, ::self.step]
+        if sample.dtype.kind == 'f':
+            sample = sample[np.isfinite(sample)]
+        self.sample = sample.ravel()
+        self.bins = bins
+        if self.sample.size == 0:
+            self.min, self.max = 0., 0.
+        else:
+            self.min = float(self.sample.min())
+            self.max = float(self.sample.max())
+        self._percentiles = {}
+        self._histogram = None
+
+    def percentile(self, p):
+        value = self._percentiles.get(p)
+        if value is None:
+            value = float(np.percentile(self.sample, p)) if self.sample.size else 0.
+            self._percentiles[p] = value
+        return value
+
+    def levels(self, robust=False):
+        '''
+        colour levels (min, max), or (0.1 %, 99.9 %) percentiles if robust
+        '''
+        if robust:
+            xmin, xmax = self.percentile(self.ROBUST[0]), self.percentile(self.ROBUST[1])
+        else:
+            xmin, xmax = self.min, self.max
+        if xmax <= xmin:
+            xmax = xmin + 1
+        return xmin, xmax
+
+    def histogram(self):
+        # (hist, edges) of the subsample between min and max
+        if self._histogram is None:
+            xmin, xmax = self.levels()
+            self._histogram = np.histogram(self.sample, bins=self.bins, range=(xmin, xmax))
+        return self._histogram
+
+
+class STATSIMAGEITEM(pg.ImageItem):
+    '''
+    ImageItem giving the histogram of its FRAMESTATS (stats attribute) to the
+    HistogramLUTItem instead of computing it again from the image
+    '''
+
+    def __init__(self, *args, **kwds):
+        super().__init__(*args, **kwds)
+        self.stats = None
+
+    def getHistogram(self, bins='auto', step='auto', perChannel=False, **kwds):
+        if self.stats is None or perChannel or bins != 'auto' or step != 'auto':
+            return super().getHistogram(bins=bins, step=step, perChannel=perChannel, **kwds)
+        hist, edges = self.stats.histogram()
+        return edges[:-1], hist
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Writing of the frames saved by visu (autosave)
+
+formats :
+    TIFF : one file per shot, rotated as the files read by visu
+    txt  : one text file per shot (slow and big, for compatibility)
+    npy  : one binary .npy file per shot (no conversion) and the metadata of
+           each shot appended to <run>.jsonl (one json per line)
+    hdf5 : all the shots of a run appended to <run>.h5, chunked one frame per
+           chunk, optionally compressed with lzf (fast). Needs h5py
+
+metadata : dict saved with the npy and hdf5 frames (shot number, timestamp,
+ROI, processing parameters...)
+"""
+
+import json
+import os
+import threading
+import time
+import numpy as np
+from PIL import Image
+
+__all__ = ['FORMATS', 'saveFrame', 'H5FRAMESTORE', 'closeStores']
+
+FORMATS = ('TIFF', 'txt', 'npy', 'hdf5')
+
+_stores = {}  # hdf5 files opened : path -> H5FRAMESTORE
+_owners = {}  # path -> owners of the file (closeStores)
+_storesLock = threading.Lock()
+_sidecarLock = threading.Lock()
+
+
+def _json(meta):
+    return json.dumps(meta, default=lambda o: o.tolist() if hasattr(o, 'tolist') else str(o))
+
+
+def saveFrame(data, nomFichier, fmt='TIFF', meta=None, run=None, compression=False, owner=None):
+    '''
+    save data in nomFichier + extension of the format fmt
+    fmt: one of FORMATS (True/False : TIFF/txt)
+    meta: dict of the shot (npy and hdf5)
+    run: path without extension of the files common to the shots (<run>.jsonl,
+         <run>.h5), default nomFichier
+    compression: lzf compression (hdf5)
+    owner: user of the hdf5 file kept open, closed by closeStores(owner)
+    '''
+    if fmt is True or fmt is False:
+        fmt = 'TIFF' if fmt else 'txt'
+    if run is None:
+        run = nomFichier
+    if meta is None:
+        meta = {}
+
+    if fmt == 'TIFF':
+        img_PIL = Image.fromarray(np.rot90(data, 1))
+        img_PIL.save(str(nomFichier) + '.TIFF', format='TIFF')
+    elif fmt == 'txt':
+        np.savetxt(str(nomFichier)+'.txt', data)
+    elif fmt == 'npy':
+        np.save(str(nomFichier) + '.npy', data)
+        line = dict(meta, file=os.path.basename(str(nomFichier)) + '.npy')
+        with _sidecarLock:
+            with open(str(run) + '.jsonl', 'a') as f:
+                f.write(_json(line) + '\n')
+    elif fmt == 'hdf5':
+        store(str(run) + '.h5', compression, owner).append(data, os.path.basename(str(nomFichier)), meta)
+    else:
+        raise ValueError('unknown format %s' % fmt)
+    print(nomFichier, 'saved')
+
+
+def store(path, compression=False, owner=None):
+    '''
+    H5FRAMESTORE of path, opened at the first call
+    '''
+    with _storesLock:
+        s = _stores.get(path)
+        if s is None:
+            s = _stores[path] = H5FRAMESTORE(path, compression)
+        _owners.setdefault(path, set()).add(owner)
+        return s
+
+
+def closeStores(owner=None):
+    '''
+    close the files used by owner (all the files if None). A file also used
+    by another owner stays open
+    '''
+    with _storesLock:
+        for path in list(_stores):
+            owners = _owners[path]
+            if owner is not None:
+                if owner not in owners:
+                    continue
+                owners.discard(owner)
+                if owners:
+                    continue
+            _stores.pop(path).close()
+            del _owners[path]
+
+
+class H5FRAMESTORE():
+    '''
+    frames appended to a hdf5 file. One group per frame shape and dtype :
+        frames_<H>x<W>_<dtype>/frames       (N, H, W) chunk (1, H, W)
+                              /shot_number  (N,)
+                              /timestamp    (N,) s since epoch
+                              /name         (N,) name of the shot
+                              /metadata     (N,) json
+    '''
+
+    def __init__(self, path, compression=False):
+        import h5py  # optional : only for this format
+        self._h5py = h5py
+        self.path = path
+        self.compression = 'lzf' if compression else None
+        self.file = h5py.File(path, 'a')
+        self._lock = threading.Lock()
+
+    def _group(self, data):
+        name = 'frames_%s_%s' % ('x'.join(str(n) for n in data.shape), data.dtype.name)
+        group = self.file.get(name)
+        if group is not None:
+            return group
+        group = self.file.create_group(name)
+        group.create_dataset('frames', shape=(0,) + data.shape, maxshape=(None,) + data.shape,
+                             dtype=data.dtype, chunks=(1,) + data.shape,
+                             compression=self.compression)
+        string = self._h5py.string_dtype()
+        for key, dtype in (('shot_number', np.int64), ('timestamp', np.float64),
+                           ('name', string), ('metadata', string)):
+            group.create_dataset(key, shape=(0,), maxshape=(None,), dtype=dtype, chunks=(256,))
+        return group
+
+    def append(self, data, name, meta):
+        data = np.asarray(data)
+        with self._lock:
+            group = self._group(data)
+            n = group['frames'].shape[0]
+            for key in ('frames', 'shot_number', 'timestamp', 'name', 'metadata'):
+                group[key].resize(n + 1, axis=0)
+            group['frames'][n] = data
+            group['shot_number'][n] = int(meta.get('shotNumber', -1))
+            group['timestamp'][n] = float(meta.get('timestamp', time.time()))
+            group['name'][n] = name
+            group['metadata'][n] = _json(meta)
+            self.file.flush()
+
+    def close(self):
+        with self._lock:
+            self.file.close()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Readers of the image files opened by visu, in one place
+
+    data, meta = readImage(path)           # frame 0 in the orientation of visu
+    images = openImage(path)               # IMAGEFILE : len(images) frames,
+    data = images[i]                       # each one read when asked
+    meta = images.metadata(i)
+
+The reader is chosen from the extension, or from the first bytes of the file
+(magic) when the extension is unknown. The txt frames are parsed once and
+then read from their .npy sidecar (visu.textFrame). Orientation of visu : TIFF / png / jpg
+and sif rotated by rot90(data, 3), txt, SPE, npy and hdf5 (autosave) as read.
+
+To add a format :
+    @register('fits', ('.fits', '.fit'), magic=b'SIMPLE')
+    def openFits(path):
+        return IMAGEFILE(path, 'fits', nbFrames, lambda i: ..., meta)
+
+benchmark : python -m visu.imageReader [files]  (time of readImage per format)
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+__all__ = ['IMAGEFILE', 'register', 'findReader', 'openImage', 'readImage',
+           'extensions', 'fileFilter', 'benchmark']
+
+_readers = []  # (name, extensions, magic, opener) in the order of registration
+
+
+class IMAGEFILE():
+    '''
+    frames of an image file, read on demand by read(i)
+    meta : dict of the file (format, path ...), frameMeta(i) : dict of frame i
+    '''
+
+    def __init__(self, path, fmt, nbFrames, read, meta=None, frameMeta=None, close=None):
+        self.path = str(path)
+        self.format = fmt
+        self.nbFrames = nbFrames
+        self._read = read
+        self.meta = dict(meta or {}, format=fmt, path=self.path, nbFrames=nbFrames)
+        self._frameMeta = frameMeta
+        self._close = close
+
+    def __len__(self):
+        return self.nbFrames
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.nbFrames
+        if not 0 <= i < self.nbFrames:
+            raise IndexError('frame %i of %i' % (i, self.nbFrames))
+        return self._read(i)
+
+    def __iter__(self):
+        for i in range(self.nbFrames):
+            yield self._read(i)
+
+    def metadata(self, i=0):
+        meta = dict(self.meta, frame=i)
+        if self._frameMeta is not None:
+            meta.update(self._frameMeta(i))
+        return meta
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def register(name, exts, magic=None):
+    '''
+    decorator of opener(path) -> IMAGEFILE for the extensions exts
+    magic: first bytes of the files (bytes or tuple of bytes) if any
+    '''
+    if isinstance(magic, bytes):
+        magic = (magic,)
+
+    def decorator(opener):
+        _readers.append((name, tuple(e.lower() for e in exts), magic or (), opener))
+        return opener
+    return decorator
+
+
+def extensions():
+    return [e for reader in _readers for e in reader[1]]
+
+
+def fileFilter():
+    # filter of QFileDialog : all the images then one line per format
+    def patterns(exts):
+        return ' '.join('*%s *%s' % (e, e.upper()) for e in exts)
+    lines = ['Images (%s)' % patterns(extensions())]
+    for name, exts, magic, opener in _readers:
+        lines.append('%s (%s)' % (name, patterns(exts)))
+    return ';;'.join(lines)
+
+
+def findReader(path):
+    '''
+    (name, opener) of path : from the extension, otherwise from the magic bytes
+    '''
+    ext = os.path.splitext(str(path))[1].lower()
+    for name, exts, magic, opener in _readers:
+        if ext in exts:
+            return name, opener
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    for name, exts, magic, opener in _readers:
+        if any(head.startswith(m) for m in magic):
+            return name, opener
+    raise ValueError('unknown image format : %s' % path)
+
+
+def openImage(path):
+    '''
+    IMAGEFILE of path. ValueError if the format is unknown
+    '''
+    name, opener = findReader(path)
+    return opener(str(path))
+
+
+def readImage(path, frame=0):
+    '''
+    (data, meta) of the frame of path
+    '''
+    with openImage(path) as images:
+        return images[frame], images.metadata(frame)
+
+
+# --------------------------------------------------------------------------
+#                               readers
+# --------------------------------------------------------------------------
+
+@register('Text File', ('.txt',))
+def openText(path):
+    from visu.textFrame import loadText  # .npy sidecar cache
+    data = loadText(path)
+    return IMAGEFILE(path, 'txt', 1, lambda i: data)
+
+
+@register('Ropper File', ('.spe',))
+def openSpe(path):
+    from visu.winspec import SpeFile
+    spe = SpeFile(path)
+    meta = {'gain': spe.gain, 'adc': spe.adc, 'adc_rate': spe.adc_rate,
+            'readout_time': spe.readout_time}
+    return IMAGEFILE(path, 'spe', len(spe), spe.frame, meta)
+
+
+@register('TIFF file', ('.tiff', '.tif', '.png', '.jpg', '.jpeg'),
+          magic=(b'II*\x00', b'MM\x00*', b'\x89PNG', b'\xff\xd8\xff'))
+def openPil(path):
+    img = Image.open(path)
+
+    def read(i):
+        img.seek(i)
+        return np.rot90(np.array(img), 3)
+    meta = {'mode': img.mode, 'pilFormat': img.format}
+    return IMAGEFILE(path, 'tiff', getattr(img, 'n_frames', 1), read, meta, close=img.close)
+
+
+@register('Andor File', ('.sif',), magic=b'Andor Technology Multi-Channel File')
+def openSif(path):
+    # kinetic series : frames read on demand (visu.sifreader), one image : visu.andor
+    from visu.sifreader import SIFFile
+    try:
+        series = SIFFile(path)
+    except Exception:
+        series = None
+    if series is not None and series.stacksize > 1:
+        meta = {'camera': series.model, 'exposuretime': series.exposuretime}
+        return IMAGEFILE(path, 'sif', len(series), lambda i: np.rot90(series.read_block(i), 3), meta,
+                         close=series.close)
+    from visu.andor import SifFile
+    sif = SifFile()
+    data = np.rot90(sif.openA(path), 3)
+    meta = {'camera': sif.cammodel.decode(errors='replace')}
+    return IMAGEFILE(path, 'sif', 1, lambda i: data, meta)
+
+
+@register('Numpy File', ('.npy',), magic=b'\x93NUMPY')
+def openNpy(path):
+    data = np.load(path, mmap_mode='r')
+    if data.ndim == 2:
+        return IMAGEFILE(path, 'npy', 1, lambda i: np.array(data))
+    return IMAGEFILE(path, 'npy', data.shape[0], lambda i: np.array(data[i]))
+
+
+@register('HDF5 File', ('.h5', '.hdf5'), magic=b'\x89HDF')
+def openH5(path):
+    # frames of visu.frameStore (first group frames_*)
+    import h5py  # optional : only for this format
+    f = h5py.File(path, 'r')
+    names = sorted(name for name in f if name.startswith('frames_'))
+    if not names:
+        f.close()
+        raise ValueError('no frames in %s' % path)
+    group = f[names[0]]
+    frames = group['frames']
+
+    def frameMeta(i):
+        meta = json.loads(group['metadata'][i]) if 'metadata' in group else {}
+        if 'name' in group:
+            meta['name'] = group['name'].asstr()[i]
+        return meta
+    return IMAGEFILE(path, 'hdf5', frames.shape[0], lambda i: frames[i], {'group': names[0]},
+                     frameMeta, close=f.close)
+
+
+# --------------------------------------------------------------------------
+#                               benchmark
+# --------------------------------------------------------------------------
+
+def benchmark(paths=None, shape=(2048, 2048), repeat=5):
+    '''
+    mean time (s) of readImage per file : paths given, or one file per format
+    written by visu.frameStore (TIFF, txt, npy, hdf5) in a temporary directory
+    '''
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if not paths:
+            from visu.frameStore import saveFrame, closeStores
+            data = (np.random.rand(*shape) * 60000).astype(np.uint16)
+            paths = []
+            for fmt, ext in (('TIFF', '.TIFF'), ('txt', '.txt'), ('npy', '.npy'), ('hdf5', '.h5')):
+                name = os.path.join(directory, 'bench_' + fmt)
+                try:
+                    saveFrame(data, name, fmt, owner='benchmark')
+                except ImportError as e:
+                    print(fmt, 'skipped :', e)
+                    continue
+                paths.append(name + ext)
+            closeStores('benchmark')
+        for path in paths:
+            t = []
+            for n in range(repeat):
+                t0 = time.perf_counter()
+                data, meta = readImage(path)
+                t.append(time.perf_counter() - t0)
+            results[path] = {'format': meta['format'], 'shape': data.shape,
+                             'mean': float(np.mean(t)), 'min': float(np.min(t)),
+                             'MB': os.path.getsize(path) / 1e6}
+            print('%-8s %-14s %8.1f ms (min %.1f ms) %8.1f MB  %s' % (
+                meta['format'], data.shape, results[path]['mean'] * 1e3,
+                results[path]['min'] * 1e3, results[path]['MB'], os.path.basename(path)))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='time of the image readers of visu')
+    parser.add_argument('files', nargs='*', help='files to read (default : generated)')
+    parser.add_argument('--size', type=int, default=2048, help='size of the generated frames')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.files, (args.size, args.size), args.repeat)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Latency histograms with fixed log spaced bins (constant memory)
+export in json or csv
+"""
+
+import json
+import threading
+import numpy as np
+
+__all__ = ['LatencyHistogram']
+
+
+class LatencyHistogram():
+    '''
+    Histogram of durations in seconds.
+    bins are log spaced between tmin and tmax (default 10 us to 100 s),
+    values outside are counted in the first/last bin.
+    add can be called from one thread while an other one export.
+    '''
+
+    def __init__(self, name='latency', tmin=1e-5, tmax=100., nbins=140):
+        self.name = name
+        self.edges = np.geomspace(tmin, tmax, nbins + 1)
+        self.counts = np.zeros(nbins, dtype=np.int64)
+        self.total = 0.
+        self.maxValue = 0.
+        self._lock = threading.Lock()
+
+    def add(self, value):
+        i = int(np.searchsorted(self.edges, value, side='right')) - 1
+        i = min(max(i, 0), self.counts.size - 1)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += value
+            if value > self.maxValue:
+                self.maxValue = value
+
+    def reset(self):
+        with self._lock:
+            self.counts[:] = 0
+            self.total = 0.
+            self.maxValue = 0.
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def percentile(self, p):
+        '''
+        p in % ; value is the upper edge of the bin (resolution of the histogram)
+        '''
+        with self._lock:
+            counts = self.counts.copy()
+        n = counts.sum()
+        if n == 0:
+            return float('nan')
+        i = int(np.searchsorted(np.cumsum(counts), p / 100. * n, side='left'))
+        return float(self.edges[min(i, counts.size - 1) + 1])
+
+    def summary(self):
+        n = self.count
+        return {'name': self.name,
+                'count': n,
+                'mean': self.total / n if n else float('nan'),
+                'p50': self.percentile(50),
+                'p95': self.percentile(95),
+                'p99': self.percentile(99),
+                'max': self.maxValue}
+
+    def export(self, path):
+        '''
+        save histogram : .csv (bin edges and counts) otherwise json
+        '''
+        with self._lock:
+            counts = self.counts.copy()
+        if str(path).endswith('.csv'):
+            with open(path, 'w') as f:
+                f.write('low_s,high_s,count\n')
+                for low, high, c in zip(self.edges[:-1], self.edges[1:], counts):
+                    f.write('%g,%g,%d\n' % (low, high, c))
+        else:
+            out = self.summary()
+            out['edges'] = self.edges.tolist()
+            out['counts'] = counts.tolist()
+            with open(path, 'w') as f:
+                json.dump(out, f, indent=1)
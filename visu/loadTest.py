@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Local stand-in of the shot event server and load test of diagServer / THREADCLIENT.
+Everything runs in this process over the loopback : no external service needed.
+
+EVENTSERVER : stand-in of the server THREADCLIENT connects to
+    PUB  on port   : SHOOT {number, timestamp}, HEARTBEAT, REGISTERED, CONFIG
+    SUB  on port+1 : REGISTER / UNREGISTER from the clients
+
+runLoadTest : EVENTSERVER emits shots at 'rate' Hz, a producer publishes a
+spectrum result to a diagServer for each shot (as visu does), N clients
+(SHOTCLIENT) receive the shots and ask the diagServer '__GET__' for each of
+them, and M clients of visu (VISUCLIENT : visu.WinOption.THREADCLIENT, the
+real client) receive the shots.
+It measures throughput, p50/p99 latencies and dropped / stale shots ;
+the visu_* results are the ones of THREADCLIENT.
+
+to use:
+    python -m visu.loadTest --rate 10 --shots 200 --clients 8 --visu-clients 2
+    python -m visu.loadTest --server-only    # stand-in server for a visu instance
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import zmq
+from PyQt6 import QtCore
+
+from visu.diagServer import diagServer
+from visu.messaging import getContext, pool, request, ControlChannel
+
+__all__ = ['EVENTSERVER', 'SHOTCLIENT', 'PRODUCER', 'VISUCLIENT', 'runLoadTest']
+
+
+class EVENTSERVER(threading.Thread):
+    '''
+    Stand-in of the shot number server.
+    port: PUB port, the SUB (registration) port is port+1
+    rate: shots per second (0 : heartbeat only)
+    nbShots: number of shots to emit (None: until stop)
+    startDelay: time (s) before the first shot, to let the subscribers connect
+    '''
+
+    def __init__(self, port=5009, rate=10., nbShots=None, firstShot=1, startDelay=0.5,
+                 heartbeat=1., path='', autosave=False):
+        super().__init__(daemon=True)
+        self.port = port
+        self.rate = rate
+        self.nbShots = nbShots
+        self.firstShot = firstShot
+        self.startDelay = startDelay
+        self.heartbeat = heartbeat
+        self.path = path
+        self.autosave = autosave
+        self.clients = {}
+        self.shotsSent = []
+        self.finished = threading.Event()   # set when all the shots are sent
+
+        ctx = getContext()
+        self.pub = ctx.socket(zmq.PUB)
+        self.pub.setsockopt(zmq.LINGER, 0)
+        self.pub.bind(f"tcp://*:{port}")
+        self.sub = ctx.socket(zmq.SUB)
+        self.sub.setsockopt(zmq.LINGER, 0)
+        self.sub.bind(f"tcp://*:{port + 1}")
+        self.sub.setsockopt_string(zmq.SUBSCRIBE, "")
+        self._control = ControlChannel("eventServer")
+
+    def _send(self, topic, event):
+        self.pub.send_string(topic, zmq.SNDMORE)
+        self.pub.send_json(event)
+
+    def run(self):
+        poller = zmq.Poller()
+        poller.register(self.sub, zmq.POLLIN)
+        poller.register(self._control.receiver, zmq.POLLIN)
+
+        t0 = time.perf_counter() + self.startDelay
+        nextHeartbeat = time.perf_counter()
+        number = self.firstShot
+        period = 1. / self.rate if self.rate > 0 else None
+
+        while True:
+            now = time.perf_counter()
+            if now >= nextHeartbeat:
+                self._send("HEARTBEAT", {'timestamp': time.time()})
+                nextHeartbeat = now + self.heartbeat
+
+            nextShot = None
+            if period is not None and not self.finished.is_set():
+                nextShot = t0 + len(self.shotsSent) * period  # no drift
+                if now >= nextShot:
+                    self._send("SHOOT", {'number': number, 'timestamp': time.time()})
+                    self.shotsSent.append(number)
+                    number += 1
+                    if self.nbShots is not None and len(self.shotsSent) >= self.nbShots:
+                        self.finished.set()
+                    continue
+
+            deadline = nextHeartbeat if nextShot is None else min(nextShot, nextHeartbeat)
+            socks = dict(poller.poll(max(0, int((deadline - time.perf_counter()) * 1000))))
+            if self._control.receiver in socks:
+                self._control.recv()
+                break
+            if self.sub in socks:
+                topic = self.sub.recv_string()
+                event = self.sub.recv_json()
+                self._handle(topic, event)
+
+        self.pub.close(0)
+        self.sub.close(0)
+        self._control.close()
+
+    def _handle(self, topic, event):
+        clientId = event.get('client_id')
+        if topic == "REGISTER":
+            self.clients[clientId] = event.get('name')
+            self._send("REGISTERED", {'client_id': clientId, 'path': self.path,
+                                      'autosave': self.autosave})
+        elif topic == "UNREGISTER":
+            self.clients.pop(clientId, None)
+
+    def stop(self):
+        if self.is_alive():
+            self._control.send(b"STOP")
+            self.join()
+
+
+class SHOTCLIENT(threading.Thread):
+    '''
+    Client of the load test : receive the shots (stand-in of THREADCLIENT,
+    see VISUCLIENT for the real one) and, if diagAddress is given, ask the
+    diagServer '__GET__' after each shot
+    '''
+
+    def __init__(self, eventAddress, diagAddress=None, timeout=1000):
+        super().__init__(daemon=True)
+        self.eventAddress = eventAddress
+        self.diagAddress = diagAddress
+        self.timeout = timeout
+        self.shots = []            # shot numbers received
+        self.eventLatency = []     # s, server timestamp -> reception
+        self.requestLatency = []   # s, '__GET__' round trip
+        self.resultLatency = []    # s, reception of the shot -> result of this shot available
+        self.stale = 0             # answer of the server not for the last shot
+        self.timeouts = 0
+        self.ready = threading.Event()
+        self._control = ControlChannel("shotClient")
+
+    def run(self):
+        sub = getContext().socket(zmq.SUB)
+        sub.setsockopt(zmq.LINGER, 0)
+        sub.connect(self.eventAddress)
+        sub.setsockopt_string(zmq.SUBSCRIBE, "SHOOT")
+        poller = zmq.Poller()
+        poller.register(sub, zmq.POLLIN)
+        poller.register(self._control.receiver, zmq.POLLIN)
+        self.ready.set()
+
+        while True:
+            socks = dict(poller.poll())
+            if self._control.receiver in socks:
+                self._control.recv()
+                break
+            sub.recv_string()
+            event = sub.recv_json()
+            tRecv = time.perf_counter()
+            self.eventLatency.append(max(time.time() - event['timestamp'], 0.))
+            self.shots.append(event['number'])
+            self.onShot(event['number'], tRecv)
+
+        sub.close(0)
+        pool.closeAll()  # REQ sockets of this thread
+        self._control.close()
+
+    def onShot(self, number, tRecv):
+        # ask until the result of this shot is published (or timeout)
+        if self.diagAddress is None:
+            return
+        while True:
+            t0 = time.perf_counter()
+            reply = request(self.diagAddress, "__GET__", timeout=self.timeout)
+            t1 = time.perf_counter()
+            if reply is None:
+                self.timeouts += 1
+                return
+            self.requestLatency.append(t1 - t0)
+            shotNumber = json.loads(reply).get('shotNumber')
+            if shotNumber == number:
+                self.resultLatency.append(t1 - tRecv)
+                return
+            if shotNumber is not None and shotNumber > number:
+                self.stale += 1  # already an other shot : we are late
+                return
+            if t1 - tRecv > self.timeout / 1000.:
+                self.stale += 1
+                return
+            time.sleep(0.0005)
+
+    def stop(self):
+        if self.is_alive():
+            self._control.send(b"STOP")
+            self.join()
+
+
+class PRODUCER(SHOTCLIENT):
+    '''
+    Replace visu in the load test : publish to the diagServer a spectrum
+    of nbPoints points for each shot received (with processingTime s delay)
+    '''
+
+    def __init__(self, eventAddress, server, nbPoints=400, processingTime=0.):
+        super().__init__(eventAddress)
+        self.server = server
+        self.processingTime = processingTime
+        self.energy = np.linspace(1, 200, nbPoints)
+
+    def onShot(self, number, tRecv):
+        if self.processingTime > 0:
+            time.sleep(self.processingTime)
+        spectrum = np.random.rand(self.energy.size).tolist()
+        self.server.publish(number, {'Shot number': number, 'Energy': self.energy.tolist(),
+                                     'Spectrum': spectrum})
+
+
+class VISUCLIENT(QtCore.QObject):
+    '''
+    visu.WinOption.THREADCLIENT connected to the EVENTSERVER of port. This
+    object stands for its parent (options window of visu) : the shots emitted
+    are recorded in the client thread (no GUI event loop) and tirNumber
+    updated as the GUI does
+    '''
+
+    def __init__(self, port, name='loadTest'):
+        super().__init__()
+        from visu.WinOption import THREADCLIENT
+        self.name = name
+        self.conf = QtCore.QSettings(os.path.join(tempfile.gettempdir(), 'visuLoadTest.ini'),
+                                     QtCore.QSettings.Format.IniFormat)
+        self.conf.setValue(name + "/server", "127.0.0.1")
+        self.conf.setValue(name + "/serverPort", port)
+        self.tirNumber = 0
+        self.shots = []  # shot numbers emitted by THREADCLIENT
+        self.client = THREADCLIENT(self)
+        self.client.newShotnumber.connect(self.receiveNewNumber,
+                                          QtCore.Qt.ConnectionType.DirectConnection)
+
+    def receiveNewNumber(self, number, received):
+        self.shots.append(number)
+        self.tirNumber = number
+
+    def start(self):
+        self.client.start()
+
+    def stop(self):
+        self.client.stopClientThread()
+
+
+def _stats(values):
+    if len(values) == 0:
+        return {'count': 0}
+    values = np.asarray(values) * 1000.
+    return {'count': int(values.size),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p99_ms': float(np.percentile(values, 99)),
+            'max_ms': float(values.max())}
+
+
+def _histogramStats(histograms):
+    # visu.latency.LatencyHistogram of the clients : worst client
+    if not histograms:
+        return {'count': 0}
+    return {'count': int(sum(h.count for h in histograms)),
+            'p50_ms': max(h.percentile(50) for h in histograms) * 1000.,
+            'p99_ms': max(h.percentile(99) for h in histograms) * 1000.,
+            'max_ms': max(h.maxValue for h in histograms) * 1000.}
+
+
+def runLoadTest(rate=10., nbShots=100, nbClients=4, eventPort=5309, diagPort=5311,
+                nbPoints=400, processingTime=0., nbVisuClients=2, verbose=True):
+    '''
+    run the whole load test in this process and return the results (dict)
+    '''
+    server = diagServer(address=f"tcp://*:{diagPort}", host="localhost",
+                        data={"state": "load test"}, name="loadTest")
+    server.verbose = False
+    server.start()
+    events = EVENTSERVER(port=eventPort, rate=rate, nbShots=nbShots, startDelay=0.5)
+    eventAddress = f"tcp://localhost:{eventPort}"
+    producer = PRODUCER(eventAddress, server, nbPoints, processingTime)
+    clients = [SHOTCLIENT(eventAddress, server.addressForClient) for i in range(nbClients)]
+    for c in [producer] + clients:
+        c.start()
+        c.ready.wait()
+    visuClients = [VISUCLIENT(eventPort, 'loadTest%i' % i) for i in range(nbVisuClients)]
+    time.sleep(0.2)  # subscriptions reach the PUB socket before the first shot
+
+    t0 = time.perf_counter()
+    events.start()
+    for c in visuClients:
+        c.start()  # registered to the running server (before the first shot, startDelay)
+    events.finished.wait()
+    time.sleep(max(0.5, 2. / rate))  # last answers
+    duration = time.perf_counter() - t0 - events.startDelay
+
+    registered = sum(c.client.client_id in events.clients for c in visuClients)
+    for c in clients + [producer] + visuClients:
+        c.stop()
+    events.stop()
+    server.stop()
+
+    sent = set(events.shotsSent)
+    nbRequests = sum(len(c.requestLatency) for c in clients)
+    results = {
+        'rate_Hz': rate,
+        'shots_sent': len(sent),
+        'clients': nbClients,
+        'duration_s': duration,
+        'shots_dropped': sum(len(sent - set(c.shots)) for c in clients),
+        'producer_dropped': len(sent - set(producer.shots)),
+        'stale': sum(c.stale for c in clients),
+        'timeouts': sum(c.timeouts for c in clients),
+        'requests_per_s': nbRequests / duration if duration > 0 else 0.,
+        'event_latency': _stats([v for c in clients for v in c.eventLatency]),
+        'request_latency': _stats([v for c in clients for v in c.requestLatency]),
+        'result_latency': _stats([v for c in clients for v in c.resultLatency]),
+        'visu_clients': nbVisuClients,
+        'visu_registered': registered,
+        'visu_shots_dropped': sum(len(sent - set(c.shots)) for c in visuClients),
+        'visu_event_latency': _histogramStats([c.client.shotLatency for c in visuClients]),
+    }
+    if verbose:
+        print(json.dumps(results, indent=1))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="diagServer / shot server load test")
+    parser.add_argument('--rate', type=float, default=10., help='shots per second')
+    parser.add_argument('--shots', type=int, default=100, help='number of shots')
+    parser.add_argument('--clients', type=int, default=4, help='number of diagServer clients')
+    parser.add_argument('--visu-clients', type=int, default=2,
+                        help='number of clients of visu (WinOption.THREADCLIENT)')
+    parser.add_argument('--points', type=int, default=400, help='size of the published spectrum')
+    parser.add_argument('--processing', type=float, default=0., help='processing time per shot (s)')
+    parser.add_argument('--event-port', type=int, default=5309)
+    parser.add_argument('--diag-port', type=int, default=5311)
+    parser.add_argument('--server-only', action='store_true',
+                        help='only run the stand-in shot server (for a visu instance)')
+    args = parser.parse_args()
+
+    if args.server_only:
+        events = EVENTSERVER(port=args.event_port, rate=args.rate)
+        events.start()
+        print(f"stand-in shot server on port {args.event_port} ({args.rate} Hz), ctrl+c to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            events.stop()
+    else:
+        runLoadTest(rate=args.rate, nbShots=args.shots, nbClients=args.clients,
+                    eventPort=args.event_port, diagPort=args.diag_port,
+                    nbPoints=args.points, processingTime=args.processing,
+                    nbVisuClients=args.visu_clients)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Process wide ZMQ layer shared by all visu windows:
+    - one zmq context for the whole process (getContext)
+    - client sockets kept open and reused per thread (pool, request)
+    - inproc control channels to wake up / stop a thread blocked in a poll
+      (ControlChannel) without any tcp loopback request
+"""
+
+import threading
+import uuid
+import zmq
+
+__all__ = ['getContext', 'SocketPool', 'pool', 'request', 'ControlChannel']
+
+
+def getContext():
+    '''
+    the zmq context shared by all the sockets of the process.
+    It must not be terminated by the users : close the sockets instead
+    '''
+    return zmq.Context.instance()
+
+
+class SocketPool():
+    '''
+    Client sockets connected to an address, created on first use and reused
+    afterwards. zmq sockets are not thread safe : each thread has its own
+    sockets (thread local storage), a socket never change of thread.
+    '''
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _sockets(self):
+        if not hasattr(self._local, 'sockets'):
+            self._local.sockets = {}
+        return self._local.sockets
+
+    def get(self, socketType, address):
+        '''
+        socket of type socketType connected to address for the current thread
+        '''
+        sockets = self._sockets()
+        key = (socketType, address)
+        sock = sockets.get(key)
+        if sock is None:
+            sock = getContext().socket(socketType)
+            sock.setsockopt(zmq.LINGER, 0)
+            sock.connect(address)
+            sockets[key] = sock
+        return sock
+
+    def discard(self, socketType, address):
+        '''
+        close the socket (ex: REQ socket without answer which can't send anymore)
+        the next get will create a new one
+        '''
+        sock = self._sockets().pop((socketType, address), None)
+        if sock is not None:
+            sock.close(0)
+
+    def closeAll(self):
+        '''
+        close all the sockets of the current thread
+        '''
+        sockets = self._sockets()
+        for sock in sockets.values():
+            sock.close(0)
+        sockets.clear()
+
+
+pool = SocketPool()
+
+
+def request(address, message, timeout=1000):
+    '''
+    send message (str) to a REP server (ex: diagServer) and return the answer
+    with a pooled REQ socket. Return None if no answer after timeout (ms)
+    '''
+    sock = pool.get(zmq.REQ, address)
+    sock.send_string(message)
+    if sock.poll(timeout):
+        return sock.recv_string()
+    pool.discard(zmq.REQ, address)  # REQ waits an answer forever : reset it
+    return None
+
+
+class ControlChannel():
+    '''
+    inproc channel to send commands to a thread waiting in a zmq poll.
+    The thread registers 'receiver' in its poller, any other thread use 'send'.
+        control = ControlChannel('diagServer')   # receiver bound here
+        poller.register(control.receiver, zmq.POLLIN)
+        ...
+        control.send(b'STOP')                    # from any thread
+    '''
+
+    def __init__(self, name='control'):
+        self.address = f"inproc://{name}-{uuid.uuid4()}"
+        # binding before any send : messages are never lost
+        self.receiver = getContext().socket(zmq.PULL)
+        self.receiver.setsockopt(zmq.LINGER, 0)
+        self.receiver.bind(self.address)
+
+    def send(self, message=b'STOP'):
+        # commands are rare (stop...) : short lived sender, not pooled
+        sender = getContext().socket(zmq.PUSH)
+        sender.setsockopt(zmq.LINGER, 0)
+        sender.connect(self.address)
+        try:
+            sender.send(message, zmq.NOBLOCK)
+        except zmq.Again:
+            pass  # receiver already closed
+        sender.close(0)
+
+    def recv(self):
+        return self.receiver.recv()
+
+    def poll(self, timeout=None):
+        '''
+        wait (ms) for a command, return True if one is received
+        '''
+        return bool(self.receiver.poll(timeout))
+
+    def close(self):
+        self.receiver.close(0)
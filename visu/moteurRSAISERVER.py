@@ -7,61 +7,172 @@ last modified 18 oct 2024
 
 Dialog to RSAI motors rack via firebird database
 
+modified 2026/10/19 : no connection at the import, the connections to the
+server (confServer.ini MAIN/server_host, MAIN/serverPort) are opened at the
+first request by client() (RSAICLIENT) and shared by all the motors.
+Optional keys of confServer.ini [MAIN] : timeout (s, each request),
+connectTimeout (s), poolSize (connections), retry (s between reconnections)
 """
 
 import time
 from PyQt6 import QtCore
-from PyQt6.QtWidgets import QMessageBox,QApplication
-import  socket
-from  PyQt6.QtCore import QUuid, QMutex
-import sys, os 
+import os 
 import socket as _socket
 import ast
 import pathlib
+import queue
+import threading
 
 p = pathlib.Path(__file__).parent
 sepa = os.sep
 
 fileconf = str(p) + sepa + "confServer.ini"
-confServer = QtCore.QSettings(fileconf,QtCore.QSettings.Format.IniFormat)
-server_host = str( confServer.value('MAIN'+'/server_host') )# 
-serverPort =int(confServer.value('MAIN'+'/serverPort'))
-clientSocket =_socket.socket(_socket.AF_INET,_socket.SOCK_STREAM)
-#clientSocket.settimeout(5)
-
-try :
-    clientSocket.connect((server_host,serverPort))
-    isconnected = True
-    msg = 'clientid'
-    clientSocket.sendall(msg.encode())
-    id = clientSocket.recv(1024).decode()
-    print('connected with id' ,id)
-    
 
-except :
-    isconnected = False
-    print('client not connected')
+_client = None
+_clientLock = threading.Lock()
+
+
+class RSAICLIENT():
+    """
+    RSAICLIENT(host, port) : connections to the RSAI motor server
+    request(message) -> answer of the server, None if it is not reachable
+    A connection is opened at the first request (timeout connectTimeout),
+    then kept in a pool (at most size at the same time) : the motors and the
+    functions of this module share them. When the server is lost the requests
+    return None at once and a thread opens a connection again every retry s.
+    """
+
+    def __init__(self, host, port, size=2, timeout=2, connectTimeout=2, retry=5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connectTimeout = connectTimeout
+        self.retry = retry
+        self.isconnected = None  # None : no request yet
+        self.id = None  # id given by the server to the first connection
+        self._idle = queue.LifoQueue()  # connections not used
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = threading.Event()
+        self._reconnectThread = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = _socket.create_connection((self.host, self.port), timeout=self.connectTimeout)
+        try:
+            sock.settimeout(self.timeout)
+            sock.sendall('clientid'.encode())
+            clientId = sock.recv(1024).decode()
+        except OSError:
+            sock.close()
+            raise
+        if self.id is None:
+            self.id = clientId
+            print('connected with id', clientId)
+        return sock
+
+    def request(self, message):
+        if self.isconnected is False or self._closed.is_set():
+            return None  # reconnection in progress
+        with self._slots:
+            try:
+                sock = self._idle.get_nowait()
+            except queue.Empty:
+                sock = None
+            try:
+                if sock is None:
+                    sock = self._connect()
+                sock.sendall(message.encode())
+                answer = sock.recv(1024).decode()
+                if answer == '':
+                    raise ConnectionError('connection closed by the server')
+            except OSError as e:
+                if sock is not None:
+                    sock.close()
+                self._lost(e)
+                return None
+            self.isconnected = True
+            self._idle.put(sock)
+        return answer
+
+    def _lost(self, error):
+        # close the connections and try again in the background
+        with self._lock:
+            if self.isconnected is not False:
+                print('RSAI server %s:%s not connected (%s)' % (self.host, self.port, error))
+            self.isconnected = False
+            self._closeIdle()
+            if self._closed.is_set() or (self._reconnectThread is not None
+                                         and self._reconnectThread.is_alive()):
+                return
+            self._reconnectThread = threading.Thread(target=self._reconnect, daemon=True,
+                                                     name='RSAIreconnect')
+            self._reconnectThread.start()
+
+    def _reconnect(self):
+        while not self._closed.wait(self.retry):
+            try:
+                sock = self._connect()
+            except OSError:
+                continue
+            self._idle.put(sock)
+            self.isconnected = True
+            print('RSAI server %s:%s connected again' % (self.host, self.port))
+            return
+
+    def _closeIdle(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self._closed.set()
+        self._closeIdle()
+
+
+def client():
+    '''
+    RSAICLIENT of the server of confServer.ini, created at the first call
+    (the connection is opened by the first request)
+    '''
+    global _client
+    with _clientLock:
+        if _client is None:
+            confServer = QtCore.QSettings(fileconf, QtCore.QSettings.Format.IniFormat)
+            _client = RSAICLIENT(str(confServer.value('MAIN'+'/server_host')),
+                                 int(confServer.value('MAIN'+'/serverPort')),
+                                 size=int(confServer.value('MAIN'+'/poolSize', 2)),
+                                 timeout=float(confServer.value('MAIN'+'/timeout', 2)),
+                                 connectTimeout=float(confServer.value('MAIN'+'/connectTimeout', 2)),
+                                 retry=float(confServer.value('MAIN'+'/retry', 5)))
+        return _client
+
 
 def listRack():
     cmdsend = " %s" %('listRack',)
-    clientSocket.sendall((cmdsend).encode())
-    listRack = clientSocket.recv(1024).decode()
+    listRack = client().request(cmdsend)
+    if listRack is None:
+        return []
     listRack = ast.literal_eval(listRack)
     return listRack
 
 def nameEquipment(IP):
     cmd = 'nomRack'
     cmdsend = " %s, %s, %s " %(IP,1,cmd)
-    clientSocket.sendall((cmdsend).encode())
-    nameRack = clientSocket.recv(1024).decode().split()[0]
-    return nameRack
-    
+    nameRack = client().request(cmdsend)
+    if not nameRack or not nameRack.split():
+        return ''
+    return nameRack.split()[0]
 
-mut = QMutex()
 
 def closeConnection():
     # close connection
-    clientSocket.close()
+    global _client
+    with _clientLock:
+        if _client is not None:
+            _client.close()
+            _client = None
 
 def listMotorName(IP):
     listMotor = []
@@ -69,9 +180,8 @@ def listMotorName(IP):
     for i in range(0,14):
             cmd = 'name'
             cmdsend = " %s, %s, %s " %(IP,i+1,cmd)
-            clientSocket.sendall((cmdsend).encode())
-            name = clientSocket.recv(1024).decode() #.split()[0]
-            listMotor.append(name)
+            name = client().request(cmdsend) #.split()[0]
+            listMotor.append(name if name is not None else '')
     return listMotor
 
 class MOTORRSAI():
@@ -84,9 +194,8 @@ class MOTORRSAI():
         
         self.IpAdress = IpAdrress
         self.NoMotor = NoMotor
-        self.isconnected = isconnected
-        self.clientSocket = clientSocket
-        #self.mut = mut
+        self.client = client()
+        self.isconnected = self.client.isconnected is not False
         self.update()
 
     def update(self):
@@ -112,41 +221,12 @@ class MOTORRSAI():
             # time.sleep(0.01)
 
     def sendMessage(self,message=''):
-        # print('message',self.isconnected)
-        retour = '1'
-        if self.isconnected is True:
-            mut.lock()
-            try:
-                #print('lock')
-                a = self.clientSocket.sendall(message.encode())
-                retour = self.clientSocket.recv(1024).decode()
-                self.isconnected = True
-                retour =  retour.split()[0]
-                
-            except:
-                self.isconnected = False
-                self.clientSocket.close()
-                print('error connection')
-
-                retour = '1'
-        if self.isconnected is False :    
-            try: 
-                #print('try again')
-                self.clientSocket = _socket.socket(_socket.AF_INET,_socket.SOCK_STREAM)
-                self.clientSocket.settimeout(2)
-                self.clientSocket.connect((server_host,serverPort))
-                self.isconnected = True
-                retour = 1 
-                #print('try again succes')
-            except:
-                #print('try again error')
-                retour = '1' # avoid divide by zero 
-                self.isconnected = False
-                self.clientSocket.close()
-                #print('socket close)')
-        mut.unlock() 
-            
-        return retour
+        # first word of the answer, '1' if the server is not connected
+        retour = self.client.request(message)
+        self.isconnected = retour is not None
+        if retour is None or not retour.split():
+            return '1' # avoid divide by zero 
+        return retour.split()[0]
     
     def position(self):
         '''
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Processing of the frames out of the GUI thread.
+
+The numeric stages (orientation, background, filters, hot pixel, fluence)
+are a PROCESSGRAPH of (data, params) : params is a dict snapshot of the
+widgets made in the GUI thread when the frame is submitted, the worker
+thread never reads a widget.
+
+PIPELINE is the worker thread : the last frame received is processed (older
+ones not processed yet are dropped) except the frames which must all be
+processed (autosave, spectro) kept in a bounded queue. The result of the last
+one waits in a single slot until the GUI takes it. If the GUI is slower than
+the camera only the last result is displayed.
+"""
+
+import collections
+import itertools
+import threading
+import time
+import numpy as np
+from PyQt6 import QtCore
+
+__all__ = ['PIPELINE', 'FrameMailbox', 'FrameQueue', 'PROCESSGRAPH', 'STAGE',
+           'ORIENTATION', 'processFrame', 'orient', 'ellipseSum']
+
+
+class ORIENTATION():
+    '''
+    flipUD, flipLR then rotation by rotation*90 deg (order of visu) folded in
+    one transform of the first two axes :
+        data -> swapaxes(data, 0, 1) if transpose, then [::-1] on the flipped axes
+    apply returns a view (no copy). Use ORIENTATION.of(...) : instances are shared
+    '''
+    _cache = {}
+
+    def __init__(self, flipUD=False, flipLR=False, rotation=0):
+        self.flipUD = bool(flipUD)
+        self.flipLR = bool(flipLR)
+        self.rotation = int(rotation) % 4
+        # find the transform giving the same result as the successive operations
+        probe = np.arange(6).reshape(2, 3)
+        target = probe
+        if self.flipUD:
+            target = np.flipud(target)
+        if self.flipLR:
+            target = np.fliplr(target)
+        target = np.rot90(target, self.rotation)
+        for transpose in (False, True):
+            for flip0 in (False, True):
+                for flip1 in (False, True):
+                    self.transpose, self.flip0, self.flip1 = transpose, flip0, flip1
+                    if np.array_equal(self.apply(probe), target):
+                        return
+
+    @classmethod
+    def of(cls, flipUD=False, flipLR=False, rotation=0):
+        key = (bool(flipUD), bool(flipLR), int(rotation) % 4)
+        orientation = cls._cache.get(key)
+        if orientation is None:
+            orientation = cls._cache[key] = cls(*key)
+        return orientation
+
+    @property
+    def identity(self):
+        return not (self.transpose or self.flip0 or self.flip1)
+
+    def apply(self, data):
+        if self.transpose:
+            data = np.swapaxes(data, 0, 1)
+        return data[::-1 if self.flip0 else 1, ::-1 if self.flip1 else 1]
+
+    def toDict(self):
+        # metadata of the saved frames : saved = transform(camera frame)
+        return {'flipUD': self.flipUD, 'flipLR': self.flipLR, 'rotation': self.rotation,
+                'transpose': self.transpose, 'flip0': self.flip0, 'flip1': self.flip1}
+
+
+def orient(data, flipUD=False, flipLR=False, rotation=0):
+    '''
+    flip then rotate by rotation*90 deg (same order as in visu), view of data
+    '''
+    orientation = ORIENTATION.of(flipUD, flipLR, rotation)
+    return data if orientation.identity else orientation.apply(data)
+
+
+def ellipseSum(data, x, y, width, height):
+    '''
+    sum of data inside the ellipse inscribed in the rectangle (x, y, width, height)
+    data is indexed [x, y] as displayed by pyqtgraph
+    '''
+    x0 = max(int(np.floor(x)), 0)
+    y0 = max(int(np.floor(y)), 0)
+    x1 = min(int(np.ceil(x + width)), data.shape[0])
+    y1 = min(int(np.ceil(y + height)), data.shape[1])
+    if x1 <= x0 or y1 <= y0:
+        return 0.
+    xx = (np.arange(x0, x1) + 0.5 - (x + width / 2.)) / (width / 2.)
+    yy = (np.arange(y0, y1) + 0.5 - (y + height / 2.)) / (height / 2.)
+    mask = (xx[:, None] ** 2 + yy[None, :] ** 2) <= 1.
+    return float(data[x0:x1, y0:y1][mask].sum())
+
+
+# stages : func(src, out, params) writes the result in out (same shape as
+# src, dtype given by dtype(src, params)) ; view stages return a view of src
+
+def _background(src, out, params):
+    background = params['background']
+    if np.broadcast_shapes(src.shape, np.shape(background)) != src.shape:
+        raise ValueError('background shape %s, frame shape %s'
+                         % (np.shape(background), src.shape))
+    np.subtract(src, background, out=out)
+    np.maximum(out, 0, out=out)  # negative values set to 0
+
+
+def _filter(src, out, params):
+    from scipy.ndimage import gaussian_filter, median_filter  # scipy : 0.2 s to import
+    filt = params['filter']
+    if filt == 'gauss':
+        gaussian_filter(src, params['sigma'], output=out)
+    elif filt == 'median':
+        median_filter(src, size=params['sigma'], output=out)
+    elif filt == 'threshold':  # 0 si sous le seuil
+        np.copyto(out, src)
+        out[src < params['threshold']] = 0
+
+
+def _hotPixel(src, out, params):
+    # Remove hot pixel if data=data.max remplace by mean otherwise by data
+    hot = src == src.max()
+    mean = src.mean()
+    np.copyto(out, src)
+    out[hot] = mean
+
+
+def _fluence(src, out, params):
+    energy, size, roi = params['fluence']
+    enrgTot = ellipseSum(src, *roi)
+    np.multiply(src, 1000*energy/(enrgTot*size), out=out)
+
+
+def _floatType(src, params):
+    return np.result_type(src.dtype, np.float64)
+
+
+class STAGE():
+    '''
+    step of the processing graph
+    name: also the name of its timing
+    func: func(src, out, params), or func(src, params) -> view if view is True
+    keys: params used by the stage : its cache is valid while they don't change
+    enabled: enabled(params) -> False : the stage pass its input unchanged
+    dtype: dtype(src, params) of the output (default dtype of src)
+    '''
+
+    def __init__(self, name, func, keys, enabled, dtype=None, view=False):
+        self.name = name
+        self.func = func
+        self.keys = keys
+        self.enabled = enabled
+        self.dtype = dtype
+        self.view = view
+        self.buffer = None  # reused output, never given outside the graph
+        self.cache = None   # (input token, key, output, output token)
+
+    def key(self, params):
+        # arrays (background) are compared by identity, the other params by value
+        return tuple(_Identity(params.get(k)) if isinstance(params.get(k), np.ndarray)
+                     else params.get(k) for k in self.keys)
+
+    def output(self, src, params, last):
+        dtype = src.dtype if self.dtype is None else self.dtype(src, params)
+        if last:
+            # the result of the graph is given to the GUI : new array
+            return np.empty(src.shape, dtype)
+        if self.buffer is None or self.buffer.shape != src.shape or self.buffer.dtype != dtype:
+            self.buffer = np.empty(src.shape, dtype)
+        return self.buffer
+
+
+class _Identity():
+    # key of an array : same object
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+
+class PROCESSGRAPH():
+    '''
+    Chain of STAGE : orient, background, filter, hotPixel, fluence.
+    Each stage keeps its last output with the key of its params and a token of
+    its input : if the input and the params of the upstream stages did not
+    change (re-render of the same frame with an other filter...) they are
+    not recomputed. Intermediate results are written in buffers owned by the
+    stages and reused from frame to frame, only the last stage allocates the
+    returned array (the GUI keeps it). The returned array is read only when
+    it is also the cache of a stage (a change in place would corrupt the
+    next cached run) ; the input is never changed : if it is the cached
+    result (identity orientation) a copy is cached and returned.
+    Not thread safe : one graph per thread.
+    '''
+
+    def __init__(self):
+        self.stages = [
+            STAGE('orient', lambda src, params: orient(src, *params['orient']),
+                  ('orient',), lambda params: params.get('orient') is not None, view=True),
+            STAGE('background', _background, ('background',),
+                  lambda params: params.get('background') is not None, dtype=_floatType),
+            STAGE('filter', _filter, ('filter', 'sigma', 'threshold'),
+                  lambda params: params.get('filter', 'origin') != 'origin'),
+            STAGE('hotPixel', _hotPixel, ('hotPixel',),
+                  lambda params: params.get('hotPixel', False), dtype=_floatType),
+            STAGE('fluence', _fluence, ('fluence',),
+                  lambda params: params.get('fluence') is not None, dtype=_floatType),
+            ]
+        self._tokens = itertools.count(1)
+        self._input = None
+        self._inputToken = 0
+
+    def clear(self):
+        for stage in self.stages:
+            stage.buffer = None
+            stage.cache = None
+        self._input = None
+
+    def run(self, data, params, newFrame=False):
+        '''
+        process data with params (see processFrame).
+        newFrame: True if data is a new frame even if it is the same array object
+        (buffer reused by a camera), otherwise the cache is used for the same object
+        '''
+        if newFrame or data is not self._input:
+            self._input = data
+            self._inputToken = next(self._tokens)
+        result = {'bgError': False, 'errors': {}, 'timing': {}}
+        active = [stage for stage in self.stages if stage.enabled(params)]
+        lastComputed = max([i for i, stage in enumerate(active) if not stage.view], default=-1)
+
+        src, token = data, self._inputToken
+        result['dataOrg'] = data
+        for i, stage in enumerate(active):
+            key = stage.key(params)
+            cache = stage.cache
+            if cache is not None and cache[0] == token and cache[1] == key:
+                src, token = cache[2], cache[3]
+                if stage.view and i > lastComputed and not src.flags.c_contiguous:
+                    src = np.ascontiguousarray(src)
+                    stage.cache = cache[:2] + (src, token)
+                result['timing'][stage.name] = 0.
+            else:
+                t0 = time.perf_counter()
+                try:
+                    if stage.view:
+                        out = stage.func(src, params)
+                        if i > lastComputed and not out.flags.c_contiguous:
+                            # no stage after to read the view : made contiguous once here
+                            out = np.ascontiguousarray(out)
+                    else:
+                        out = stage.output(src, params, last=(i == lastComputed))
+                        stage.func(src, out, params)
+                except ValueError as e:  # ex: background of an other size
+                    result['errors'][stage.name] = str(e)
+                    stage.cache = None
+                    continue
+                result['timing'][stage.name] = time.perf_counter() - t0
+                outToken = next(self._tokens)
+                stage.cache = (token, key, out, outToken)
+                src, token = out, outToken
+            if stage.name == 'orient':
+                result['dataOrg'] = src
+
+        for stage in self.stages:
+            if src is stage.buffer:
+                # the last stage failed or was cached : never give a buffer of the graph
+                src = src.copy()
+                if stage.cache is not None and stage.cache[2] is stage.buffer:
+                    stage.cache = stage.cache[:2] + (src, stage.cache[3])
+                break
+        cached = [stage for stage in active if stage.cache is not None and stage.cache[2] is src]
+        if cached:
+            if np.may_share_memory(src, data):
+                # the input or a view of it : the caller keeps its array writable
+                src = src.copy()
+                for stage in cached:
+                    stage.cache = stage.cache[:2] + (src, stage.cache[3])
+            src.flags.writeable = False
+        result['bgError'] = 'background' in result['errors']
+        result['data'] = src
+        return result
+
+
+def processFrame(data, params, graph=None):
+    '''
+    Apply the processing stages described by params to data.
+    params keys (all optional):
+        orient : (flipUD, flipLR, rotation) applied first
+        background : array to subtract (negative values set to 0)
+        filter : 'origin', 'gauss', 'median' or 'threshold'
+        sigma, threshold : filter parameters
+        hotPixel : True to replace the max value pixels by the mean
+        fluence : (energy, size, (x, y, width, height)) to scale in mJ/size
+    graph: PROCESSGRAPH keeping the intermediate results (None: new graph, no cache)
+    return a dict : dataOrg (oriented), data (processed), bgError (True if
+    the background could not be subtracted), errors and timing (s) per stage
+    '''
+    if graph is None:
+        graph = PROCESSGRAPH()
+    return graph.run(data, params)
+
+
+class FrameMailbox():
+    '''
+    single slot : put replaces the item not yet taken (latest frame wins),
+    replaced items are counted in dropped.
+    Not locked : PIPELINE uses it under its own lock
+    '''
+
+    def __init__(self):
+        self._item = None
+        self.dropped = 0
+
+    def __len__(self):
+        return 0 if self._item is None else 1
+
+    def put(self, item):
+        if self._item is not None:
+            self.dropped += 1
+        self._item = item
+
+    def take(self):
+        item = self._item
+        self._item = None
+        return item
+
+    def clear(self):
+        if self._item is not None:
+            self.dropped += 1
+        self._item = None
+
+
+class FrameQueue():
+    '''
+    bounded FIFO for the frames which must all be processed (autosave, spectro)
+    when full the oldest one is removed and counted in lost.
+    Not locked : PIPELINE uses it under its own lock
+    '''
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._items = collections.deque()
+        self.lost = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        if len(self._items) >= self.maxsize:
+            self._items.popleft()
+            self.lost += 1
+        self._items.append(item)
+
+    def take(self):
+        return self._items.popleft() if self._items else None
+
+
+class PIPELINE(QtCore.QThread):
+    '''
+    Worker thread : process(data, params) -> result dict is called for the
+    submitted frames and frameProcessed is emitted ; the GUI calls takeResult.
+    Frame intake :
+        - submit(data, params) : display only frame, kept in a single slot,
+          a frame not processed yet is replaced by the new one (dropped)
+        - submit(data, params, mustProcess=True) : frame queued in a bounded
+          FIFO (autosave, spectro...), all processed in order unless more than
+          maxQueued frames wait (oldest lost)
+    Results wait in a single slot too : while the GUI has not taken a result
+    no new signal is emitted and a slow display gets the last result only
+    (results replaced are counted in skipped). So nothing piles up in the Qt
+    event queue whatever the rate of the camera.
+    '''
+    frameProcessed = QtCore.pyqtSignal()
+
+    def __init__(self, process=processFrame, maxQueued=16, parent=None):
+        super().__init__(parent)
+        self.process = process
+        self.intake = FrameMailbox()
+        self.queue = FrameQueue(maxQueued)
+        self.results = FrameMailbox()
+        self._cond = threading.Condition()
+        self._notified = False
+        self._running = True
+
+    @property
+    def dropped(self):
+        # frames received but never displayed
+        return self.intake.dropped + self.results.dropped
+
+    @property
+    def lost(self):
+        # must process frames never processed
+        return self.queue.lost
+
+    def submit(self, data, params, mustProcess=False):
+        '''
+        data is kept (not copied) until processed : the caller must not change it
+        '''
+        with self._cond:
+            if mustProcess:
+                self.intake.clear()  # older than this frame
+                self.queue.put((data, params))
+            else:
+                self.intake.put((data, params))
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not (self.queue or self.intake):
+                    self._cond.wait()
+                if not self._running and not self.queue:
+                    break
+                # when stopped the must process frames are still processed
+                item = self.queue.take() if self.queue else self.intake.take()
+            try:
+                result = self.process(*item)
+            except Exception as e:
+                print('processing error :', e)
+                continue
+            with self._cond:
+                self.results.put(result)
+                notify = not self._notified
+                self._notified = True
+            if notify:
+                self.frameProcessed.emit()
+
+    def takeResult(self):
+        '''
+        last result (None if already taken), to be called by the GUI
+        '''
+        with self._cond:
+            self._notified = False
+            return self.results.take()
+
+    def resetCounters(self):
+        with self._cond:
+            self.intake.dropped = 0
+            self.results.dropped = 0
+            self.queue.lost = 0
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self.wait()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Timing of the display / processing stages of visu.
+
+    profiler = PROFILER()
+    with profiler.stage('setImage'):       # context manager
+        ...
+    @profiled('Coupe')                     # method of an object with self.profiler
+    def Coupe(self):
+    profiler.record('filter', 0.012)       # duration measured elsewhere (s)
+    profiler.frame()                       # one frame displayed (fps)
+
+The last durations of each stage are kept in a ring buffer (fixed memory).
+When the profiler is disabled stage() returns a shared empty context and
+the decorated methods are called directly : no clock read, no allocation.
+"""
+
+import contextlib
+import csv
+import functools
+import json
+import threading
+import time
+import numpy as np
+
+__all__ = ['RingBuffer', 'PROFILER', 'profiled']
+
+_NULL = contextlib.nullcontext()
+
+
+class RingBuffer():
+    '''
+    last size values (float), oldest overwritten
+    '''
+
+    def __init__(self, size=512):
+        self.values = np.zeros(size)
+        self.count = 0  # values added since the creation / reset
+
+    def add(self, value):
+        self.values[self.count % self.values.size] = value
+        self.count += 1
+
+    def get(self):
+        # values in the buffer, oldest first
+        n = self.values.size
+        if self.count <= n:
+            return self.values[:self.count].copy()
+        i = self.count % n
+        return np.concatenate((self.values[i:], self.values[:i]))
+
+    def reset(self):
+        self.count = 0
+
+
+class _Timer():
+    # context manager of PROFILER.stage when enabled
+
+    __slots__ = ('profiler', 'name', 't0')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class PROFILER():
+    '''
+    Durations (s) per stage in ring buffers of size values, and display rate.
+    record can be called from any thread.
+    '''
+
+    def __init__(self, enabled=False, size=512):
+        self.enabled = enabled
+        self.size = size
+        self.buffers = {}
+        self.frames = RingBuffer(size)  # time of the frames displayed
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL
+        return _Timer(self, name)
+
+    def record(self, name, duration):
+        if not self.enabled:
+            return
+        with self._lock:
+            buffer = self.buffers.get(name)
+            if buffer is None:
+                buffer = self.buffers[name] = RingBuffer(self.size)
+            buffer.add(duration)
+
+    def recordAll(self, timing):
+        # dict name: duration (ex: timing of visu.pipeline.PROCESSGRAPH)
+        if not self.enabled:
+            return
+        for name, duration in timing.items():
+            self.record(name, duration)
+
+    def frame(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.frames.add(time.perf_counter())
+
+    def fps(self, window=2.):
+        '''
+        frames displayed per second over the last window seconds
+        '''
+        with self._lock:
+            t = self.frames.get()
+        now = time.perf_counter()
+        t = t[t > now - window]
+        if t.size < 2:
+            return 0.
+        return (t.size - 1) / (t[-1] - t[0]) if t[-1] > t[0] else 0.
+
+    def reset(self):
+        with self._lock:
+            self.buffers.clear()
+            self.frames.reset()
+
+    def summary(self):
+        '''
+        dict name: {count, mean, p50, p95, max} in ms over the values in the buffers
+        '''
+        with self._lock:
+            values = {name: buffer.get() for name, buffer in self.buffers.items()}
+            counts = {name: buffer.count for name, buffer in self.buffers.items()}
+        out = {}
+        for name, v in values.items():
+            if v.size == 0:
+                continue
+            v = v * 1000.
+            out[name] = {'count': counts[name],
+                         'mean': float(v.mean()),
+                         'p50': float(np.percentile(v, 50)),
+                         'p95': float(np.percentile(v, 95)),
+                         'max': float(v.max())}
+        return out
+
+    def overlay(self, dropped=None, nbStages=4):
+        '''
+        one line text : fps, dropped frames and the nbStages slowest stages (p95)
+        '''
+        text = 'fps %.1f' % self.fps()
+        if dropped is not None:
+            text += ' | drop %i' % dropped
+        stages = sorted(self.summary().items(), key=lambda s: s[1]['p95'], reverse=True)
+        for name, s in stages[:nbStages]:
+            text += ' | %s %.1f ms' % (name, s['p95'])
+        return text
+
+    def export(self, path):
+        '''
+        .csv : one line per stage (statistics in ms)
+        otherwise json with the statistics and the raw durations (s)
+        '''
+        summary = self.summary()
+        if str(path).endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'])
+                for name, s in summary.items():
+                    writer.writerow([name, s['count'], '%g' % s['mean'], '%g' % s['p50'],
+                                     '%g' % s['p95'], '%g' % s['max']])
+        else:
+            with self._lock:
+                raw = {name: buffer.get().tolist() for name, buffer in self.buffers.items()}
+            with open(path, 'w') as f:
+                json.dump({'fps': self.fps(), 'stages': summary, 'durations_s': raw}, f, indent=1)
+
+
+def profiled(name):
+    '''
+    decorator of a method : time it with self.profiler (if it exists and is enabled)
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwds):
+            profiler = getattr(self, 'profiler', None)
+            if profiler is None or not profiler.enabled:
+                return func(self, *args, **kwds)
+            t0 = time.perf_counter()
+            try:
+                return func(self, *args, **kwds)
+            finally:
+                profiler.record(name, time.perf_counter() - t0)
+        return wrapper
+    return decorator
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Multi-resolution pyramid for the display of large frames (4k and more)
+
+    pyramid = PYRAMID(data)                 # once per frame (processing thread)
+    k = pyramid.select(pixelSize)           # level for the zoom : frame pixels
+    imh.setImage(pyramid.images[k])         # per screen pixel
+
+level k is the frame pooled 2**k x 2**k (mean or max). The colour levels come
+from visu.frameStats.FRAMESTATS of the full frame (subsample, no full pass).
+Only the display uses the pyramid : the analysis keeps the full resolution.
+"""
+
+import math
+import numpy as np
+
+__all__ = ['PYRAMID', 'pool']
+
+
+def pool(data, mode='mean'):
+    '''
+    2x2 pooling of the two first axes (mean in float32 or max),
+    the last row / column is dropped if the size is odd
+    '''
+    h = data.shape[0] // 2 * 2
+    w = data.shape[1] // 2 * 2
+    a, b = data[0:h:2, 0:w:2], data[1:h:2, 0:w:2]
+    c, d = data[0:h:2, 1:w:2], data[1:h:2, 1:w:2]
+    if mode == 'max':
+        out = np.maximum(a, b)
+        np.maximum(out, c, out=out)
+        np.maximum(out, d, out=out)
+        return out
+    out = a.astype(np.float32)
+    out += b
+    out += c
+    out += d
+    out *= 0.25
+    return out
+
+
+class PYRAMID():
+    '''
+    images : [data, data pooled 2x2, 4x4 ...] down to minSize pixels
+    '''
+
+    def __init__(self, data, minSize=512, mode='mean'):
+        self.shape = data.shape
+        self.mode = mode
+        self.images = [data]
+        while max(self.images[-1].shape[:2]) > minSize and min(self.images[-1].shape[:2]) >= 2:
+            self.images.append(pool(self.images[-1], mode))
+
+    def __len__(self):
+        return len(self.images)
+
+    def factor(self, k):
+        # frame pixels per pixel of the level k
+        return 2 ** k
+
+    def select(self, pixelSize):
+        '''
+        coarsest level with at least one pixel per screen pixel
+        pixelSize: frame pixels per screen pixel (ViewBox.viewPixelSize)
+        '''
+        if not pixelSize or pixelSize <= 1:
+            return 0
+        return min(len(self.images) - 1, int(math.floor(math.log2(pixelSize))))
+
+    def rect(self, k):
+        # (x, y, width, height) of the level k in frame pixels
+        image = self.images[k]
+        f = self.factor(k)
+        return (0, 0, image.shape[0] * f, image.shape[1] * f)
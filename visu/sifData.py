@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Frames of the Andor SIF files mapped in memory, shared by visu.andor.SifFile
+and visu.sifreader.SIFFile (they only differ by the way they find the offset
+and the size of the frames in the header).
+
+    frames = SIFFRAMES(path, offset, (height, width), count)
+    frames[i]              # frame i, copy : only its pages are read
+    frames.data            # all the frames (count, height, width), mapped
+    frames.close()         # unmap the file
+
+The data is float32, mapped copy on write. The frames given are copies : no
+array kept by the GUI keeps the file mapped (the acquisition can overwrite
+or delete it on Windows once closed).
+"""
+
+import os
+import numpy as np
+
+__all__ = ['SIFFRAMES', 'checkSif']
+
+MAGIC = b'Andor Technology Multi-Channel File'
+
+
+def checkSif(f, path=''):
+    '''
+    read the first line of the open file f, Exception if it is not a SIF file
+    '''
+    if f.readline().strip() != MAGIC:
+        raise Exception("File %s is not an Andor SIF file." % path)
+
+
+class SIFFRAMES():
+    '''
+    count frames of shape (height, width) float32 from offset (bytes) in path
+    '''
+
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, path, offset, shape, count=1):
+        self.path = path
+        self.offset = int(offset)
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.count = int(count)
+        size = self.count * self.shape[0] * self.shape[1] * self.dtype.itemsize
+        if self.offset < 0 or self.offset + size > os.path.getsize(path):
+            raise Exception("File %s : %i frames %s not in the file" % (path, self.count, self.shape))
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = np.memmap(self.path, dtype=self.dtype, mode='c', offset=self.offset,
+                                   shape=(self.count,) + self.shape).view(np.ndarray)
+        return self._data
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return np.array(self.data[i])
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self):
+        # the map is released with the last view of data
+        self._data = None
@@ -8,6 +8,7 @@
 import os
 import time
 import numpy as np
+from visu.sifData import SIFFRAMES
 
 
 class SIFFile(object):
@@ -37,11 +38,23 @@ class SIFFile(object):
     :ivar stacksize: number of frames
     :ivar filesize: size of the file in bytes
     :ivar m_offset: offset in the .sif file to the actual data
+    The header is parsed once, the frames are mapped in memory (visu.sifData.SIFFRAMES)
+    and read only when used.
     """
 
     def __init__(self, filepath):
         self.filepath = filepath
         self._read_header(filepath)
+        self._frames = None
+
+    @property
+    def frames(self):
+        if self._frames is None:
+            self._frames = SIFFRAMES(self.filepath, self.m_offset, (self.height, self.width), self.stacksize)
+        return self._frames
+
+    def __len__(self):
+        return self.stacksize
 
     def __repr__(self):
         info = (('Original Filename', self.original_filename),
@@ -154,26 +167,23 @@ class SIFFile(object):
         """
         Returns a specific block (i.e. frame) in the .sif file as a numpy array.
         :param num: block number
-        :return: a numpy array with shape (y, x)
+        :return: a numpy array with shape (y, x), copy of the block
         """
-        f = open(self.filepath, 'rb')
-        f.seek(self.m_offset + num * self.width * self.height * 4)
-        block = f.read(self.width * self.height * 4)
-        data = np.fromstring(block, dtype=np.float32)
-        f.close()
-        return data.reshape(self.height, self.width)
+        return self.frames[num]
 
     def read_all(self):
         """
         Returns all blocks (i.e. frames) in the .sif file as a numpy array.
-        :return: a numpy array with shape (blocks, y, x)
+        :return: a numpy array with shape (blocks, y, x), copy of the blocks
         """
-        f = open(self.filepath, 'rb')
-        f.seek(self.m_offset)
-        block = f.read(self.width * self.height * self.stacksize * 4)
-        data = np.fromstring(block, dtype=np.float32)
-        f.close()
-        return data.reshape(self.stacksize, self.height, self.width)
+        return np.array(self.frames.data)
+
+    def close(self):
+        """
+        Unmap the file (mapped again if a block is read)
+        """
+        if self._frames is not None:
+            self._frames.close()
 
     def as_xarray(self, x_axis_quantity='wavelength'):
         """
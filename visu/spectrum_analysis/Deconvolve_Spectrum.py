@@ -5,6 +5,7 @@ import pyqtgraph as pg
 from pyqtgraph import ColorBarItem
 from scipy.interpolate import interp1d
 from os import sep
+from visu.textFrame import loadText
 
 VIRIDIS = pg.colormap.get('viridis')
 
@@ -31,7 +32,7 @@ class CalibrationData:
         s: s interpolated for each energy value
     """
     def __init__(self, cal_path: str):
-        cal = np.loadtxt(cal_path).T
+        cal = loadText(cal_path).T
         self.energy = cal[0]
         self.dsde = cal[1]
         self.s = cal[2]
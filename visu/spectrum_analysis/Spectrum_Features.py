@@ -1,32 +1,196 @@
 import numpy as np
-import math as m
 
-def find_nearest(data, value):
-    return (np.abs(data - value)).argmin()
-def find_indices(energy: np.ndarray, data_counts: np.ndarray, energy_bounds: list = None):
+# Percentiles (in % of the charge in band) stored in each feature record
+PERCENTILES = (10., 50., 90.)
+
+# Fixed schema of a feature record: one row per shot
+FEATURES_DTYPE = np.dtype([('shot_number', np.int64),
+                           ('charge', np.float64),             # pC in energy band
+                           ('mean_energy', np.float64),        # MeV, weighted by dN/dE
+                           ('std_energy', np.float64),         # MeV
+                           ('peak_energy', np.float64),        # MeV
+                           ('fwhm', np.float64),               # MeV, around the peak
+                           ('percentiles', np.float64, (len(PERCENTILES),)),  # MeV
+                           ('cutoff_energy', np.float64)])     # MeV
+
+
+def find_indices(energy: np.ndarray, data_counts: np.ndarray = None, energy_bounds: list = None):
     '''
     Extracts subdata from energy and data array, given energy bounds specified in interface
-    :param energy:
-    :return:
+    :param energy: energy axis, sorted in increasing order
+    :return: (low, high) slice indices, energy[low:high] is inside the bounds
     '''
     if energy_bounds is None:
-        return [0, -1]
+        return 0, len(energy)
     else:
-        low_index= find_nearest(energy, energy_bounds[0])
-        high_index= find_nearest(energy, energy_bounds[1])
+        low_index = int(np.searchsorted(energy, energy_bounds[0], side='left'))
+        high_index = int(np.searchsorted(energy, energy_bounds[1], side='right'))
         return low_index, high_index
 
 
-def weighted_avg_and_std(energy: np.ndarray, data_counts: np.ndarray):
-    average = np.average(energy, weights=data_counts)
-    variance = np.average((energy - average) ** 2, weights=data_counts)
-    return (average, m.sqrt(variance))
+def _crossing(energy, spectra, index, level, before):
+    '''
+    Energy where spectra crosses level, by linear interpolation between
+    index and its neighbour (index-1 if before else index+1), for each row
+    '''
+    last = energy.size - 1
+    other = np.clip(index - 1 if before else index + 1, 0, last)
+    y0 = np.take_along_axis(spectra, index[:, None], axis=1)[:, 0]
+    y1 = np.take_along_axis(spectra, other[:, None], axis=1)[:, 0]
+    e0 = energy[index]
+    e1 = energy[other]
+    dy = y1 - y0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = np.where(dy != 0, (level - y0) / dy, 0.)
+    return e0 + np.clip(frac, 0., 1.) * (e1 - e0)
+
+
+def spectrum_features_batch(energy: np.ndarray, spectra: np.ndarray, shotNum=-1, energy_bounds: list = None,
+                            cutoff_fraction: float = 0.1):
+    '''
+    Features of N spectra sharing the same energy axis, computed in one vectorized pass
+    :param energy: (E,) energy axis in MeV, sorted in increasing order
+    :param spectra: (N, E) dN/dE in pC/MeV
+    :param shotNum: shot number, scalar or (N,) array
+    :param energy_bounds: [Emin, Emax] band used for all features, None for the full axis
+    :param cutoff_fraction: cutoff energy is the highest energy where dN/dE >= cutoff_fraction*peak
+    :return: (N,) structured array of dtype FEATURES_DTYPE
+    '''
+    energy = np.asarray(energy, dtype=np.float64)
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=np.float64))
+    low, high = find_indices(energy, energy_bounds=energy_bounds)
+    e = energy[low:high]
+    w = spectra[:, low:high]
+
+    n = spectra.shape[0]
+    features = np.zeros(n, dtype=FEATURES_DTYPE)
+    features['shot_number'] = shotNum
+    for name in FEATURES_DTYPE.names[1:]:
+        features[name] = np.nan
+    if e.size == 0:
+        return features
+
+    de = np.gradient(e) if e.size > 1 else np.ones(1)
+    s0 = w.sum(axis=1)
+    s1 = w @ e
+    s2 = w @ (e * e)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s1 / s0
+        var = np.maximum(s2 / s0 - mean * mean, 0.)
+    features['charge'] = w @ de
+    features['mean_energy'] = mean
+    features['std_energy'] = np.sqrt(var)
+
+    # peak and full width at half maximum (linear interpolation of the crossings)
+    rows = np.arange(n)
+    ipeak = w.argmax(axis=1)
+    peak = w[rows, ipeak]
+    features['peak_energy'] = e[ipeak]
+    half = peak / 2.
+    above = w >= half[:, None]
+    first = above.argmax(axis=1)
+    last = e.size - 1 - above[:, ::-1].argmax(axis=1)
+    features['fwhm'] = (_crossing(e, w, last, half, before=False) -
+                        _crossing(e, w, first, half, before=True))
+
+    # energy below which lies p % of the charge in band : the charge of the
+    # point i is spread over its bin, cumulative charge known at the bin edges
+    edges = np.concatenate(([e[0] - de[0] / 2.], e + de / 2.))  # (E+1,)
+    cumulative = np.zeros((n, e.size + 1))
+    np.cumsum(w * de, axis=1, out=cumulative[:, 1:])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cdf = cumulative / cumulative[:, -1:]
+    q = np.asarray(PERCENTILES) / 100.
+    ip = np.clip((cdf[:, :, None] < q).sum(axis=1), 1, e.size)  # (N, P) upper edge
+    c1 = np.take_along_axis(cdf, ip, axis=1)
+    c0 = np.take_along_axis(cdf, ip - 1, axis=1)
+    e1 = edges[ip]
+    e0 = edges[ip - 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = np.where(c1 > c0, (q - c0) / (c1 - c0), 1.)
+    features['percentiles'] = e0 + np.clip(frac, 0., 1.) * (e1 - e0)
+
+    # cutoff: last point above the threshold
+    over = w >= (cutoff_fraction * peak)[:, None]
+    features['cutoff_energy'] = e[e.size - 1 - over[:, ::-1].argmax(axis=1)]
+
+    empty = ~(s0 > 0)
+    if empty.any():
+        for name in FEATURES_DTYPE.names[2:]:
+            features[name][empty] = np.nan
+    return features
+
+
+def spectrum_features(energy: np.ndarray, data: np.ndarray, shotNum: int = -1, energy_bounds: list = None,
+                      cutoff_fraction: float = 0.1):
+    '''
+    Features of a single spectrum, see spectrum_features_batch
+    :return: record (np.void) of dtype FEATURES_DTYPE
+    '''
+    return spectrum_features_batch(energy, np.asarray(data)[None, :], shotNum, energy_bounds,
+                                    cutoff_fraction)[0]
+
+
+def _value(value):
+    # float, None for NaN (not valid in json)
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def to_dict(features):
+    '''
+    Json serialisable dictionary from a feature record (None for the NaN features)
+    '''
+    data_dict = {'Shot number': int(features['shot_number']),
+                 'Charge': _value(features['charge']),
+                 'Mean energy': _value(features['mean_energy']),
+                 'Std energy': _value(features['std_energy']),
+                 'Peak energy': _value(features['peak_energy']),
+                 'FWHM': _value(features['fwhm']),
+                 'Cutoff energy': _value(features['cutoff_energy'])}
+    for p, value in zip(PERCENTILES, features['percentiles']):
+        data_dict['P%g energy' % p] = _value(value)
+    return data_dict
 
 
 def build_dict(energy: np.ndarray, data: np.ndarray, shotNum: int, energy_bounds):
-    low, high = find_indices(energy, data, energy_bounds)
-    mean_energy, std_energy = weighted_avg_and_std(energy[low:high],data[low:high])
-    data_dict = {('Std energy', std_energy),
-                 ('Mean energy', mean_energy),
-                 ('Shot number', shotNum)}
-    return data_dict
\ No newline at end of file
+    return to_dict(spectrum_features(energy, data, shotNum, energy_bounds))
+
+
+def selfTest():
+    '''
+    spectrum_features_batch against a per spectrum computation : mean, std and
+    charge as the former build_dict (np.average), percentiles by np.interp of
+    the cumulative charge at the bin edges, peak and cutoff by a loop
+    '''
+    rng = np.random.default_rng(0)
+    energy = np.linspace(20., 250., 300)
+    spectra = rng.random((20, energy.size)) + 5 * np.exp(-((energy - 120.) / 15.) ** 2)
+    bounds = [40., 200.]
+    features = spectrum_features_batch(energy, spectra, np.arange(20), bounds)
+    low, high = find_indices(energy, energy_bounds=bounds)
+    e = energy[low:high]
+    step = e[1] - e[0]
+    edges = np.concatenate(([e[0] - step / 2.], e + step / 2.))
+    for record, spectrum in zip(features, spectra):
+        w = spectrum[low:high]
+        mean = np.average(e, weights=w)
+        std = np.sqrt(np.average((e - mean) ** 2, weights=w))
+        cumulative = np.concatenate(([0.], np.cumsum(w)))
+        percentiles = np.interp(np.asarray(PERCENTILES) / 100., cumulative / cumulative[-1], edges)
+        over = np.flatnonzero(w >= 0.1 * w.max())
+        assert np.isclose(record['charge'], w.sum() * step)
+        assert np.isclose(record['mean_energy'], mean) and np.isclose(record['std_energy'], std)
+        assert np.allclose(record['percentiles'], percentiles)
+        assert record['peak_energy'] == e[w.argmax()] and record['cutoff_energy'] == e[over[-1]]
+    # one bin : its charge spread over [3 - 0.5, 3 + 0.5]
+    single = np.zeros(10)
+    single[3] = 1.
+    assert np.allclose(spectrum_features(np.arange(10.), single)['percentiles'], [2.6, 3., 3.4])
+    gauss = spectrum_features(energy, np.exp(-((energy - 120.) / 15.) ** 2 / 2.))
+    assert abs(gauss['fwhm'] - 2 * np.sqrt(2 * np.log(2)) * 15.) < 0.1
+    print('Spectrum_Features : ok')
+
+
+if __name__ == "__main__":
+    selfTest()
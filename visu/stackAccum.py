@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Accumulation of a stack of image files (SEE.StactF) without keeping the frames
+
+    acc = stackFiles(paths, mode='sum')    # read on a thread pool
+    acc.result(), acc.count, acc.skipped
+
+The files are read (visu.imageReader, first frame) by a pool of threads, at
+most 2 per thread at the same time, and reduced when they arrive in a running
+sum / mean / max : the memory is a few frames whatever the number of files.
+The median is approximated by the mean of the medians of blocks of 5 frames
+(hot pixels and cosmic rays of one shot are removed) : 5 frames in memory.
+
+STACKTHREAD runs stackFiles out of the GUI thread with progress and cancel.
+"""
+
+import concurrent.futures
+import os
+import threading
+import numpy as np
+from PyQt6 import QtCore
+
+__all__ = ['ACCUMULATOR', 'stackFiles', 'STACKTHREAD', 'MODES']
+
+MODES = ('sum', 'mean', 'median', 'max')
+
+
+class ACCUMULATOR():
+    '''
+    running reduction of frames of the same shape
+    mode: sum, mean, median (mean of medians of block frames) or max
+    '''
+
+    def __init__(self, mode='sum', block=5):
+        if mode not in MODES:
+            raise ValueError('stack mode %s not in %s' % (mode, MODES))
+        self.mode = mode
+        self.block = block
+        self.count = 0
+        self.shape = None
+        self.skipped = []  # (path, error) of the files not read
+        self._acc = None
+        self._weight = 0  # frames in the medians of _acc
+        self._pending = []
+
+    def add(self, data):
+        if self.shape is None:
+            self.shape = data.shape
+        elif data.shape != self.shape:
+            raise ValueError('frame shape %s, stack shape %s' % (data.shape, self.shape))
+        self.count += 1
+        if self.mode == 'max':
+            if self._acc is None:
+                self._acc = np.array(data)
+            else:
+                np.maximum(self._acc, data, out=self._acc)
+        elif self.mode == 'median':
+            self._pending.append(data)
+            if len(self._pending) == self.block:
+                self._addMedian()
+        else:
+            if self._acc is None:
+                self._acc = np.zeros(data.shape, np.float64)
+            self._acc += data
+
+    def _addMedian(self):
+        n = len(self._pending)
+        median = np.median(np.stack(self._pending), axis=0)
+        self._pending = []
+        if self._acc is None:
+            self._acc = np.zeros(median.shape, np.float64)
+        self._acc += n * median
+        self._weight += n
+
+    def result(self):
+        # reduction of the frames added, None if none
+        if self.count == 0:
+            return None
+        if self.mode == 'median':
+            if self._pending:
+                self._addMedian()
+            return self._acc / self._weight
+        if self.mode == 'mean':
+            return self._acc / self.count
+        return self._acc.copy()
+
+
+def _read(path):
+    from visu.imageReader import readImage
+    return readImage(path)[0]
+
+
+def stackFiles(paths, mode='sum', workers=None, progress=None, cancel=None, read=_read):
+    '''
+    ACCUMULATOR of the files paths
+    progress(done, total) called after each file, cancel: threading.Event
+    (the files already read are kept). A file which can not be read is
+    skipped (acc.skipped), a frame of an other shape raises ValueError
+    '''
+    acc = ACCUMULATOR(mode)
+    workers = workers or min(8, os.cpu_count() or 1)
+    total = len(paths)
+    todo = iter(paths)
+    done = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+
+        def submit():
+            for path in todo:
+                running[pool.submit(read, path)] = path
+                if len(running) >= 2 * workers:
+                    break
+        submit()
+        try:
+            while running:
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    path = running.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        print('stack : file not read', path, e)
+                        acc.skipped.append((path, e))
+                    else:
+                        acc.add(data)
+                    done += 1
+                    if progress is not None:
+                        progress(done, total)
+                if cancel is not None and cancel.is_set():
+                    break
+                submit()
+        finally:
+            for future in running:
+                future.cancel()
+    return acc
+
+
+class STACKTHREAD(QtCore.QThread):
+    '''
+    stackFiles in a thread : progress(done, total) then finished
+    with self.acc (None if error, self.error)
+    '''
+    progress = QtCore.pyqtSignal(int, int)
+
+    def __init__(self, paths, mode='sum', parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self.mode = mode
+        self.acc = None
+        self.error = None
+        self.cancel = threading.Event()
+
+    def stop(self):
+        self.cancel.set()
+
+    def run(self):
+        try:
+            self.acc = stackFiles(self.paths, self.mode, progress=self.progress.emit,
+                                  cancel=self.cancel)
+        except Exception as e:
+            self.error = e
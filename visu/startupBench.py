@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Startup time of SEE, each start in a new python (cold imports)
+
+    python -m visu.startupBench [--spectro] [--repeat 5]
+
+times (s) of the QApplication, of import visu.visual, of SEE() and of the
+first frame displayed (windows created at their first use, as the spectro
+window with spectro=True)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+__all__ = ['startupTimes', 'benchmark']
+
+_SCRIPT = r'''
+import json, sys, time
+t0 = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+t1 = time.perf_counter()
+import visu.visual
+import numpy as np
+t2 = time.perf_counter()
+see = visu.visual.SEE(spectro=%(spectro)r)
+app.processEvents()
+t3 = time.perf_counter()
+see.Display(np.zeros(%(shape)r, np.uint16))
+app.processEvents()
+t4 = time.perf_counter()
+see.close()
+print(json.dumps({'qt': t1 - t0, 'import': t2 - t1, 'SEE': t3 - t2, 'total': t3 - t0,
+                  'first frame': t4 - t3}))
+'''
+
+
+def startupTimes(spectro=False, shape=(2048, 1088)):
+    '''
+    times of one start of SEE in a new python
+    (shape of the first frame : the spectro calibration needs 2048 x 1088)
+    '''
+    out = subprocess.run([sys.executable, '-c', _SCRIPT % {'spectro': spectro, 'shape': shape}],
+                         capture_output=True, text=True, check=True, env=os.environ.copy())
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def benchmark(spectro=False, repeat=5):
+    # median of repeat starts
+    runs = [startupTimes(spectro) for n in range(repeat)]
+    times = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+    print('  '.join('%s %.0f ms' % (key, t * 1e3) for key, t in times.items()))
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='startup time of visu.visual.SEE')
+    parser.add_argument('--spectro', action='store_true', help='SEE(spectro=True)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.spectro, args.repeat)
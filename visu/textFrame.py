@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 2026/10/19
+Fast loading of the text frames (.txt written by np.savetxt : autosaves,
+snapshots, calibration files, B maps)
+
+    data = loadText(path)                  # same array as np.loadtxt(path)
+
+The text is parsed by the C engine of pandas if it is installed, otherwise by
+np.loadtxt (C parser since numpy 1.23). The array is then kept in a binary
+sidecar next to the file :
+
+    .<name>.<key>.npy       key : hash of the absolute path, mtime and size
+
+so that opening the file again (HISTORY, slider) only reads the .npy. A
+modified file gets a new key : the old sidecar is removed. If the directory
+is read only the sidecar goes in the temporary directory (visuTextCache).
+Files smaller than minCacheSize are only parsed (a few ms).
+
+benchmark : python -m visu.textFrame [files]
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import tempfile
+import time
+import numpy as np
+
+__all__ = ['loadText', 'sidecarPath', 'clearSidecar', 'benchmark']
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'visuTextCache')
+MIN_CACHE_SIZE = 1_000_000  # bytes
+
+
+def _key(path):
+    st = os.stat(path)
+    key = '%s|%i|%i' % (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _sidecars(directory, name):
+    return glob.glob(os.path.join(glob.escape(directory), '.%s.*.npy' % glob.escape(name)))
+
+
+def sidecarPath(path, directory=None):
+    '''
+    path of the sidecar of the text file path in its current state (mtime, size)
+    '''
+    directory = directory or os.path.dirname(os.path.abspath(path))
+    return os.path.join(directory, '.%s.%s.npy' % (os.path.basename(path), _key(path)))
+
+
+def clearSidecar(path):
+    # remove the sidecars of path (next to the file and in CACHE_DIR)
+    name = os.path.basename(path)
+    for directory in (os.path.dirname(os.path.abspath(path)), CACHE_DIR):
+        for side in _sidecars(directory, name):
+            try:
+                os.remove(side)
+            except OSError:
+                pass
+
+
+def parseText(path, comments='#', delimiter=None):
+    '''
+    parse the text file, as np.loadtxt (float64, squeezed)
+    '''
+    try:
+        import pandas  # optional : faster C engine
+    except ImportError:
+        pandas = None
+    if pandas is not None:
+        sep = r'\s+' if delimiter is None else delimiter
+        data = pandas.read_csv(path, sep=sep, header=None, comment=comments,
+                               dtype=np.float64, engine='c').to_numpy()
+        return np.squeeze(data)
+    return np.loadtxt(path, comments=comments, delimiter=delimiter)
+
+
+def _writeSidecar(side, data):
+    # write then rename : a sidecar is never read half written
+    tmp = side + '.%i.tmp' % os.getpid()
+    try:
+        with open(tmp, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp, side)
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def loadText(path, cache=True, minCacheSize=MIN_CACHE_SIZE, comments='#', delimiter=None):
+    '''
+    array of the text file path (as np.loadtxt), from the .npy sidecar if it
+    is up to date, otherwise parsed and the sidecar written (if cache and
+    the file is larger than minCacheSize bytes)
+    '''
+    path = str(path)
+    if not cache or os.path.getsize(path) < minCacheSize:
+        return parseText(path, comments, delimiter)
+    name = os.path.basename(path)
+    candidates = (sidecarPath(path), sidecarPath(path, CACHE_DIR))
+    for side in candidates:
+        if os.path.isfile(side):
+            try:
+                return np.load(side)
+            except (OSError, ValueError) as e:
+                print('sidecar not readable', side, e)
+    data = parseText(path, comments, delimiter)
+    for side in candidates:
+        directory = os.path.dirname(side)
+        for old in _sidecars(directory, name):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            continue
+        if _writeSidecar(side, data):
+            break
+    return data
+
+
+def benchmark(paths=None, shape=(2048, 2048), repeat=3):
+    '''
+    time (s) of np.loadtxt, of the first loadText (parse + sidecar) and of the
+    next ones (sidecar) : files given, or one autosave written in a temporary directory
+    '''
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if not paths:
+            path = os.path.join(directory, 'bench.txt')
+            np.savetxt(path, (np.random.rand(*shape) * 60000).astype(np.uint16))
+            paths = [path]
+        for path in paths:
+            clearSidecar(path)
+            t0 = time.perf_counter()
+            np.loadtxt(path)
+            t1 = time.perf_counter()
+            loadText(path)
+            t2 = time.perf_counter()
+            t = []
+            for n in range(repeat):
+                t3 = time.perf_counter()
+                loadText(path)
+                t.append(time.perf_counter() - t3)
+            results[path] = {'loadtxt': t1 - t0, 'first': t2 - t1, 'cached': float(np.mean(t))}
+            print('loadtxt %8.1f ms   first %8.1f ms   cached %8.1f ms  %s' % (
+                (t1 - t0) * 1e3, (t2 - t1) * 1e3, np.mean(t) * 1e3, os.path.basename(path)))
+            if path.startswith(directory):
+                clearSidecar(path)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='time of the text frame loader of visu')
+    parser.add_argument('files', nargs='*', help='text files (default : generated)')
+    parser.add_argument('--size', type=int, default=2048, help='size of the generated frame')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.files, (args.size, args.size), args.repeat)
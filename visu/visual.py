@@ -22,7 +22,7 @@ import pyqtgraph as pg
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QPushButton
 from PyQt6.QtWidgets import QInputDialog, QSlider, QLabel, QSizePolicy, QMenu
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QLineEdit, QDialog ,QDialogButtonBox
-from PyQt6.QtWidgets import QMainWindow, QToolButton, QStatusBar, QFrame, QFormLayout
+from PyQt6.QtWidgets import QMainWindow, QToolButton, QStatusBar, QFrame, QFormLayout, QProgressDialog
 from PyQt6.QtGui import QShortcut, QAction
 from PyQt6 import QtCore, QtGui
 from PyQt6.QtCore import pyqtSlot, Qt
@@ -31,28 +31,27 @@ from PyQt6.QtGui import QFont
 import sys
 import time
 import os
+from functools import cached_property
 
 import numpy as np
-import qdarkstyle  # pip install qdarkstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
-from scipy.interpolate import splrep, sproot
-from scipy.ndimage import gaussian_filter, median_filter
+from visu.darkStyle import styleSheet
 from PIL import Image
-from visu.winspec import SpeFile
-from visu.visualLight import SEELIGHT
-from visu.winSuppE import WINENCERCLED
-from visu.WinCut import GRAPHCUT
-from visu.winMeas import MEAS
 from visu.WinOption import OPTION
 from visu.WinPreference import PREFERENCES
-from visu.andor import SifFile
-from visu.winFFT import WINFFT
-from visu.winMath import WINMATH
-from visu.winPointing import WINPOINTING
 from visu.winHist import HISTORY
-from visu import aboutWindows
-from visu.winZoom import ZOOM
-from visu.winCrop import WINCROP
-from visu.winSpectro2 import WINSPECTRO
+# the other windows (and their imports : scipy, motors...) are created at
+# their first use, see SEE.winM ...
+from visu.pipeline import PIPELINE, PROCESSGRAPH, ORIENTATION, processFrame
+from visu.profiling import PROFILER, profiled
+from visu.autosave import AUTOSAVEWRITER
+from visu.campaignStore import writeShot, closeCampaigns
+from visu.crossSection import CROSSSECTION, fwhmSpline
+from visu.pyramid import PYRAMID
+from visu.frameStats import FRAMESTATS, STATSIMAGEITEM
+from visu.imageReader import openImage, extensions, fileFilter
+from visu.stackAccum import STACKTHREAD, MODES
+from visu.frameCache import FRAMECACHE
+from visu.dirWatch import DIRWATCHER
 # try :
 #     from visu.Win3D import GRAPH3D #conda install pyopengl
 # except :
@@ -94,7 +93,6 @@ class SEE(QMainWindow):
     signalPlot = QtCore.pyqtSignal(object)
     signalCrop = QtCore.pyqtSignal(object)
     signalSpectro = QtCore.pyqtSignal(object)
-    signalSpectroList = QtCore.pyqtSignal(object)
     signalDisplayed = QtCore.pyqtSignal(object)  # Emit when display a image
 
     def __init__(self, file=None, path=None, parent=None, **kwds):
@@ -102,7 +100,7 @@ class SEE(QMainWindow):
         super().__init__()
         self.version = __version__
         self.parent = parent
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         print("data visualisation version :  ", self.version)
         p = pathlib.Path(__file__)
         self.fullscreen = False
@@ -114,7 +112,6 @@ class SEE(QMainWindow):
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
         self.nomFichier = ''
         self.labelValue = ''
-        self.aboutWidget = aboutWindows.ABOUT()
         self.signalTrans = dict()  # dict to emit multivariable
         self.frameNumber = 0
         
@@ -179,11 +176,6 @@ class SEE(QMainWindow):
         else:
             self.encercled = True
 
-        if self.fft == True:
-            self.winFFT = WINFFT(conf=self.conf, name=self.name)
-            self.winFFT1D = GRAPHCUT(symbol=False, title='FFT 1D', 
-                                     conf=self.conf, name=self.name)
-
         if "filter" in kwds:
             self.winFilter = kwds['filter']
         else:
@@ -193,6 +185,7 @@ class SEE(QMainWindow):
         else:
             self.crossSection = True        
 
+        self.measKwds = {}  # arguments of MEAS : self.winM is created at its first use
         if "confMotPath" in kwds: # obsolete 
             print('motor accepted')
             if self.meas is True:
@@ -202,31 +195,30 @@ class SEE(QMainWindow):
                 self.confMot = (
                     QtCore.QSettings(self.confMotPath,
                                      QtCore.QSettings.Format.IniFormat))
-                self.winM = MEAS(parent=self, confMot=self.confMot,
-                                 conf=self.conf, name=self.name)
+                self.measKwds = {'confMot': self.confMot}
         
         elif "confMot" in kwds:
             self.confMot = kwds["confMot"]  # le Qsetting des moteurs
-            self.winM = MEAS(parent=self, confMot=self.confMot, conf=self.conf, name=self.name)
+            self.measKwds = {'confMot': self.confMot}
             
         if "motRSAI" in kwds:
             self.motRSAI = kwds["motRSAI"]
             if self.motRSAI is True: 
-                self.winM = MEAS(parent=self, conf=self.conf, name=self.name,motRSAI=self.motRSAI)
+                self.measKwds = {'motRSAI': self.motRSAI}
             else :
                 if self.meas is True :
-                    self.winM = MEAS(parent=self, conf=self.conf, name=self.name)
+                    self.measKwds = {}
         
         elif 'motA2V' in kwds :
             self.motA2V = kwds["motA2V"]
             if self.motA2V is True :
-                self.winM = MEAS(parent=self, conf=self.conf, name=self.name,motA2V=self.motA2V)
+                self.measKwds = {'motA2V': self.motA2V}
             else :
                 if self.meas is True :
-                    self.winM = MEAS(parent=self, conf=self.conf, name=self.name)
+                    self.measKwds = {}
         else:
             if self.meas is True :
-                self.winM = MEAS(parent=self, conf=self.conf, name=self.name)
+                self.measKwds = {}
 
 
         self.winOpt = OPTION(conf=self.conf, name=self.name, parent=self)
@@ -236,13 +228,6 @@ class SEE(QMainWindow):
             self.spectro = kwds["spectro"]
         else :
             self.spectro = False
-        
-        if self.spectro is True:
-            self.winSpectro = WINSPECTRO(parent=self,conf=self.conf)
-
-        if self.encercled is True:
-            self.winEncercled = WINENCERCLED(parent=self, conf=self.conf,
-                                             name=self.name)
 
         if "plot3d" in kwds:
             self.plot3D = kwds["plot3d"]
@@ -258,15 +243,6 @@ class SEE(QMainWindow):
         else:
             self.math = True
 
-        if self.math is True:
-            self.winMath = WINMATH()
-
-        self.winPointing = WINPOINTING(parent=self)
-        self.winCoupe = GRAPHCUT(parent=self, symbol=None, conf=self.conf,
-                                 name=self.name)
-
-        self.winCrop = WINCROP(parent=self, conf=self.conf)
-        
         self.path = path
         self.setWindowTitle('Visualization'+'       v.' + self.version)
         self.bloqKeyboard = True  # block cross by keyboard
@@ -284,8 +260,45 @@ class SEE(QMainWindow):
         self.angleImage = 0
         self.xcMouse = 0
         self.ycMouse = 0
+        # frames larger than pyramidSize are displayed from a pyramid (zoom level)
+        self.pyramidSize = int(self.conf.value(self.name+"/pyramidSize", 2048))
+        self.pyramid = None
+        self.pyramidLevel = 0
+        self.openedFrames = None  # IMAGEFILE browsed with the slider (frames of one file)
+        self.stats = None  # visu.frameStats.FRAMESTATS of the frame displayed
+        self.stackThread = None  # visu.stackAccum.STACKTHREAD running
+        # files browsed with the slider : LRU of cacheSize MB, prefetch files read ahead
+        self.fileCache = FRAMECACHE(budget=int(self.conf.value(self.name+"/cacheSize", 512)) * 2**20)
+        self.prefetchCount = int(self.conf.value(self.name+"/prefetch", 3))
+        self.sliderIndex = 0
+        self.watcher = None  # visu.dirWatch.DIRWATCHER of the directory watched
         self.setup()
 
+        self.cutState = CROSSSECTION()  # axes and maximum kept for Coupe
+
+        # timing of the stages, off by default (Analyse menu)
+        self.profiler = PROFILER(enabled=False)
+        self.timerPerf = QtCore.QTimer()
+        self.timerPerf.timeout.connect(self.perfUpdate)
+
+        # frames received are processed out of the GUI thread
+        self.graph = PROCESSGRAPH()  # re-render in the GUI thread (filters...)
+        self.workerGraph = PROCESSGRAPH()
+        self.pipeline = PIPELINE(self.processWorker,
+                                 maxQueued=int(self.conf.value(self.name+"/maxQueuedFrames", 16)))
+        self.pipeline.frameProcessed.connect(self.displayResult)
+        self.pipeline.start()
+        # autosave files written by background threads
+        self.writer = AUTOSAVEWRITER(maxQueued=int(self.conf.value(self.name+"/maxQueuedSave", 64)),
+                                     profiler=self.profiler)
+        self.writer.saveError.connect(self.autoSaveError)
+        # campaign file of the run (visu.campaignStore) : one writer thread, in order
+        self.campaignWriter = AUTOSAVEWRITER(maxQueued=int(self.conf.value(self.name+"/maxQueuedSave", 64)),
+                                             nbThreads=1, write=writeShot, close=closeCampaigns,
+                                             key=lambda path, *args: path)
+        self.campaignWriter.saveError.connect(self.autoSaveError)
+        self.displayedCampaign = None  # campaign arguments of the frame displayed
+
         def twoD_Gaussian(x, y, amplitude, xo, yo, sigma_x, sigma_y, theta,
                           offset):
             xo = float(xo)
@@ -318,6 +331,8 @@ class SEE(QMainWindow):
                 self.path = self.conf.value(self.name+"/path")
 
             self.data = self.OpenF(fileOpen=self.path+'/'+file)
+            self.dimx = np.shape(self.data)[0]
+            self.dimy = np.shape(self.data)[1]
 
         self.dataOrg = self.data
         self.dataOrgScale = self.data
@@ -333,13 +348,86 @@ class SEE(QMainWindow):
         self.shortcut()
         self.actionButton()
         imageOuverture = Image.open(self.icon+'LOA.png')
-        imageOuverture = np.rot90(np.array (imageOuverture),3)
+        # contiguous : pyqtgraph downsamples a rotated view 10 times slower
+        imageOuverture = np.ascontiguousarray(np.rot90(np.array (imageOuverture),3))
         self.imh.setImage(imageOuverture, autoLevels=True, autoDownsample=True)
         #self.Display(self.data)
         self.activateWindow()
         self.raise_()
         self.showNormal()
 
+    # windows of SEE : created (module imported) at their first use
+    # winBuilt / winIsOpen read their state without creating them
+
+    def winBuilt(self, name):
+        return name in self.__dict__
+
+    def winIsOpen(self, name):
+        return self.winBuilt(name) and getattr(self, name).isWinOpen is True
+
+    @cached_property
+    def aboutWidget(self):
+        from visu import aboutWindows
+        return aboutWindows.ABOUT()
+
+    @cached_property
+    def winM(self):
+        from visu.winMeas import MEAS
+        winM = MEAS(parent=self, conf=self.conf, name=self.name, **self.measKwds)
+        winM.newMeasurement.connect(self.campaignMeasurement)
+        return winM
+
+    @cached_property
+    def winFFT(self):
+        from visu.winFFT import WINFFT
+        return WINFFT(conf=self.conf, name=self.name)
+
+    @cached_property
+    def winFFT1D(self):
+        from visu.WinCut import GRAPHCUT
+        return GRAPHCUT(symbol=False, title='FFT 1D', conf=self.conf, name=self.name)
+
+    @cached_property
+    def winSpectro(self):
+        # used by processWorker : created by newDataReceived in the GUI thread
+        from visu.winSpectro2 import WINSPECTRO
+        winSpectro = WINSPECTRO(parent=self, conf=self.conf)
+        if getattr(self, 'serv', None) is not None:
+            winSpectro.setServer(self.serv)
+        return winSpectro
+
+    @cached_property
+    def winEncercled(self):
+        from visu.winSuppE import WINENCERCLED
+        return WINENCERCLED(parent=self, conf=self.conf, name=self.name)
+
+    @cached_property
+    def winMath(self):
+        from visu.winMath import WINMATH
+        winMath = WINMATH()
+        winMath.emitApply.connect(self.newDataReceived)
+        return winMath
+
+    @cached_property
+    def winPointing(self):
+        from visu.winPointing import WINPOINTING
+        return WINPOINTING(parent=self)
+
+    @cached_property
+    def winCoupe(self):
+        from visu.WinCut import GRAPHCUT
+        return GRAPHCUT(parent=self, symbol=None, conf=self.conf, name=self.name)
+
+    @cached_property
+    def winCrop(self):
+        from visu.winCrop import WINCROP
+        return WINCROP(parent=self, conf=self.conf)
+
+    @cached_property
+    def winZoomMax(self):
+        from visu.winZoom import ZOOM
+        return ZOOM()
+
     def setup(self):
         # definition of all button
 
@@ -389,7 +477,7 @@ class SEE(QMainWindow):
         self.fileMenu.addAction(self.openAct)
 
         self.stackAct = QAction(QtGui.QIcon(self.icon+"Open.png"),
-                               'Create sum Image', self)
+                               'Create stack Image (sum, mean ...)', self)
         
         self.stackAct.triggered.connect(self.StactF)
         
@@ -401,6 +489,12 @@ class SEE(QMainWindow):
         self.openActNewWin.triggered.connect(self.OpenFNewWin)
         self.fileMenu.addAction(self.openActNewWin)
 
+        self.watchAct = QAction(QtGui.QIcon(self.icon+"Open.png"),
+                                'Watch directory', self)
+        self.watchAct.setCheckable(True)
+        self.watchAct.triggered.connect(self.watchDir)
+        self.fileMenu.addAction(self.watchAct)
+
         self.saveAct = QAction(QtGui.QIcon(self.icon+"disketteSave.png"),
                                'Save file', self)
         
@@ -457,6 +551,15 @@ class SEE(QMainWindow):
         self.maxGraphBox.triggered.connect(self.Maxcross)
         self.AnalyseMenu.addAction(self.maxGraphBox)
 
+        self.perfBox = QAction('Performance overlay', self)
+        self.perfBox.setCheckable(True)
+        self.perfBox.setChecked(False)
+        self.perfBox.triggered.connect(self.perfOverlay)
+        self.AnalyseMenu.addAction(self.perfBox)
+        self.perfExportAct = QAction('Export timings...', self)
+        self.perfExportAct.triggered.connect(self.perfExport)
+        self.AnalyseMenu.addAction(self.perfExportAct)
+
         self.label_CrossValue = QLabel()
         self.label_CrossValue.setStyleSheet("font:13pt")
 
@@ -492,6 +595,17 @@ class SEE(QMainWindow):
         self.frameName.setAlignment(Qt.AlignmentFlag.AlignVCenter)
         self.statusBar.addPermanentWidget(self.labelFrameName)
         self.statusBar.addPermanentWidget(self.frameName)
+        self.labelDropped = QLabel()  # frames received but not displayed
+        self.labelDropped.setStyleSheet("font:8pt")
+        self.labelDropped.setMaximumHeight(30)
+        self.labelDropped.setToolTip('drop : frames received not displayed\n'
+                                     'lost : frames not saved / not sent to spectro')
+        self.statusBar.addPermanentWidget(self.labelDropped)
+        self.labelPerf = QLabel()  # performance overlay : fps, drop, p95 of the stages
+        self.labelPerf.setStyleSheet("font:8pt")
+        self.labelPerf.setMaximumHeight(30)
+        self.labelPerf.setVisible(False)
+        self.statusBar.addWidget(self.labelPerf)
 
         self.ImgFrame = QToolButton(self)
         self.icondata1 = self.icon+"data1.png"
@@ -607,7 +721,6 @@ class SEE(QMainWindow):
                 lambda: self.open_widget(self.winMath))
             
             self.ProcessMenu.addAction(self.mathButton)
-            self.winMath.emitApply.connect(self.newDataReceived)
 
         self.paletteupButton = QAction(QtGui.QIcon(self.icon+"user.png"),
                                        'Brightness +', self)
@@ -708,7 +821,6 @@ class SEE(QMainWindow):
 
         self.showMaxButton = QAction('Show max', self)
         self.showMaxButton.triggered.connect(self.ZoomMAX)
-        self.winZoomMax = ZOOM()
         self.AnalyseMenu.addAction(self.showMaxButton)
 
         self.flipButton = QAction(QtGui.QIcon(self.icon+"fliphorizontal.png"),
@@ -737,10 +849,15 @@ class SEE(QMainWindow):
         self.vbox2.setContentsMargins(0, 0, 0, 0)
 
         self.p1 = self.winImage.addPlot()
-        self.imh = pg.ImageItem()
+        self.imh = STATSIMAGEITEM()
         self.axeX = self.p1.getAxis('bottom')
         self.axeY = self.p1.getAxis('left')
         self.p1.addItem(self.imh)
+        # full resolution coordinates for the ROIs : imh can show a decimated level
+        self.imRef = pg.ImageItem()
+        self.imRef.setVisible(False)
+        self.p1.addItem(self.imRef, ignoreBounds=True)
+        self.p1.getViewBox().sigRangeChanged.connect(self.pyramidUpdate)
         self.p1.setMouseEnabled(x=False, y=False)
         self.p1.setContentsMargins(0, 0, 0, 0)
 
@@ -923,12 +1040,12 @@ class SEE(QMainWindow):
         '''
         self.open_widget(self.winEncercled)
         # if self.ite == "rect":
-        #     reduced = self.plotRect.getArrayRegion(self.data, self.imh)
+        #     reduced = self.plotRect.getArrayRegion(self.data, self.imRef)
         # elif self.ite == "cercle":
-        #     reduced = self.plotCercle.getArrayRegion(self.data, self.imh)
+        #     reduced = self.plotCercle.getArrayRegion(self.data, self.imRef)
         # else:
         #     self.Rectangle()
-        #     reduced = self.plotRect.getArrayRegion(self.data, self.imh)
+        #     reduced = self.plotRect.getArrayRegion(self.data, self.imRef)
         # self.winEncercled.Display(reduced)
         self.winEncercled.Display(self.data)
 
@@ -964,7 +1081,7 @@ class SEE(QMainWindow):
 
             self.plotRect.setPos([self.plotRect.pos()[0], 0])
 
-        self.cut = self.plotLine.getArrayRegion(self.data, self.imh)
+        self.cut = self.plotLine.getArrayRegion(self.data, self.imRef)
 
         if self.winPref.checkBoxAxeScale.isChecked() == 1:
             self.linePoints = self.plotLine.listPoints()
@@ -1011,7 +1128,7 @@ class SEE(QMainWindow):
     def RectChanged(self):
         '''Take ROI
         '''
-        self.cut = (self.plotRect.getArrayRegion(self.data, self.imh))
+        self.cut = (self.plotRect.getArrayRegion(self.data, self.imRef))
         self.xini=self.plotRect.pos()[0]
         self.yini=self.plotRect.pos()[1]
         if self.winPref.plotRectOpt.currentIndex() == 0:
@@ -1066,7 +1183,7 @@ class SEE(QMainWindow):
     def CercChanged(self):
         '''take ROIc
         '''
-        self.cut = (self.plotCercle.getArrayRegion(self.data, self.imh))
+        self.cut = (self.plotCercle.getArrayRegion(self.data, self.imRef))
         self.xini=self.plotCercle.pos()[0]
         self.yini=self.plotCercle.pos()[1]
         self.cut1 = self.cut.mean(axis=1)
@@ -1091,7 +1208,7 @@ class SEE(QMainWindow):
             self.p1.addItem(self.plotPentagon)
 
     def PentaChanged(self):
-        self.cut = (self.plotPentagon.getArrayRegion(self.data, self.imh))
+        self.cut = (self.plotPentagon.getArrayRegion(self.data, self.imRef))
         self.cut1 = self.cut.mean(axis=1)
         self.xini=self.plotPentagon.pos()[0]
         self.yini=self.plotPentagon.pos()[1]
@@ -1158,7 +1275,8 @@ class SEE(QMainWindow):
             img_PIL.save(str(nomFichier) + f'.{ext}', format=ext)
         else:
             ext = "txt"
-            np.savetxt(str(nomFichier)+'.{ext}', self.data)
+            # same orientation as SaveF : WinOption.loadBg rotates the text files back
+            np.savetxt(str(nomFichier)+f'.{ext}', np.rot90(self.data, 1))
 
         self.winOpt.loadBg(nomFichier + f'.{ext}')
 
@@ -1249,28 +1367,19 @@ class SEE(QMainWindow):
             self.open_widget(self.winFFT)
             self.winFFT.Display(self.data)
 
-    @pyqtSlot(object)
-    def Display(self, data):
-        #  display the data and refresh all the calculated things and plots
-        self.data = data
-        
+    def processParams(self):
+        '''
+        snapshot of the processing parameters for visu.pipeline.processFrame
+        (read in the GUI thread, the processing thread never read a widget)
+        '''
+        params = {'filter': self.filter, 'sigma': self.sigma,
+                  'threshold': self.threshold,
+                  'hotPixel': self.removeHP.isChecked()}
+
         if (self.checkBoxBg.isChecked() is True and
                 self.winOpt.dataBgExist is True):
             self.labelFrameName.setText('bg sub  on frame :')
-            try:
-                self.data = np.where( self.data - self.winOpt.dataBg > 0,  self.data - self.winOpt.dataBg, 0)
-            except Exception:
-                self.winOpt.dataBgExist = False
-                self.checkBoxBg.setChecked(False)
-                self.BackgroundF()
-                self.winOpt.fileBgBox.setText("bgfile not selected")
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Icon.Critical)
-                msg.setText("Background not soustracred !")
-                msg.setInformativeText("Background file error  ")
-                msg.setWindowTitle("Warning ...")
-                msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
-                msg.exec()
+            params['background'] = self.winOpt.dataBg
         elif (self.checkBoxBg.isChecked() is True 
               and self.winOpt.dataBgExist is False):
             self.winOpt.fileBgBox.setText("bgfile not selected")
@@ -1284,37 +1393,123 @@ class SEE(QMainWindow):
         else : 
             self.labelFrameName.setText('bgsub  off frame :')
 
-
-        # filtre
-        if self.filter == 'gauss':
-            self.data = gaussian_filter(self.data, self.sigma)
-            # print('gauss filter')
-        if self.filter == 'median':
-            self.data = median_filter(self.data, size=self.sigma)
-            # print('median filter')
-        if self.filter == 'threshold':  # 0 si sous le seuil
-            self.data = np.where(self.data < self.threshold, 0, self.data)
-        if self.removeHP.isChecked() is True:
-            # Remove hot pixel if data=data.max remplace by mean otherwise by data
-            self.data = np.where(self.data == self.data.max(), self.data.mean(), self.data)
-
         # fluence
         if self.winPref.checkBoxFluence.isChecked() == 1:  # fluence on
             energy = self.winPref.energy.value()
-            # print('energy',energy)
             if self.winPref.checkBoxAxeScale.isChecked() == 0:  # en pixel
                 size = 1  # self.sizeFluenceX*self.sizeFluenceY
                 self.labelValue = ' mJ/pixel2'
             if self.winPref.checkBoxAxeScale.isChecked() == 1:  # en micron
                 size = 1E-8*self.winPref.stepX*self.winPref.stepY
                 self.labelValue = ' mJ/cm2'
-
-            enrgTot = self.roiFluence.getArrayRegion(self.data, self.imh).sum()
-
-            self.data = 1000*(self.data*energy/enrgTot)/size  # (microJ/cm2)
-        # self.p1.setAspectLocked(True,ratio=1)
+            pos = self.roiFluence.pos()
+            roiSize = self.roiFluence.size()
+            params['fluence'] = (energy, size, (pos[0], pos[1], roiSize[0], roiSize[1]))
         else:
             self.labelValue = ''
+        return params
+
+    def Display(self, data):
+        #  display the data and refresh all the calculated things and plots
+        params = self.processParams()  # read once : may warn with a message box
+        result = processFrame(data, params, self.graph)
+        self.profiler.recordAll(result['timing'])
+        if self.spectro is True:
+            # deconvolve and publish to the diagServer with the shot number
+            with self.profiler.stage('spectro'):
+                self.winSpectro.process(result['data'], self.shotNumber())
+        if self.checkBoxAutoSave.isChecked():  # autosave data
+            # data already oriented : orientation only in the metadata
+            saveParams = dict(params, orient=(self.flipButton.isChecked(),
+                                              self.flipButtonVert.isChecked(),
+                                              self.winPref.rotateValue))
+            self.writer.submit(result['data'], *self.autoSaveArgs(saveParams))
+        self.showResult(result)
+
+    def processWorker(self, data, params):
+        '''
+        run in the processing thread (self.pipeline) for each frame received :
+        processing, publication of the spectrum and autosave
+        '''
+        result = self.workerGraph.run(data, params, newFrame=True)
+        self.profiler.recordAll(result['timing'])
+        spectro = None
+        if params.get('spectro', False):
+            with self.profiler.stage('spectro'):
+                spectro = self.winSpectro.process(result['data'], params['shotNumber'],
+                                                  params['spectroParams'])
+        if params.get('autoSave') is not None:
+            self.writer.submit(result['data'], *params['autoSave'])
+        if params.get('campaign') is not None:
+            path, layout, shot, name = params['campaign']
+            self.campaignWriter.submit(result['data'] if layout['frames'] else None,
+                                       path, layout, shot, name, spectro)
+            result['campaign'] = params['campaign']
+        with self.profiler.stage('stats'):
+            result['stats'] = FRAMESTATS(result['data'])
+        if max(result['data'].shape[:2]) > self.pyramidSize:
+            with self.profiler.stage('pyramid'):
+                result['pyramid'] = PYRAMID(result['data'])
+        result['frameNumber'] = params['frameNumber']
+        return result
+
+    @pyqtSlot()
+    def displayResult(self):
+        '''
+        display the last frame processed by self.pipeline
+        (frames processed while the GUI was busy are not displayed)
+        '''
+        result = self.pipeline.takeResult()
+        if result is None:
+            return
+        self.dataOrg = result['dataOrg']
+        self.dataOrgScale = self.dataOrg
+        self.dimy = np.shape(self.dataOrg)[1]
+        self.dimx = np.shape(self.dataOrg)[0]
+        self.displayedCampaign = result.get('campaign')
+        self.showResult(result)
+        self.frameName.setText(str(result['frameNumber']))
+        self.droppedUpdate()
+
+    def droppedUpdate(self):
+        # frames not displayed, not processed or not saved
+        text = f"drop {self.pipeline.dropped}" if self.pipeline.dropped > 0 else ''
+        lost = self.pipeline.lost + self.writer.rejected
+        if lost > 0:
+            text += f" lost {lost}"
+        if self.writer.failed > 0:
+            text += f" save error {self.writer.failed}"
+        if self.writer.pending > self.writer.maxQueued // 2:  # disk too slow
+            text += f" save queue {self.writer.pending}/{self.writer.maxQueued}"
+        if lost > 0 or self.writer.failed > 0:
+            self.labelDropped.setStyleSheet("font:8pt;color:red")
+        self.labelDropped.setText(text)
+
+    @pyqtSlot(str)
+    def autoSaveError(self, message):
+        self.fileName.setText('autosave error ' + message)
+        self.droppedUpdate()
+
+    def showResult(self, result):
+        # display a result of processFrame : image, plots and windows
+        with self.profiler.stage('display'):
+            self._showResult(result)
+        self.profiler.frame()
+
+    def _showResult(self, result):
+        if result['bgError'] is True:
+            self.winOpt.dataBgExist = False
+            self.checkBoxBg.setChecked(False)
+            self.BackgroundF()
+            self.winOpt.fileBgBox.setText("bgfile not selected")
+            msg = QMessageBox()
+            msg.setIcon(QMessageBox.Icon.Critical)
+            msg.setText("Background not soustracred !")
+            msg.setInformativeText("Background file error  ")
+            msg.setWindowTitle("Warning ...")
+            msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
+            msg.exec()
+        self.data = result['data']
 
         # color  and sacle
         if self.checkBoxScale.isChecked() == 1:  # color autoscale on
@@ -1330,115 +1525,201 @@ class SEE(QMainWindow):
                 self.axeX.setScale(1)
                 self.axeY.setScale(1)
                 self.axeX.showLabel(False)
-            self.imh.setImage(self.data, autoLevels=True, autoDownsample=True)
-        else:
-            self.imh.setImage(self.data, autoLevels=False, autoDownsample=True)
+        with self.profiler.stage('setImage'):
+            self.showImage(result)
 
         # update
         self.Coupe()  # self.PlotXY() # graph update
         self.zoomRectupdate()  # update zoom rect
 
         if self.encercled is True:
-            if self.winEncercled.isWinOpen is True:
+            if self.winIsOpen('winEncercled'):
                 # self.signalEng.emit(self.data)
                 
                 # select the data in the corresponding ROI or the full image
                 if self.ite == "rect":
-                    reduced = self.plotRect.getArrayRegion(self.data, self.imh)
+                    reduced = self.plotRect.getArrayRegion(self.data, self.imRef)
                 elif self.ite == "cercle":
-                    reduced = self.plotCercle.getArrayRegion(self.data, self.imh)
+                    reduced = self.plotCercle.getArrayRegion(self.data, self.imRef)
                 else:
                     # self.Rectangle()
-                    # reduced = self.plotRect.getArrayRegion(self.data, self.imh)
+                    # reduced = self.plotRect.getArrayRegion(self.data, self.imRef)
                     reduced = self.data
                 # print(f"reduced shape = {reduced.shape}")
-                self.signalEng.emit(reduced)
+                with self.profiler.stage('encercled'):
+                    self.signalEng.emit(reduced)
                 # self.winEncercled.Display(reduced) ## energy update
 
-        if self.winCoupe.isWinOpen is True:
-            if self.ite == 'line':
-                self.LigneChanged()
-                self.CUT()
-            if self.ite == 'rect':
-                self.RectChanged()
-                self.CUT()
-            if self.ite == 'cercle':
-                self.CercChanged()
-
-        if self.meas is True:
-            if self.winM.isWinOpen is True:  # measurement update
+        if self.winIsOpen('winCoupe'):
+            with self.profiler.stage('cut'):
+                if self.ite == 'line':
+                    self.LigneChanged()
+                    self.CUT()
                 if self.ite == 'rect':
                     self.RectChanged()
-                    self.Measurement()
-                elif self.ite == 'cercle':
+                    self.CUT()
+                if self.ite == 'cercle':
                     self.CercChanged()
-                    self.Measurement()
-                elif self.ite == 'pentagon':
-                    self.PentaChanged()
-                    self.Measurement()
-                else:
-                    self.Measurement()
+
+        if self.meas is True:
+            if self.winIsOpen('winM'):  # measurement update
+                with self.profiler.stage('Measurement'):
+                    if self.ite == 'rect':
+                        self.RectChanged()
+                        self.Measurement()
+                    elif self.ite == 'cercle':
+                        self.CercChanged()
+                        self.Measurement()
+                    elif self.ite == 'pentagon':
+                        self.PentaChanged()
+                        self.Measurement()
+                    else:
+                        self.Measurement()
 
         if self.fft is True:
-            if self.winFFT.isWinOpen is True:  # fft update
-                self.winFFT.Display(self.data)
+            if self.winIsOpen('winFFT'):  # fft update
+                with self.profiler.stage('FFT'):
+                    self.winFFT.Display(self.data)
 
         # if self.plot3D is True:
         #     if self.Widget3D.isWinOpen==True:
         #         self.Graph3D()
-        if self.winPointing.isWinOpen is True:
-            self.Pointing()
-        if self.winZoomMax.isWinOpen is True:
+        if self.winIsOpen('winPointing'):
+            with self.profiler.stage('Pointing'):
+                self.Pointing()
+        if self.winIsOpen('winZoomMax'):
             self.ZoomMAX()
-        if self.winCrop.isWinOpen is True:
+        if self.winIsOpen('winCrop'):
             # print('emit new crop image')
-            self.signalCrop.emit(self.cropImg)
-        if self.spectro is True: 
-            #if self.winSpectro.isWinOpen is True:
-            self.signalSpectro.emit(self.data)
-            temp_shotnumber = -1
-            self.temp_dataArray = [self.data, temp_shotnumber]
-            self.signalSpectroList.emit(self.temp_dataArray)
-
+            with self.profiler.stage('crop'):
+                self.signalCrop.emit(self.cropImg)
         self.signalDisplayed.emit(True)
-        
-        #  autosave
-        if self.checkBoxAutoSave.isChecked():  # autosave data
-            
-            self.pathAutoSave = str(self.conf.value(self.name+'/pathAutoSave'))
-            self.fileNameSave = str(self.conf.value(self.name+'/nameFile'))
-            date = time.strftime("%Y_%m_%d_%H_%M_%S")
-            self.numTir = int(self.conf.value(self.name+'/tirNumber'))
-            # if self.numTir < 10:
-            #     num = "00"+ str(self.numTir)
-            # elif 9<self.numTir<100:
-            #     num = "0" + str(self.numTir)
-            # else:
-            # num = str(self.numTir)
-            num = "%04i" % self.numTir
-            if self.winOpt.checkBoxDate.isChecked():  # add the date
-                # nomFichier = str(str(self.pathAutoSave) + '/' + self.fileNameSave + '_' + num+'_' + date)
-                nomFichier = f"{self.pathAutoSave}/{self.fileNameSave}_{num}_{date}"
-            else:
-                # nomFichier = str(str(self.pathAutoSave) + '/' + self.fileNameSave + '_'+num)
-                nomFichier = f"{self.pathAutoSave}/{self.fileNameSave}_{num}"
-                #print(nomFichier)
-
-            print(nomFichier, 'saved')
-            if self.winOpt.checkBoxTiff.isChecked():  # save as tiff
-                self.dataS = np.rot90(self.data, 1)
-                img_PIL = Image.fromarray(self.dataS)
-                img_PIL.save(str(nomFichier) + '.TIFF', format='TIFF')
-            else:
-                np.savetxt(str(nomFichier)+'.txt', self.data)
 
-            if not self.winOpt.checkBoxServer.isChecked():  
-                # if not connected to server we had +1
-                self.numTir += 1
-                self.winOpt.setTirNumber(self.numTir)
+    def showImage(self, result):
+        '''
+        self.data in imh. The large frames are displayed from a pyramid (built by
+        the processing thread or here) : level matching the zoom, imh scaled to the
+        frame coordinates. Colour levels and histogram from the frame statistics
+        (subsample) shared with the palette shortcuts
+        '''
+        stats = result.get('stats')
+        if stats is None:
+            with self.profiler.stage('stats'):
+                stats = FRAMESTATS(self.data)
+        self.stats = stats
+        self.imh.stats = stats
+        pyramid = result.get('pyramid')
+        if pyramid is None and max(self.data.shape[:2]) > self.pyramidSize:
+            with self.profiler.stage('pyramid'):
+                pyramid = PYRAMID(self.data)
+        self.pyramid = pyramid
+        if pyramid is None:
+            self.pyramidLevel = 0
+            image = self.data
+        else:
+            self.pyramidLevel = pyramid.select(self.viewPixelSize())
+            image = pyramid.images[self.pyramidLevel]
+        if self.checkBoxScale.isChecked():
+            self.imh.setImage(image, levels=self.autoLevels(), autoLevels=False, autoDownsample=True)
+        else:
+            self.imh.setImage(image, autoLevels=False, autoDownsample=True)
+        if pyramid is None:
+            self.imh.setRect()
+        else:
+            self.imh.setRect(*pyramid.rect(self.pyramidLevel))
+
+    def frameStats(self):
+        # statistics of the frame displayed (computed if no frame was displayed yet)
+        if self.stats is None:
+            self.stats = FRAMESTATS(self.data)
+        return self.stats
+
+    def autoLevels(self):
+        # colour levels of the auto scale : min / max or percentiles (hot pixels)
+        return self.frameStats().levels(robust=self.winPref.checkBoxRobustLevels.isChecked())
+
+    def viewPixelSize(self):
+        # frame pixels per screen pixel (0 if the view is not shown yet)
+        size = min(self.p1.getViewBox().viewPixelSize())
+        return size if np.isfinite(size) else 0
+
+    def pyramidUpdate(self):
+        # zoom changed (zoom rect, resize...) : level of the pyramid for this zoom
+        if self.pyramid is None:
+            return
+        k = self.pyramid.select(self.viewPixelSize())
+        if k != self.pyramidLevel:
+            self.pyramidLevel = k
+            self.imh.setImage(self.pyramid.images[k], autoLevels=False, autoDownsample=True)
+            self.imh.setRect(*self.pyramid.rect(k))
+
+    def autoSaveName(self):
+        '''
+        name of the next autosave file (without extension), increment the shot number
+        read the option window (not the ini file) : called at each shot
+        '''
+        self.pathAutoSave = self.winOpt.pathBox.text()
+        self.fileNameSave = self.winOpt.nameBox.text()
+        date = time.strftime("%Y_%m_%d_%H_%M_%S")
+        self.numTir = self.winOpt.tirNumberBox.value()
+        num = "%04i" % self.numTir
+        if self.winOpt.checkBoxDate.isChecked():  # add the date
+            nomFichier = f"{self.pathAutoSave}/{self.fileNameSave}_{num}_{date}"
+        else:
+            nomFichier = f"{self.pathAutoSave}/{self.fileNameSave}_{num}"
+
+        if not self.winOpt.checkBoxServer.isChecked():  
+            # if not connected to server we had +1
+            self.numTir += 1
+            self.winOpt.setTirNumber(self.numTir)  # saved in the ini file by the option window
 
-            self.conf.setValue(self.name+"/tirNumber", self.numTir)
-            self.fileName.setText(nomFichier)
+        self.fileName.setText(nomFichier)
+        return nomFichier
+
+    def autoSaveArgs(self, params):
+        '''
+        arguments of visu.frameStore.saveFrame for the next autosave :
+        name, format, metadata of the shot, run (files common to the shots), compression
+        '''
+        nomFichier = self.autoSaveName()
+        roi = {'type': self.ite}
+        if self.ite in ('rect', 'cercle'):
+            item = self.plotRect if self.ite == 'rect' else self.plotCercle
+            roi['pos'] = [float(item.pos()[0]), float(item.pos()[1])]
+            roi['size'] = [float(item.size()[0]), float(item.size()[1])]
+        meta = {'shotNumber': params.get('shotNumber', self.shotNumber()),
+                'frameNumber': params.get('frameNumber', self.frameNumber),
+                'timestamp': time.time(),
+                'filter': params.get('filter'),
+                'sigma': params.get('sigma'),
+                'threshold': params.get('threshold'),
+                'hotPixel': params.get('hotPixel'),
+                'background': (self.winOpt.fileBgBox.text()
+                               if params.get('background') is not None else None),
+                'orientation': (ORIENTATION.of(*params['orient']).toDict()
+                                if params.get('orient') is not None else None),
+                'fluence': params.get('fluence'),
+                'roi': roi}
+        return (nomFichier, self.winOpt.autoSaveFormat(), meta,
+                f"{self.pathAutoSave}/{self.fileNameSave}",
+                self.winOpt.checkBoxCompress.isChecked())
+
+    def campaignArgs(self, params):
+        '''
+        arguments of visu.campaignStore.writeShot for the shot : campaign file of
+        the run, layout if it is created, shot number, name of the autosave file
+        '''
+        nomFichier, fmt, meta, run, compression = params['autoSave']
+        layout = {'frames': self.winOpt.checkBoxCampaignFrames.isChecked(),
+                  'energySize': (self.winSpectro.deconvolved_spectrum.energy.size
+                                 if params.get('spectro', False) else None)}
+        return (run + '_campaign.h5', layout, meta['shotNumber'], os.path.basename(nomFichier))
+
+    def campaignMeasurement(self, values):
+        # measurements (visu.winMeas) of the frame displayed to its campaign file
+        if self.displayedCampaign is not None:
+            path, layout, shot, name = self.displayedCampaign
+            self.campaignWriter.submit(None, path, layout, shot, None, {'measurement': values})
 
     def mouseClick(self, evt):  # block the cross or allow to print mousse value if mousse button clicked
 
@@ -1523,18 +1804,9 @@ class SEE(QMainWindow):
         """
             Determine full-with-half-maximum of
               a peaked set of points, x and y.
+            (spline, see visu.crossSection)
         """
-        y = gaussian_filter(y, 5)  # filtre for reducing noise
-        half_max = np.amax(y)/2.0
-        s = splrep(x, y - half_max, k=order)  # F
-        roots = sproot(s)  # Given the knots .
-        if len(roots) > 2:
-            pass
-
-        elif len(roots) < 2:
-            pass
-        else:
-            return np.around(abs(roots[1] - roots[0]), decimals=2)
+        return fwhmSpline(x, y, order)
 
     def Maxcross(self):
         if self.maxGraphBox.isChecked():
@@ -1556,30 +1828,34 @@ class SEE(QMainWindow):
             except:
                 pass
 
+    @profiled('Coupe')
     def Coupe(self):
         '''make  plot profile on cross update when display new image or cross moved
         '''
 
         if self.maxGraphBox.isChecked():
             # Set another cross on the maximum in green
-            if self.ite == 'rect':
-                dataforMax = (self.plotRect.getArrayRegion(self.data, self.imh))
-                x = self.plotRect.pos()[0]
-                y = self.plotRect.pos()[1]
-            elif self.ite == 'cercle':
-                dataforMax = (self.plotCercle.getArrayRegion(self.data, self.imh))
-                x = self.plotCercle.pos()[0]
-                y = self.plotCercle.pos()[1]
-                dataforMax = (self.plotPenta.getArrayRegion(self.data, self.imh))
-                x = self.plotPentagon.pos()[0]
-                y = self.plotPentagon.pos()[1]
+            roi = {'rect': 'plotRect', 'cercle': 'plotCercle',
+                   'pentagon': 'plotPentagon'}.get(self.ite)
+            roi = getattr(self, roi) if roi is not None else None
+            if roi is not None:
+                key = (self.ite, tuple(roi.pos()), tuple(roi.size()))
             else:
-                dataforMax = self.data
-                x = 0
-                y = 0
-            (self.xcMax, self.ycMax) = np.unravel_index(dataforMax.argmax(), dataforMax.shape)  # take the max ndimage.measurements.center_of_mass(dataF)#
-            self.xcMax = round(self.xcMax + x, 0)
-            self.ycMax = round(self.ycMax + y, 0)
+                key = None
+
+            def maxPosition():
+                if roi is not None:
+                    dataforMax = roi.getArrayRegion(self.data, self.imRef)
+                    x = roi.pos()[0]
+                    y = roi.pos()[1]
+                else:
+                    dataforMax = self.data
+                    x = 0
+                    y = 0
+                (xcMax, ycMax) = np.unravel_index(dataforMax.argmax(), dataforMax.shape)  # take the max ndimage.measurements.center_of_mass(dataF)#
+                return round(xcMax + x, 0), round(ycMax + y, 0)
+            # argmax only if the data or the roi changed (not when the cross moves)
+            (self.xcMax, self.ycMax) = self.cutState.maximum(self.data, key, maxPosition)
             self.vLineCrossMax.setPos(self.xcMax)
             self.hLineCrossMax.setPos(self.ycMax)
             self.labelCmax.setText("(%s,%s)=%s" % (str(self.xcMax), str(self.ycMax), str(round(self.data[int(self.xcMax), int(self.ycMax)], 1))))
@@ -1599,8 +1875,8 @@ class SEE(QMainWindow):
                 coupeX = np.zeros(int(self.dimy))
                 coupeY = np.zeros(int(self.dimx)).T
 
-            xxx = np.arange(0, int(self.dimx), 1)
-            yyy = np.arange(0, int(self.dimy), 1)
+            xxx = self.cutState.axis(len(coupeY))
+            yyy = self.cutState.axis(len(coupeX))
             coupeXMax = np.max(coupeX)
             coupeYMax = np.max(coupeY)
 
@@ -1633,12 +1909,10 @@ class SEE(QMainWindow):
             # fwhm on the  X et Y curves if max  >20 counts if checked in winOpt
 
             if self.winPref.checkBoxFwhm.isChecked():  # show fwhm values on graph
+                accurate = self.winPref.checkBoxFwhmSpline.isChecked()  # spline
                 xCXmax = np.amax(coupeXnorm)  # max
                 if xCXmax > 20:
-                    try:
-                        fwhmX = self.fwhm(yyy, coupeXnorm, order=3)
-                    except:
-                        fwhmX = None
+                    fwhmX = self.cutState.fwhm(yyy, coupeXnorm, accurate)
                     if fwhmX is None:
                         self.textX.setText('')
                     else:
@@ -1653,10 +1927,7 @@ class SEE(QMainWindow):
                 yCYmax = np.amax(coupeYnorm)  # max
 
                 if yCYmax > 20:
-                    try:
-                        fwhmY = self.fwhm(xxx, coupeYnorm, order=3)
-                    except:
-                        fwhmY = None
+                    fwhmY = self.cutState.fwhm(xxx, coupeYnorm, accurate)
                     xCYmax = xxx[coupeYnorm.argmax()]
                     if fwhmY is None:
                         self.textY.setText('', color='w')
@@ -1719,8 +1990,8 @@ class SEE(QMainWindow):
         # change the color scale
         levels = self.imh.getLevels()
         if levels[0] is None:
-            xmax = self.data.max()
-            xmin = self.data.min()
+            xmax = self.frameStats().max
+            xmin = self.frameStats().min
         else:
             xmax = levels[1]
             xmin = levels[0]
@@ -1733,8 +2004,8 @@ class SEE(QMainWindow):
 
         levels = self.imh.getLevels()
         if levels[0] is None:
-            xmax = self.data.max()
-            xmin = self.data.min()
+            xmax = self.frameStats().max
+            xmin = self.frameStats().min
         else:
             xmax = levels[1]
             xmin = levels[0]
@@ -1745,22 +2016,18 @@ class SEE(QMainWindow):
 
     def paletteauto(self):
 
-        xmax = self.data.max()
-        xmin = self.data.min()
-        if xmax == xmin:
-            xmax = xmin+1
+        xmin, xmax = self.autoLevels()
 
         self.imh.setLevels([xmin, xmax])
         self.hist.setHistogramRange(xmin, xmax)
 
     def contrast(self):
         if self.ite == 'rect':
-            self.cont = (self.plotRect.getArrayRegion(self.data, self.imh))
+            self.cont = (self.plotRect.getArrayRegion(self.data, self.imRef))
             xmax = self.cont.max()
             xmin = self.cont.min()
         else:
-            xmax = self.data.max()
-            xmin = self.data.min()
+            xmax = self.frameStats().max
         xmin = 0.05*xmax
         xmax = 0.95*xmax
         self.imh.setLevels([xmin, xmax])
@@ -1776,8 +2043,8 @@ class SEE(QMainWindow):
         
         levels = self.imh.getLevels()
         if levels[0] is None:
-            xmax = self.data.max()
-            xmin = self.data.min()
+            xmax = self.frameStats().max
+            xmin = self.frameStats().min
         else:
             xmax = round(levels[1],2)
             xmin = round(levels[0],2)
@@ -1820,14 +2087,13 @@ class SEE(QMainWindow):
     def Streaming(self):
         pass
 
-    def updateServer(self):
-        data = {
-            "state": "running", 
-            "shotNumber":0, 
-            "data":self.winSpectro.data_dict,
-            "name":"spectrum"
-        }
-        self.serv.setData(data)
+    def shotNumber(self):
+        '''shot number of the frame : from the shot server if connected
+        else the frame number
+        '''
+        if self.winOpt.checkBoxServer.isChecked():
+            return int(self.winOpt.tirNumberBox.value())
+        return self.frameNumber
 
     def roiChanged(self):
 
@@ -1869,7 +2135,7 @@ class SEE(QMainWindow):
         if ok:
             self.sigma = sigma
             self.menuFilter.setTitle('F: Gaussian')
-            self.Display(self.data)
+            self.Display(self.dataOrg)
 
     def Median(self):
         '''median  filter
@@ -1879,7 +2145,7 @@ class SEE(QMainWindow):
         if ok:
             self.sigma = sigma
             self.menuFilter.setTitle('F: Median')
-            self.Display(self.data)
+            self.Display(self.dataOrg)
 
     def Threshold(self):
         self.filter = 'threshold'
@@ -1887,7 +2153,7 @@ class SEE(QMainWindow):
         if ok:
             self.threshold = threshold
             self.menuFilter.setTitle('F: Threshold')
-            self.Display(self.data)
+            self.Display(self.dataOrg)
 
     def Orig(self):
         """
@@ -1899,14 +2165,40 @@ class SEE(QMainWindow):
         self.menuFilter.setTitle('Filters')
         # print('original data')
 
-    def OpenF(self, fileOpen=False):
+    def openFile(self, fichier):
+        '''
+        IMAGEFILE of fichier (visu.imageReader), None and a message if it can not be read
+        '''
+        try:
+            return openImage(fichier)
+        except Exception as e:
+            msg = QMessageBox()
+            msg.setIcon(QMessageBox.Icon.Critical)
+            msg.setText("Wrong file format !")
+            msg.setInformativeText("The format of the file must be : %s \n%s" % (' '.join(extensions()), e))
+            msg.setWindowTitle("Warning ...")
+            msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
+            msg.exec()
+            return None
+
+    def readFile(self, fichier):
+        # first frame of fichier, None if it can not be read
+        images = self.openFile(fichier)
+        if images is None:
+            return None
+        with images:
+            return images[0]
+
+    def OpenF(self, fileOpen=False, inList=False):
         # open file in txt spe TIFF sif jpeg png  format
+        # inList : file of a list browsed with the slider (otherwise the slider
+        # browses the frames of the file if it has several ones : SPE ...)
         fileOpen = fileOpen
 
         if fileOpen is False:
 
             chemin = self.conf.value(self.name+"/path")
-            fname = QFileDialog.getOpenFileNames(self, "Open File", chemin, "Images (*.txt *.spe *.TIFF *.sif *.tif);;Text File(*.txt);;Ropper File (*.SPE);;Andor File(*.sif);; TIFF file(*.TIFF)")
+            fname = QFileDialog.getOpenFileNames(self, "Open File", chemin, fileFilter())
             self.openedFiles = fname[0]
 
             self.nbOpenedImage = len(self.openedFiles)
@@ -1917,38 +2209,20 @@ class SEE(QMainWindow):
 
             if self.nbOpenedImage > 1:
                 fichier = self.openedFiles[0]
-                self.sliderImage.setMinimum(0)
-                self.sliderImage.setMaximum(self.nbOpenedImage - 1)
-                self.sliderImage.setValue(0)
-                self.sliderImage.setEnabled(True)
+                self.setFileList(self.openedFiles)  # the slider browses the files
+                inList = True
         else:
             fichier = str(fileOpen)
 
-        ext = os.path.splitext(fichier)[1]
-
-        if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
-        elif ext == '.spe' or ext == '.SPE':  # SPE file
-            dataSPE = SpeFile(fichier)
-            data1 = dataSPE.data[0]  # .transpose() # first frame
-            data = data1  # np.flipud(data1)
-        elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-            dat = Image.open(fichier)
-            data = np.array(dat)
-            data = np.rot90(data, 3)
-        elif ext == '.sif':
-            sifop = SifFile()
-            im = sifop.openA(fichier)
-            data = np.rot90(im, 3)
-#            self.data = self.data[250:495,:]
+        images = self.openFile(fichier)
+        if images is None:
+            return
+        data = images[0]
+        if inList:
+            self.setFrames(None)
+            images.close()
         else:
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Icon.Critical)
-            msg.setText("Wrong file format !")
-            msg.setInformativeText("The format of the file must be : .SPE  .TIFF .sif  png jpeg or .txt ")
-            msg.setWindowTitle("Warning ...")
-            msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
-            msg.exec_()
+            self.setFrames(images)
 
         chemin = os.path.dirname(fichier)
         self.conf.setValue(self.name+"/path", chemin)
@@ -1961,100 +2235,177 @@ class SEE(QMainWindow):
         self.winHistory.Display(fichier)
 
         self.newDataReceived(data)
-        return self.data
+        return data
     
     def StactF(self) :
-
+        # sum (mean, median, max) of files read in a thread (visu.stackAccum)
+        if self.stackThread is not None:
+            return
         chemin = self.conf.value(self.name+"/path")
-        fname = QFileDialog.getOpenFileNames(self, "Open Multi files", chemin, "Images (*.txt *.spe *.TIFF *.sif *.tif);;Text File(*.txt);;Ropper File (*.SPE);;Andor File(*.sif);; TIFF file(*.TIFF)")
-        self.openedFiles = fname[0]
-        self.nbOpenedImage = len(self.openedFiles)
-        
-        datS = []
-        
-        for i in range (0,self.nbOpenedImage):
-            fichier = self.openedFiles[i]
-            ext = os.path.splitext(fichier)[1]
-            if ext == '.txt':  # text file
-                data = np.loadtxt(str(fichier))
-            elif ext == '.spe' or ext == '.SPE':  # SPE file
-                dataSPE = SpeFile(fichier)
-                data1 = dataSPE.data[0]  # .transpose() # first frame
-                data = data1  # np.flipud(data1)
-            elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-                dat = Image.open(fichier)
-                data = np.array(dat)
-                data = np.rot90(data, 3)
-            elif ext == '.sif':
-                sifop = SifFile()
-                im = sifop.openA(fichier)
-                data = np.rot90(im, 3)
-    #            self.data = self.data[250:495,:]
-            else:
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Icon.Critical)
-                msg.setText("Wrong file format !")
-                msg.setInformativeText("The format of the file must be : .SPE  .TIFF .sif  png jpeg or .txt ")
-                msg.setWindowTitle("Warning ...")
-                msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
-                msg.exec_()
-        
-            datS.append(data)
-        
-        datS = np.array(datS) 
-        chemin = os.path.dirname(fichier)
-        self.conf.setValue(self.name+"/path", chemin)
+        fname = QFileDialog.getOpenFileNames(self, "Open Multi files", chemin, fileFilter())
+        files = fname[0]
+        if not files:
+            return
+        mode = self.conf.value(self.name+"/stackMode", 'sum')
+        mode, ok = QInputDialog.getItem(self, 'Stack', 'Stack of %i files :' % len(files), MODES,
+                                        MODES.index(mode) if mode in MODES else 0, False)
+        if not ok:
+            return
+        self.conf.setValue(self.name+"/stackMode", mode)
+        fichier = files[-1]
+        self.conf.setValue(self.name+"/path", os.path.dirname(fichier))
         self.conf.setValue(self.name+"/lastFichier", os.path.split(fichier)[1])
-        self.data = datS.sum(axis=0)
+
+        self.stackProgress = QProgressDialog('Stack (%s) of %i files' % (mode, len(files)), 'Cancel',
+                                             0, len(files), self)
+        self.stackProgress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.stackProgress.setMinimumDuration(500)
+        self.stackThread = STACKTHREAD(files, mode)
+        self.stackThread.progress.connect(self.stackProgress.setValue)
+        self.stackProgress.canceled.connect(self.stackThread.stop)
+        self.stackThread.finished.connect(self.stackFinished)
+        self.stackThread.start()
+
+    def stackFinished(self):
+        thread, self.stackThread = self.stackThread, None
+        self.stackProgress.reset()
+        acc = thread.acc
+        if thread.error is not None or acc is None or acc.count == 0:
+            msg = QMessageBox()
+            msg.setIcon(QMessageBox.Icon.Critical)
+            msg.setText("Stack not done !")
+            msg.setInformativeText(str(thread.error) if thread.error is not None else 'no file read')
+            msg.setWindowTitle("Warning ...")
+            msg.exec()
+            return
+        self.setFrames(None)
+        self.data = acc.result()
+        text = 'stack %s of %i files' % (acc.mode, acc.count)
+        if acc.skipped:
+            text += ' (%i not read)' % len(acc.skipped)
+        if thread.cancel.is_set():
+            text += ' (canceled)'
+        print(text)
         self.newDataReceived(self.data)
+        self.fileName.setText(text)
 
 
     def OpenFNewWin(self):
 
         chemin = self.conf.value(self.name+"/path")
-        fname = QFileDialog.getOpenFileNames(self, "Open File", chemin, "Images (*.txt *.spe *.TIFF *.sif *.tif);;Text File(*.txt);;Ropper File (*.SPE);;Andor File(*.sif);; TIFF file(*.TIFF)")
+        fname = QFileDialog.getOpenFileNames(self, "Open File", chemin, fileFilter())
         self.openedFiles = fname[0]
         fichier = self.openedFiles[0]
-        ext = os.path.splitext(fichier)[1]
-
-        if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
-        elif ext == '.spe' or ext == '.SPE':  # SPE file
-            dataSPE = SpeFile(fichier)
-            data1 = dataSPE.data[0]  # .transpose() # first frame
-            data = data1  # np.flipud(data1)
-        elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-            dat = Image.open(fichier)
-            data = np.array(dat)
-            data = np.rot90(data, 3)
-        elif ext == '.sif':
-            sifop = SifFile()
-            im = sifop.openA(fichier)
-            data = np.rot90(im, 3)
-#            self.data = self.data[250:495,:]
-        else:
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Icon.Critical)
-            msg.setText("Wrong file format !")
-            msg.setInformativeText("The format of the file must be : .SPE  .TIFF .sif  png jpeg or .txt ")
-            msg.setWindowTitle("Warning ...")
-            msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
-            msg.exec_()
+        data = self.readFile(fichier)
+        if data is None:
+            return
 
         chemin = os.path.dirname(fichier)
         self.conf.setValue(self.name+"/path", chemin)
         self.conf.setValue(self.name+"/lastFichier", os.path.split(fichier)[1])
         print('Open file  :  ', fichier)
 
+        from visu.visualLight import SEELIGHT
         self.newWindow = SEELIGHT(conf=self.conf, name=self.name)
         self.open_widget(self.newWindow)
         self.newWindow.setWindowTitle(fichier)
         self.newWindow.newDataReceived(data)
 
+    def setFrames(self, images):
+        '''
+        slider on the frames of images (visu.imageReader.IMAGEFILE) if it has
+        several frames, otherwise images is closed
+        '''
+        browsing = self.openedFrames is not None
+        if browsing:
+            self.openedFrames.close()
+            self.openedFrames = None
+        if images is not None and len(images) > 1:
+            self.openedFrames = images
+            self.sliderImage.blockSignals(True)
+            self.sliderImage.setMinimum(0)
+            self.sliderImage.setMaximum(len(images) - 1)
+            self.sliderImage.setValue(0)
+            self.sliderImage.blockSignals(False)
+            self.sliderImage.setEnabled(True)
+            return
+        if images is not None:
+            images.close()
+            if browsing:
+                self.sliderImage.setEnabled(False)
+
+    def watchDir(self, checked):
+        # live viewer of the files written in a directory (visu.dirWatch)
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.watchAct.setText('Watch directory')
+        if not checked:
+            return
+        chemin = self.conf.value(self.name+"/watchPath", self.conf.value(self.name+"/path"))
+        directory = QFileDialog.getExistingDirectory(self, "Watch directory", chemin)
+        if not directory:
+            self.watchAct.setChecked(False)
+            return
+        self.conf.setValue(self.name+"/watchPath", directory)
+        # watchPoll true : scan of the directory (NAS mounted by NFS / SMB)
+        poll = str(self.conf.value(self.name+"/watchPoll", 'false')) == 'true'
+        self.watcher = DIRWATCHER(directory, poll=poll,
+                                  settle=float(self.conf.value(self.name+"/watchSettle", 0.3)))
+        self.watcher.newFrame.connect(self.watchFrame)
+        self.watcher.start()
+        self.watchAct.setText('Watch : %s' % directory)
+
+    def watchFrame(self, data, shot, fichier):
+        # new file of the directory watched
+        self.setFrames(None)
+        self.fileName.setText(str(fichier))
+        self.nomFichier = os.path.split(fichier)[1]
+        self.newDataReceived(data, shotNumber=shot)
+
+    def setFileList(self, files):
+        '''
+        the slider browses the files, read by self.fileCache (visu.frameCache)
+        '''
+        self.setFrames(None)
+        self.openedFiles = files
+        self.nbOpenedImage = len(files)
+        self.sliderIndex = 0
+        self.sliderImage.blockSignals(True)
+        self.sliderImage.setMinimum(0)
+        self.sliderImage.setMaximum(len(files) - 1)
+        self.sliderImage.setValue(0)
+        self.sliderImage.blockSignals(False)
+        self.sliderImage.setEnabled(True)
+        self.fileCache.prefetch(files[1:1 + self.prefetchCount])
+
+    def browseFile(self, n):
+        # file n of the list : from the cache, then the next ones in the
+        # direction of the slider (and the previous one) are prefetched
+        fichier = self.openedFiles[n]
+        try:
+            data = self.fileCache.get(fichier)
+        except Exception:
+            self.OpenF(fileOpen=fichier, inList=True)  # message of the reader
+            return
+        step = 1 if n >= self.sliderIndex else -1
+        self.sliderIndex = n
+        near = [n + step * k for k in range(1, self.prefetchCount + 1)] + [n - step]
+        self.fileCache.prefetch([self.openedFiles[i] for i in near if 0 <= i < len(self.openedFiles)])
+        self.fileName.setText(str(fichier))
+        self.nomFichier = os.path.split(fichier)[1]
+        self.newDataReceived(data)
+
     def SliderImgFct(self):  # open multiimage
 
         nbImgToOpen = int(self.sliderImage.value())
-        self.OpenF(fileOpen=self.openedFiles[nbImgToOpen])
+        if self.openedFrames is not None:  # frame of the file opened (SPE ...)
+            data = self.openedFrames[nbImgToOpen]
+            self.fileName.setText('%s  frame %i/%i' % (self.openedFrames.path, nbImgToOpen,
+                                                     len(self.openedFrames)))
+            self.newDataReceived(data)
+            return
+        self.browseFile(nbImgToOpen)
 
     def SaveF(self):
         # save data  in TIFF or Text  files
@@ -2087,31 +2438,32 @@ class SEE(QMainWindow):
             self.fileName.setText(fname[0]+str(ext))
 
     @pyqtSlot(object)
-    def newDataReceived(self, data):
+    def newDataReceived(self, data, shotNumber=None):
         '''
             Do display and save origin data when new Displadata signal is  sent to  visu
+            shotNumber : of the frame if known (file watched), otherwise self.shotNumber()
+            data is copied : the caller (camera) can refill its buffer at once
         '''
-        self.data = data
         self.ImgFrame.animateClick()  # change icon data when receive image
-        if self.flipButton.isChecked() == 1 and self.flipButtonVert.isChecked() == 1:
-            self.data = np.flipud(self.data)
-            self.data = np.fliplr(self.data)
-        elif self.flipButton.isChecked() == 1:
-            self.data = np.flipud(self.data)
-        elif self.flipButtonVert.isChecked() == 1:
-            self.data = np.fliplr(self.data)
-        else:
-            self.data = data
-
-        self.data = np.rot90(self.data, self.winPref.rotateValue)
-        self.dimy = np.shape(self.data)[1]
-        self.dimx = np.shape(self.data)[0]
-        self.dataOrgScale = self.data
-        self.dataOrg = self.data
-
-        self.updateServer()
-        self.Display(self.data)
-        self.frameName.setText(str(self.frameNumber))
+        data = np.array(data, copy=True)  # processed later in self.pipeline
+        # processing is done by self.pipeline, displayed by displayResult
+        params = self.processParams()
+        params['orient'] = (self.flipButton.isChecked(),
+                            self.flipButtonVert.isChecked(),
+                            self.winPref.rotateValue)
+        params['spectro'] = self.spectro is True
+        if params['spectro']:
+            # window created here in the GUI thread, its controls read for processWorker
+            params['spectroParams'] = self.winSpectro.processParams()
+        params['shotNumber'] = self.shotNumber() if shotNumber is None else shotNumber
+        params['frameNumber'] = self.frameNumber
+        if self.checkBoxAutoSave.isChecked():  # autosave data
+            params['autoSave'] = self.autoSaveArgs(params)
+            if self.winOpt.checkBoxCampaign.isChecked():
+                params['campaign'] = self.campaignArgs(params)
+        # autosave and spectro need all the frames, display only the last one
+        self.pipeline.submit(data, params,
+                             mustProcess=params['spectro'] or 'autoSave' in params)
         self.frameNumber = self.frameNumber + 1
 
     def ScaleImg(self):
@@ -2212,13 +2564,9 @@ class SEE(QMainWindow):
         e.accept()
 
         if len(listFile) > 1:  # open multi file in drag process
-            self.openedFiles = listFile
-            self.sliderImage.setMinimum(0)
-            self.sliderImage.setMaximum(len(listFile) - 1)
-            self.sliderImage.setValue(0)
-            self.sliderImage.setEnabled(True)
+            self.setFileList(listFile)
 
-        self.OpenF(fileOpen=listFile[0])
+        self.OpenF(fileOpen=listFile[0], inList=len(listFile) > 1)
 
     def checkBoxScaleImage(self):
 
@@ -2241,7 +2589,7 @@ class SEE(QMainWindow):
     def fluenceFct(self):
         self.sizeFluenceX = self.roiFluence.size()[0]
         self.sizeFluenceY = self.roiFluence.size()[1]
-        self.Display(self.data)
+        self.Display(self.dataOrg)
 
     def ZoomMAX(self):
         self.open_widget(self.winZoomMax)
@@ -2254,14 +2602,14 @@ class SEE(QMainWindow):
         self.CropChanged()
 
     def CropChanged(self):
-        if self.winCrop.isWinOpen is True:
+        if self.winIsOpen('winCrop'):
 
             if self.ite == "pentagon":
-                self.cropImg = self.plotPentagon.getArrayRegion(self.data, self.imh)
+                self.cropImg = self.plotPentagon.getArrayRegion(self.data, self.imRef)
             elif self.ite == 'rect':
-                self.cropImg = self.plotRect.getArrayRegion(self.data, self.imh)
+                self.cropImg = self.plotRect.getArrayRegion(self.data, self.imRef)
             elif self.ite == 'cercle':
-                self.cropImg = self.plotCercle.getArrayRegion(self.data, self.imh)
+                self.cropImg = self.plotCercle.getArrayRegion(self.data, self.imRef)
             else:
                 self.cropImg = self.data
             self.winCrop.Display(self.cropImg)
@@ -2270,6 +2618,27 @@ class SEE(QMainWindow):
         self.open_widget(self.winSpectro)
         self.signalSpectro.emit(self.data)
 
+    def perfOverlay(self):
+        # performance overlay on / off (Analyse menu)
+        self.profiler.enabled = self.perfBox.isChecked()
+        self.labelPerf.setVisible(self.profiler.enabled)
+        if self.profiler.enabled:
+            self.profiler.reset()
+            self.timerPerf.start(1000)
+        else:
+            self.timerPerf.stop()
+
+    def perfUpdate(self):
+        self.labelPerf.setText(self.profiler.overlay(dropped=self.pipeline.dropped))
+
+    def perfExport(self):
+        chemin = self.conf.value(self.name+"/path")
+        fname = QFileDialog.getSaveFileName(self, "Export timings", chemin,
+                                            "json (*.json);;csv (*.csv)")
+        if fname[0]:
+            self.profiler.export(fname[0])
+            print('timings saved in', fname[0])
+
     def closeEvent(self, event):
         self.close()
         time.sleep(0.1)
@@ -2278,29 +2647,44 @@ class SEE(QMainWindow):
     def close(self):
         # when the window is closed
         if self.encercled is True:
-            if self.winEncercled.isWinOpen is True:
+            if self.winIsOpen('winEncercled'):
                 self.winEncercled.close()
-        if self.winCoupe.isWinOpen is True:
+        if self.winIsOpen('winCoupe'):
             self.winCoupe.close()
         if self.meas is True:
-            if self.winM.isWinOpen is True:
+            if self.winIsOpen('winM'):
                 self.winM.close()
         if self.winOpt.isWinOpen is True:
             self.winOpt.close()
         if self.winPref.isWinOpen is True:
             self.winPref.close()
         if self.fft is True:
-            if self.winFFT.isWinOpen is True:
+            if self.winIsOpen('winFFT'):
                 self.winFFT.close()
-            if self.winFFT1D.isWinOpen is True:
+            if self.winIsOpen('winFFT1D'):
                 self.winFFT1D.close()
-        if self.winCrop.isWinOpen is True:
+        if self.winIsOpen('winCrop'):
             self.winCrop.close()
         if self.spectro is True:
-            if self.winSpectro.isWinOpen is True:
+            if self.winIsOpen('winSpectro'):
                 self.winSpectro.close()
         
         self.serv.stop() # stop the server thread properly
+        self.pipeline.stop()  # process the frames to save
+        self.writer.close()  # write them
+        self.campaignWriter.close()  # and its campaign files
+        self.timerPerf.stop()
+        self.setFrames(None)  # file browsed with the slider
+        self.fileCache.close()
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.stackThread is not None:
+            # no stack message box or display on a closed window
+            self.stackThread.finished.disconnect(self.stackFinished)
+            self.stackThread.stop()
+            self.stackThread.wait()
+            self.stackThread = None
+        self.conf.sync()
 
 
 class DialogColorBar(QDialog):
@@ -2364,18 +2748,17 @@ class DialogColorBar(QDialog):
 def runVisu(file=None, path=None):
     from pyqtgraph.Qt.QtWidgets import QApplication
     import sys
-    import qdarkstyle
     import visu
 
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = visu.visual.SEE(file=file, path=path)
     e.show()
     appli.exec()
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = SEE(motRSAI=True)#,conf=conf,name=name)
     e.show()
     appli.exec()
@@ -32,7 +32,7 @@ import time
 import os
 
 import numpy as np
-import qdarkstyle  # pip install qdarkstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 from scipy.interpolate import splrep, sproot
 from scipy.ndimage import gaussian_filter, median_filter
 from PIL import Image
@@ -44,6 +44,7 @@ from visu.winMeas import MEAS
 from visu.WinOption import OPTION
 from visu.WinPreference import PREFERENCES
 from visu.andor import SifFile
+from visu.textFrame import loadText
 from visu.winFFT import WINFFT
 from visu.winMath import WINMATH
 from visu.winPointing import WINPOINTING
@@ -759,7 +760,7 @@ class SEEELECTRONS(QMainWindow):
         #     self.rectSelectSpectro.setSize([self.winInputE.wmax.value() - self.winInputE.wmin.value(),
         #                                 self.winInputE.hmax.value() - self.winInputE.hmin.value()])
             
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
 
     def actionButton(self):
         # action of button
@@ -1704,7 +1705,7 @@ class SEEELECTRONS(QMainWindow):
         ext = os.path.splitext(fichier)[1]
 
         if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
+            data = loadText(fichier)
         elif ext == '.spe' or ext == '.SPE':  # SPE file
             dataSPE = SpeFile(fichier)
             data1 = dataSPE.data[0]  # .transpose() # first frame
@@ -1749,7 +1750,7 @@ class SEEELECTRONS(QMainWindow):
         ext = os.path.splitext(fichier)[1]
 
         if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
+            data = loadText(fichier)
         elif ext == '.spe' or ext == '.SPE':  # SPE file
             dataSPE = SpeFile(fichier)
             data1 = dataSPE.data[0]  # .transpose() # first frame
@@ -2070,18 +2071,17 @@ class SEEELECTRONS(QMainWindow):
 def runVisu(file=None, path=None):
     from pyqtgraph.Qt.QtWidgets import QApplication
     import sys
-    import qdarkstyle
     import visu
 
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = visu.visual.SEE(file=file, path=path)
     e.show()
     appli.exec_()
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = SEEELECTRONS(spectro=True, motRSAI=True)  # ,color="red")#,conf=conf,name=name)
     e.show()
     appli.exec_()
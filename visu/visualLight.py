@@ -28,13 +28,12 @@ import time
 import os
 
 import numpy as np
-import qdarkstyle  # pip install qdarkstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 from PIL import Image
-from visu.winspec import SpeFile
 from visu.winMeas import MEAS
 from visu.WinOption import OPTION
 from visu.WinPreference import PREFERENCES
-from visu.andor import SifFile
+from visu.imageReader import readImage, extensions, fileFilter
 from visu.winPointing import WINPOINTING
 import pathlib
 import visu
@@ -446,7 +445,7 @@ class SEELIGHT(QMainWindow):
         self.setCentralWidget(MainWidget)
         self.plotRectZoom = pg.RectROI([self.xc/2, self.yc/2], [2*self.rx, 2*self.ry], pen='w')
         self.plotRectZoom.addScaleHandle((0, 0), center=(1, 1))
-        # self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6')) # dark style
+        # self.setStyleSheet(styleSheet()) # dark style
 
         self.Display(self.data)
 
@@ -752,7 +751,7 @@ class SEELIGHT(QMainWindow):
         fileOpen = fileOpen
         if fileOpen is False:
             chemin = self.conf.value(self.name+"/path")
-            fname = QFileDialog.getOpenFileNames(self, "Open File", chemin, "Images (*.txt *.spe *.TIFF *.sif *.tif);;Text File(*.txt);;Ropper File (*.SPE);;Andor File(*.sif);; TIFF file(*.TIFF)")
+            fname = QFileDialog.getOpenFileNames(self, "Open File", chemin, fileFilter())
             fichier = fname[0]
             self.openedFiles = fichier
             self.nbOpenedImage = len(fichier)
@@ -770,31 +769,17 @@ class SEELIGHT(QMainWindow):
         else:
             fichier = str(fileOpen)
             
-        ext = os.path.splitext(fichier)[1]
-        
-        if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
-        elif ext == '.spe' or ext == '.SPE':  # SPE file
-            dataSPE = SpeFile(fichier)
-            data1 = dataSPE.data[0]  # .transpose() # first frame
-            data = data1  # np.flipud(data1)
-        elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-            dat = Image.open(fichier)
-            data = np.array(dat)
-            data = np.rot90(data, 3)
-        elif ext == '.sif':
-            sifop = SifFile()
-            im = sifop.openA(fichier)
-            data = np.rot90(im, 3)
-#            self.data=self.data[250:495,:]
-        else:
+        try:
+            data, meta = readImage(fichier)
+        except Exception as e:
             msg = QMessageBox()
             msg.setIcon(QMessageBox.Icon.Critical)
             msg.setText("Wrong file format !")
-            msg.setInformativeText("The format of the file must be : .SPE  .TIFF .sif  png jpeg or .txt ")
+            msg.setInformativeText("The format of the file must be : %s \n%s" % (' '.join(extensions()), e))
             msg.setWindowTitle("Warning ...")
             msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
-            msg.exec_()
+            msg.exec()
+            return
             
         chemin = os.path.dirname(fichier)
         self.conf.setValue(self.name+"/path", chemin)
@@ -956,11 +941,10 @@ class SEELIGHT(QMainWindow):
 def runVisu():
     from pyqtgraph.Qt.QtWidgets import QApplication
     import sys
-    import qdarkstyle
     import visu
     
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = visu.visual2.SEE2()
     e.show()
     appli.exec_()
@@ -969,7 +953,7 @@ def runVisu():
 if __name__ == "__main__":
 
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = SEELIGHT(aff='left', roiCross=True, crossON=True, toolBar=False)
     e.show()
     appli.exec_()
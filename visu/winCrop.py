@@ -17,10 +17,13 @@ import sys
 import time
 import pyqtgraph as pg  # pyqtgraph biblio permettent l'affichage
 import numpy as np
-import qdarkstyle  # pip install qdakstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 import os
 import pathlib
 
+from visu.frameStats import FRAMESTATS, STATSIMAGEITEM
+from visu.imageReader import readImage
+
 
 class WINCROP(QMainWindow):
     
@@ -40,7 +43,7 @@ class WINCROP(QMainWindow):
         self.isWinOpen = False
         self.setWindowTitle('CropWindows')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.left = 100
         self.top = 30
         self.width = 800
@@ -110,7 +113,7 @@ class WINCROP(QMainWindow):
         self.vbox2.setContentsMargins(0, 0, 0, 0)
         
         self.p1 = self.winImage.addPlot()
-        self.imh = pg.ImageItem()
+        self.imh = STATSIMAGEITEM()
         self.axeX = self.p1.getAxis('bottom')
         self.axeY = self.p1.getAxis('left')
         self.p1.addItem(self.imh)
@@ -153,8 +156,10 @@ class WINCROP(QMainWindow):
         self.dimy = self.data.shape[1]
         self.stepX = stepX
         self.stepY = stepY
+        self.stats = FRAMESTATS(self.data)  # levels, histogram and palette
+        self.imh.stats = self.stats
         if self.checkBoxScale.isChecked():
-            self.imh.setImage(self.data, autoLevels=True, autoDownsample=True)
+            self.imh.setImage(self.data, levels=self.stats.levels(), autoLevels=False, autoDownsample=True)
         else:
             self.imh.setImage(self.data, autoLevels=False, autoDownsample=True)
 
@@ -177,8 +182,7 @@ class WINCROP(QMainWindow):
         # change the color scale
         levels = self.imh.getLevels()
         if levels[0] is None:
-            xmax = self.data.max()
-            xmin = self.data.min()
+            xmin, xmax = self.stats.levels()
         else:
             xmax = levels[1]
             xmin = levels[0]
@@ -188,8 +192,7 @@ class WINCROP(QMainWindow):
     def palettedown(self):
         levels = self.imh.getLevels()
         if levels[0] is None:
-            xmax = self.data.max()
-            xmin = self.data.min()
+            xmin, xmax = self.stats.levels()
         else:
             xmax = levels[1]
             xmin = levels[0]
@@ -202,16 +205,9 @@ class WINCROP(QMainWindow):
         fname = QFileDialog.getOpenFileNames(self, "Open File")
         self.openedFiles = fname[0]
         fichier = self.openedFiles[0]
-        ext = os.path.splitext(fichier)[1]
-        
-        if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
-        elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-            dat = Image.open(fichier)
-            data = np.array(dat)
-            data = np.rot90(data, 3)
+        data, meta = readImage(fichier)
 
-        self.Display(self.data)
+        self.Display(data)
 
     def SaveF(self):
         # save as tiff
@@ -254,7 +250,7 @@ class WINCROP(QMainWindow):
         
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = WINCROP(name='VISU')
     e.show()
     appli.exec_()
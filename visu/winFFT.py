@@ -14,7 +14,7 @@ import sys
 import os
 import time
 import numpy as np
-import qdarkstyle  # pip install qdakstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 import pathlib
 
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QGridLayout
@@ -37,6 +37,7 @@ from visu.WinCut import GRAPHCUT
 from visu.winMeas import MEAS
 from visu.WinOption import OPTION
 from visu.andor import SifFile
+from visu.textFrame import loadText
 
 
 class WINFFT(QWidget):
@@ -56,7 +57,7 @@ class WINFFT(QWidget):
         self.isWinOpen = False
         self.setWindowTitle('FFT')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.setup()
         
     def setup(self):
@@ -94,7 +95,7 @@ class SEEFFT(QWidget):
         
         super(SEEFFT, self).__init__()
         p = pathlib.Path(__file__)
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         if conf is None:
             conf = QtCore.QSettings(str(p.parent / 'confVisu.ini'), QtCore.QSettings.Format.IniFormat)
         else:
@@ -842,7 +843,7 @@ class SEEFFT(QWidget):
         ext = os.path.splitext(fichier)[1]
         
         if ext == '.txt':  # text file
-            self.data = np.loadtxt(str(fichier))
+            self.data = loadText(fichier)
         elif ext == '.spe' or ext == '.SPE':  # SPE file
             dataSPE = SpeFile(fichier)
             data1 = dataSPE.data[0]  # .transpose() # first frame
@@ -921,7 +922,7 @@ class SEEFFT(QWidget):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = WINFFT(name='VISU')
     e.show()
     appli.exec_()
\ No newline at end of file
@@ -8,7 +8,7 @@ modified 2019/08/13 : add motors RSAI position and zoom windows
 """
 
 
-import qdarkstyle
+from visu.darkStyle import styleSheet
 from PyQt6 import QtCore
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QMainWindow
 from PyQt6.QtWidgets import QWidget, QTableWidget, QTableWidgetItem, QAbstractItemView
@@ -25,7 +25,7 @@ class HISTORY(QMainWindow):
         super().__init__()
 
         self.parent = parent
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         p = pathlib.Path(__file__)
         sepa = os.sep
         if conf is None:
@@ -102,7 +102,7 @@ class HISTORY(QMainWindow):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = HISTORY()
     e.show()
     appli.exec_()
\ No newline at end of file
@@ -5,7 +5,7 @@ Created on Fri Oct 30 16:21:09 2020
 @author: julien Gautier(LOA)
 """
 
-import qdarkstyle
+from visu.darkStyle import styleSheet
 from PyQt6 import QtCore
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QPushButton
 from PyQt6.QtWidgets import QWidget, QLabel, QMessageBox, QComboBox, QFileDialog
@@ -14,9 +14,7 @@ from PyQt6.QtGui import QIcon
 import sys
 import os
 import numpy as np
-from visu.andor import SifFile
-from PIL import Image
-from visu.winspec import SpeFile
+from visu.imageReader import readImage, extensions, fileFilter
 import pathlib
 
 
@@ -39,7 +37,7 @@ class WINMATH(QWidget):
         sepa = os.sep
         self.icon = str(p.parent) + sepa+'icons' + sepa
         self.isWinOpen = False
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
        
         self.setWindowTitle('Math operations')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
@@ -134,12 +132,18 @@ class WINMATH(QWidget):
                        
     def openFile1(self):
         
-        (self.data1, file1) = self.OpenF()
+        (data, file1) = self.OpenF()
+        if data is None:
+            return
+        self.data1 = data
         self.labelFile1.setText(file1)
         
     def openFile2(self):
         
-        (self.data2, file2) = self.OpenF()
+        (data, file2) = self.OpenF()
+        if data is None:
+            return
+        self.data2 = data
         self.labelFile2.setText(file2)
         
     def OpenF(self, fileOpen=False):
@@ -149,7 +153,7 @@ class WINMATH(QWidget):
         if fileOpen is False:
             
             chemin = self.conf.value(self.name+"/path")
-            fname = QFileDialog.getOpenFileName(self, "Open File", chemin, "Images (*.txt *.spe *.TIFF *.sif *.tif);;Text File(*.txt);;Ropper File (*.SPE);;Andor File(*.sif);; TIFF file(*.TIFF)")
+            fname = QFileDialog.getOpenFileName(self, "Open File", chemin, fileFilter())
             
             fichier = fname[0]
             self.openedFiles = fichier
@@ -157,31 +161,17 @@ class WINMATH(QWidget):
         else:
             fichier = str(fileOpen)
             
-        ext = os.path.splitext(fichier)[1]
-        
-        if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
-        elif ext == '.spe' or ext == '.SPE':  # SPE file
-            dataSPE = SpeFile(fichier)
-            data1 = dataSPE.data[0]  # .transpose() # first frame
-            data = data1  # np.flipud(data1)
-        elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-            dat = Image.open(fichier)
-            data = np.array(dat)
-            data = np.rot90(data, 3)
-        elif ext == '.sif':
-            sifop = SifFile()
-            im = sifop.openA(fichier)
-            data = np.rot90(im, 3)
-#            self.data=self.data[250:495,:]
-        else:
+        try:
+            data, meta = readImage(fichier)
+        except Exception as e:
             msg = QMessageBox()
-            msg.setIcon(QMessageBox.Critical)
+            msg.setIcon(QMessageBox.Icon.Critical)
             msg.setText("Wrong file format !")
-            msg.setInformativeText("The format of the file must be : .SPE  .TIFF .sif  png jpeg or .txt ")
+            msg.setInformativeText("The format of the file must be : %s \n%s" % (' '.join(extensions()), e))
             msg.setWindowTitle("Warning ...")
-            msg.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint)
-            msg.exec_()
+            msg.setWindowFlags(QtCore.Qt.WindowType.WindowStaysOnTopHint)
+            msg.exec()
+            return None, None
             
         chemin = os.path.dirname(fichier)
         self.conf.setValue(self.name+"/path", chemin)
@@ -199,7 +189,7 @@ class WINMATH(QWidget):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = WINMATH()
     e.show()
     appli.exec_()
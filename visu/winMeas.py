@@ -9,7 +9,7 @@ modified 2023/07/04 add user function
 """
 
 
-import qdarkstyle 
+from visu.darkStyle import styleSheet
 from PyQt6 import QtCore, QtGui
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QMainWindow, QHeaderView
 from PyQt6.QtWidgets import QWidget, QTableWidget, QTableWidgetItem, QAbstractItemView, QComboBox, QInputDialog
@@ -30,13 +30,14 @@ from scipy import ndimage
 class MEAS(QMainWindow):
     
     signalPlot = QtCore.pyqtSignal(object)
+    newMeasurement = QtCore.pyqtSignal(object)  # dict of the values of the shot (visu.campaignStore)
     
     def __init__(self, parent=None, conf=None, name='VISU', confMot=None, **kwds):
         
         super().__init__()
 
         self.parent = parent
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         p = pathlib.Path(__file__)
         sepa = os.sep
         if conf is None:
@@ -53,11 +54,16 @@ class MEAS(QMainWindow):
             if self.motRSAI is True:
                 import visu.moteurRSAISERVER as RSAI
                 self.RSAI = RSAI
-                self.listRack = self.RSAI.listRack()
-                self.IPadress = self.listRack[0]
+                self.listRack = self.RSAI.listRack()  # [] if the server is not reachable
                 self.rackName = []
-                self.listMotorName = self.RSAI.listMotorName(self.IPadress)
-                print('RSAI motor connected to python server')  
+                if len(self.listRack) > 0:
+                    self.IPadress = self.listRack[0]
+                    self.listMotorName = self.RSAI.listMotorName(self.IPadress)
+                    print('RSAI motor connected to python server')  
+                else:
+                    self.IPadress = ''
+                    self.listMotorName = []
+                    print('RSAI motor server not connected')
         else : 
             self.motRSAI = False
         
@@ -539,6 +545,11 @@ class MEAS(QMainWindow):
         self.Xcmass.append(self.xcmass)
         self.Ycmass.append(self.ycmass)
         self.USER1.append(self.user1)
+        self.newMeasurement.emit({'max': self.maxx, 'min': self.minn, 'x_max': self.xmax,
+                                  'y_max': self.ymax, 'sum': self.summ, 'mean': self.moy,
+                                  'x_cmass': self.xcmass, 'y_cmass': self.ycmass,
+                                  'sum_threshold': self.summThre if self.ThresholdState is True else None,
+                                  'user1': self.user1, 'position': Posi})
 
         self.table.setVerticalHeaderLabels(self.labelsVert)
 
@@ -690,7 +701,7 @@ class MEAS(QMainWindow):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = MEAS(motRSAI=True)
     e.show()
     appli.exec_()
\ No newline at end of file
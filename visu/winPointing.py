@@ -16,7 +16,7 @@ import sys
 import time
 import pyqtgraph as pg  # pyqtgraph biblio permettent l'affichage 
 import numpy as np
-import qdarkstyle  # pip install qdakstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 #import pylab
 import os
 from scipy.ndimage.filters import gaussian_filter  # pour la reduction du bruit
@@ -45,7 +45,7 @@ class WINPOINTING(QMainWindow):
         self.isWinOpen = False
         self.setWindowTitle('Pointing')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.left = 100
         self.top = 30
         self.width = 800
@@ -352,7 +352,7 @@ class WINPOINTING(QMainWindow):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = WINPOINTING(name='VISU')
     e.show()
     appli.exec_()
@@ -17,7 +17,7 @@ import sys
 import time
 import pyqtgraph as pg  # pyqtgraph biblio permettent l'affichage
 import numpy as np
-import qdarkstyle  # pip install qdakstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 import os
 
 import pathlib
@@ -26,6 +26,7 @@ from scipy.ndimage import median_filter
 from visu.WinCut import GRAPHCUT
 from visu.winMeas import MEAS
 from visu.InputElectrons import InputE
+from visu.imageReader import readImage
 from visu.CalculTraj import WINTRAJECTOIRE
 
 # sys.path.insert(1, 'spectrum_analysis')
@@ -52,7 +53,7 @@ class WINSPECTRO(QMainWindow):
         self.isWinOpen = False
         self.setWindowTitle('Electrons spectrometer')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.left = 100
         self.top = 30
         self.width = 800
@@ -401,14 +402,7 @@ class WINSPECTRO(QMainWindow):
         fname = QFileDialog.getOpenFileNames(self, "Open File")
         self.openedFiles = fname[0]
         fichier = self.openedFiles[0]
-        ext = os.path.splitext(fichier)[1]
-        
-        if ext == '.txt':  # text file
-            data = np.loadtxt(str(fichier))
-        elif ext == '.TIFF' or ext == '.tif' or ext == '.Tiff' or ext == '.jpg' or ext == '.JPEG' or ext == '.png':  # tiff File
-            dat = Image.open(fichier)
-            data = np.array(dat)
-            data = np.rot90(data, 3)
+        data, meta = readImage(fichier)
         
         self.Display(data)
         
@@ -567,7 +561,7 @@ class WINSPECTRO(QMainWindow):
         
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     file= str(pathlib.Path(__file__).parents[0])+'/tir_025.TIFF'
     e =WINSPECTRO(name='VISU', file=file)
     e.show()
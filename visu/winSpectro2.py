@@ -17,13 +17,15 @@ import sys
 import time
 import pyqtgraph as pg
 import numpy as np
-import qdarkstyle
+from visu.darkStyle import styleSheet
 import os
 from scipy.signal import lfilter
 import pathlib
+import threading
 
 from visu.spectrum_analysis import Deconvolve_Spectrum as Deconvolve
 from visu.spectrum_analysis import Spectrum_Features
+from visu.frameStats import FRAMESTATS, STATSIMAGEITEM
 
 sys.path.insert(1, 'spectrum_analysis')
 sepa = os.sep
@@ -47,6 +49,8 @@ class WINSPECTRO(QMainWindow):
         p = pathlib.Path(__file__)
         self.icon = str(p.parent) + sepa + 'icons' + sepa
         self.data_dict = {}
+        self.server = None  # diagServer, set by the server itself (see setServer)
+        self._lock = threading.Lock()  # process is called by the GUI and the processing thread
 
         # Main window setup
         self.setup()
@@ -65,7 +69,7 @@ class WINSPECTRO(QMainWindow):
         self.isWinOpen = False
         self.setWindowTitle('Electrons spectrometer')
         self.setWindowIcon(QIcon(self.icon + 'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.setWindowIcon(QIcon('./icons/LOA.png'))
         self.setGeometry(100, 30, 1200, 800)
 
@@ -134,7 +138,7 @@ class WINSPECTRO(QMainWindow):
 
         # Add plot in column 0
         self.spectrum_2D_image = self.winImage.addPlot(row=0, col=0)
-        self.image_histogram = pg.ImageItem()
+        self.image_histogram = STATSIMAGEITEM()
         self.spectrum_2D_image.addItem(self.image_histogram)
 
         # Setup histogram LUT
@@ -153,6 +157,7 @@ class WINSPECTRO(QMainWindow):
 
         self.dnde_image = self.graph_widget.addPlot()
         self.dnde_image.setContentsMargins(10, 10, 10, 10)
+        self.dnde_curve = self.dnde_image.plot()
 
         # Controls and indicators, labels
         grid_layout_enable_controls = QGridLayout()
@@ -251,8 +256,9 @@ class WINSPECTRO(QMainWindow):
         :return: None
         '''
         self.lanex_offset_mm = self.lanex_offset_mm_control.value()
-        self.dnde_image.clear()
-        self.load_calib()
+        self.dnde_curve.clear()
+        with self._lock:  # the processing thread may be deconvolving
+            self.load_calib()
         self.graph_setup()
 
 
@@ -281,7 +287,10 @@ class WINSPECTRO(QMainWindow):
         self.spectrum_2D_image.setLabel('bottom', 'Energy (MeV)')
         self.spectrum_2D_image.setLabel( 'left', 'mrad ')
 
-        self.image_histogram.setImage(self.deconvolved_spectrum.image.T, autoLevels=True, autoDownsample=True)
+        self.imageStats = FRAMESTATS(self.deconvolved_spectrum.image)
+        self.image_histogram.stats = self.imageStats
+        self.image_histogram.setImage(self.deconvolved_spectrum.image.T, levels=self.imageStats.levels(),
+                                      autoLevels=False, autoDownsample=True)
         self.image_histogram.setRect(
             self.deconvolved_spectrum.energy[0],  # x origin
             self.deconvolved_spectrum.angle[0],  # y origin
@@ -302,38 +311,98 @@ class WINSPECTRO(QMainWindow):
         if self.parent is not None:
             # if signal emit in another thread (see visual)
             self.parent.signalSpectro.connect(self.Display)
-            self.parent.signalSpectroList.connect(self.spectro_dict)
+        # graphs are refreshed in the GUI thread once the spectrum is computed
+        self.signalSpectroDict.connect(self.update_graphs)
+
+    def setServer(self, server):
+        '''
+        Set the diagServer the results are published to
+        '''
+        self.server = server
 
     #####################################################################
     #       Display and generate data for DiagServ (dictionary)
     #####################################################################
     def Display(self, data):
+        # Deconvolve and display 2D data (not linked to a shot number)
+        self.process(data, shotNumber=-1)
 
-        # Deconvolve and display 2D data
-        if self.flip_image.isChecked():
-            self.deconvolved_spectrum.deconvolve_data(np.flip(data.T, axis=1))
-        else:
-            self.deconvolved_spectrum.deconvolve_data(data.T)
-        self.image_histogram.setImage(self.deconvolved_spectrum.image.T, autoLevels=True, autoDownsample=True)
-
-        # Integrate over angle and show graph
-        self.deconvolved_spectrum.integrate_spectrum((600, 670), (750, 850))
-        #self.update_image_levels()
-        self.dnde_image.plot(self.deconvolved_spectrum.energy, self.deconvolved_spectrum.integrated_spectrum)
-
-    def spectro_dict(self, temp_dataArray):
+    def processParams(self):
+        '''
+        snapshot of the controls used by process, read in the GUI thread
+        (the processing thread never reads a widget)
+        '''
+        return {'flip_image': self.flip_image.isChecked(),
+                'energy_bounds': [self.min_cutoff_energy, self.max_cutoff_energy],
+                'lanex_offset_mm': self.lanex_offset_mm}
+
+    def calibrationParams(self, params):
+        # parameters of the deconvolution, saved with the spectra (visu.campaignStore)
+        spectrum = self.deconvolved_spectrum
+        return {'calibration_file': self.deconv_calib + 'dsdE_default.txt',
+                'lanex_offset_mm': params['lanex_offset_mm'],
+                'pixel_per_mm': spectrum.pixel_per_mm, 'mrad_per_pix': spectrum.mrad_per_pix,
+                'ref_mode': spectrum.ref_mode, 'ref_point': list(spectrum.ref_point),
+                'spacing': spectrum.spacing, 'pC_per_count': spectrum.pC_per_count,
+                'energy_bounds': params['energy_bounds'],
+                'flip_image': params['flip_image']}
+
+    def process(self, data, shotNumber=-1, params=None):
+        '''
+        Deconvolve data, compute the spectrum features and publish them to
+        the diagServer with the shot number of the frame.
+        Can be called from the processing thread with params (processParams
+        read in the GUI thread): the server is updated directly, only the
+        graphs refresh goes through the Qt event loop.
+        Return the values of the shot for visu.campaignStore (spectrum,
+        features, calibration)
+        '''
+        if params is None:
+            params = self.processParams()
+        with self._lock:
+            if params['flip_image']:
+                self.deconvolved_spectrum.deconvolve_data(np.flip(data.T, axis=1))
+            else:
+                self.deconvolved_spectrum.deconvolve_data(data.T)
+
+            # Integrate over angle
+            self.deconvolved_spectrum.integrate_spectrum((600, 670), (750, 850))
+            data_dict = self.spectro_dict(shotNumber, params['energy_bounds'])
+            # levels of the image computed here, not in the GUI thread
+            self.imageStats = FRAMESTATS(self.deconvolved_spectrum.image)
+            values = {'spectrum': self.deconvolved_spectrum.integrated_spectrum,
+                      'features': self.features,
+                      'calibration': (self.deconvolved_spectrum.energy, self.calibrationParams(params))}
+        if self.server is not None:
+            self.server.publish(shotNumber, data_dict, name="spectrum")
+        self.signalSpectroDict.emit(data_dict)
+        return values
+
+    def spectro_dict(self, shotNumber, energy_bounds):
         # Creation of dictionary to pass to diagServ ; cut energy from interface to remove noise
-        self.spectro_data_dict = Spectrum_Features.build_dict(self.deconvolved_spectrum.energy,
-                                                              self.deconvolved_spectrum.integrated_spectrum,
-                                                              temp_dataArray[1],
-                                                              energy_bounds=[self.min_cutoff_energy, self.max_cutoff_energy])
-        self.signalSpectroDict.emit(self.spectro_data_dict) # Signal for DiagServ
+        energy = self.deconvolved_spectrum.energy
+        spectrum = self.deconvolved_spectrum.integrated_spectrum
+        self.features = Spectrum_Features.spectrum_features(
+            energy, spectrum, shotNumber, energy_bounds=energy_bounds)
+        data_dict = Spectrum_Features.to_dict(self.features)
+        data_dict['Energy'] = energy.tolist()
+        data_dict['Spectrum'] = spectrum.tolist()
+        self.data_dict = data_dict  # new dict, never modified in place
+        return self.data_dict
+
+    def update_graphs(self, data_dict):
+        with self._lock:
+            image = self.deconvolved_spectrum.image
+            stats = self.imageStats
+        self.image_histogram.stats = stats
+        self.image_histogram.setImage(image.T, levels=stats.levels(), autoLevels=False, autoDownsample=True)
+        self.dnde_curve.setData(data_dict['Energy'], data_dict['Spectrum'])
 
 
 if __name__ == "__main__":
 
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     file= str(pathlib.Path(__file__).parents[0])+'/tir_025.TIFF'
     e =WINSPECTRO(name='VISU', file=file)
     e.show()
@@ -16,7 +16,7 @@ import sys
 import time
 import pyqtgraph as pg  # pyqtgraph biblio permettent l'affichage
 import numpy as np
-import qdarkstyle  # pip install qdakstyle https://github.com/ColinDuquesnoy/QDarkStyleSheet  sur conda
+from visu.darkStyle import styleSheet
 #import pylab
 import os
 from scipy.ndimage.filters import gaussian_filter  # pour la reduction du bruit
@@ -25,6 +25,8 @@ import pathlib
 
 from PIL import Image
 
+from visu.frameStats import FRAMESTATS, STATSIMAGEITEM
+
 class WINENCERCLED(QWidget):
 
     def __init__(self, parent=None, conf=None, name='VISU'):
@@ -50,7 +52,7 @@ class WINENCERCLED(QWidget):
         # window config (geometry, title, ...)
         self.setWindowTitle('Encercled')
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
         self.left = 100
         self.top = 30
         self.width = 800
@@ -291,7 +293,7 @@ class WINENCERCLED(QWidget):
         
         # figure setup
         self.plotItem = self.winImage.addPlot() # figure over which the data and curves will be plot
-        self.imh = pg.ImageItem()
+        self.imh = STATSIMAGEITEM()
         self.plotItem.addItem(self.imh) # add an image on the figure (2D plot)
         self.plotItem.setAspectLocked(True, ratio=1)
         self.plotItem.setMouseEnabled(x=False, y=False)
@@ -595,16 +597,12 @@ class WINENCERCLED(QWidget):
         
         if not self.checkBoxCentred.isChecked():
             self.plotItem.enableAutoRange(False) # prevent the zoom pattern
-        self.imh.setImage(data.astype(float), autoLevels=True, autoDownsample=True)
-        
-        # brightness levels
-        levels = self.imh.getLevels()
-        if levels[0] is None:
-            self.base_xmin = float(self.data.min())
-            self.base_xmax = float(self.data.max())
-        else:
-            self.base_xmin = float(levels[0])
-            self.base_xmax = float(levels[1])
+        # brightness levels from the statistics of the frame (subsample)
+        self.stats = FRAMESTATS(data)
+        self.imh.stats = self.stats
+        self.base_xmin, self.base_xmax = self.stats.levels()
+        self.imh.setImage(data.astype(float), levels=(self.base_xmin, self.base_xmax),
+                          autoLevels=False, autoDownsample=True)
 
         self.computeCentroid()
         self.Coupe()
@@ -761,7 +759,7 @@ class WINENCERCLED(QWidget):
         
 if __name__ == "__main__":
     appli = QApplication(sys.argv) 
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = WINENCERCLED(name='VISU')
     e.show()
     appli.exec_()
@@ -8,7 +8,7 @@ windows for see max ,mean ,sum in a bigger windows
 
 """
 
-import qdarkstyle
+from visu.darkStyle import styleSheet
 from PyQt6.QtWidgets import QApplication, QHBoxLayout, QWidget, QLabel
 from PyQt6.QtGui import QIcon
 import sys
@@ -30,7 +30,7 @@ class ZOOM(QWidget):
         self.setup()
         self.setWindowTitle(self.title)
         self.setWindowIcon(QIcon(self.icon+'LOA.png'))
-        self.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+        self.setStyleSheet(styleSheet())
     
     def setup(self):
         hLayout2 = QHBoxLayout()
@@ -63,7 +63,7 @@ class ZOOM(QWidget):
 
 if __name__ == "__main__":
     appli = QApplication(sys.argv)
-    appli.setStyleSheet(qdarkstyle.load_stylesheet(qt_api='pyqt6'))
+    appli.setStyleSheet(styleSheet())
     e = ZOOM()
     e.show()
     appli.exec_()
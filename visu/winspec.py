@@ -80,6 +80,10 @@ class SpeFile(object):
     All details written in the file are contained in the `header` structure. Data is 
     accessed by using the `data` property.
 
+    `data` is a view of the file mapped in memory (np.memmap, copy on write): only the
+    pages of the frames used are read. `frame(i)` returns a copy of one frame and
+    iterating over the SpeFile gives the frames one by one (streaming).
+
     Once the object is created and data accessed, the file is NOT read again. Create
     a new object if you want to reread the file.
     '''
@@ -120,41 +124,65 @@ class SpeFile(object):
 
         self.readout_time = self.header.ReadoutTime
 
+    def __len__(self):
+        return self.numFrames
+
+    def __iter__(self):
+        for i in range(self.numFrames):
+            yield self.frame(i)
+
+    @property
+    def numFrames(self):
+        ''' Number of frames in the file (less than NumFrames if the file is truncated)
+        '''
+        return self._read().shape[0]
+
+    def frame(self, i):
+        ''' Frame i [x, y] (copy : only this frame is read from the disk)
+        '''
+        return np.array(self._read()[i])
+
     def _read(self):
-        ''' Read the data segment of the file and create an appropriately-shaped numpy array
+        ''' Map the data segment of the file and create an appropriately-shaped numpy array
 
         Based on the header, the right datatype is selected and returned as a numpy array.  I took 
         the convention that the frame index is the first, followed by the x,y coordinates.
+        The array is a view of a np.memmap (copy on write) : nothing is read before it is used.
         '''
 
         if self._data is not None:
             log.debug('using cached data')
             return self._data
 
-        # In python 2.7, apparently file and FileIO cannot be used interchangably
-        with open(self.path, mode='rb') as f:
-            f.seek(4100)  # Skip header (4100 bytes)
-
-            _count = self.header.xdim * self.header.ydim * self.header.NumFrames
-            
-            self._data = np.fromfile(f, dtype=SpeFile._datatype_map[self.header.datatype], count=_count)
-
-            # Also, apparently the ordering of the data corresponds to how it is stored by the shift register
-            # Thus, it appears a little backwards...
-            self._data = self._data.reshape((self.header.NumFrames, self.header.ydim, self.header.xdim))
+        dtype = np.dtype(SpeFile._datatype_map[self.header.datatype])
+        frameSize = self.header.xdim * self.header.ydim * dtype.itemsize
+        numFrames = self.header.NumFrames
+        available = (os.path.getsize(self.path) - 4100) // frameSize if frameSize else 0
+        if available < numFrames:
+            log.warning('%s : %d frames in the header, %d in the file' % (self.path, numFrames, available))
+            numFrames = max(available, 0)
+
+        # Skip header (4100 bytes)
+        # Also, apparently the ordering of the data corresponds to how it is stored by the shift register
+        # Thus, it appears a little backwards...
+        if numFrames == 0:
+            self._data = np.zeros((0, self.header.ydim, self.header.xdim), dtype=dtype)
+        else:
+            self._data = np.memmap(self.path, dtype=dtype, mode='c', offset=4100,
+                                   shape=(numFrames, self.header.ydim, self.header.xdim))
 
-            # Orient the structure so that it is indexed like [NumFrames][x, y]
-            self._data = np.rollaxis(self._data, 2, 1)
+        # Orient the structure so that it is indexed like [NumFrames][x, y]
+        self._data = np.rollaxis(self._data, 2, 1)
 
-            # flip data
-            if all([self.reversed is True, self.adc == '100 KHz']):
-                pass
-            elif any([self.reversed is True, self.adc == '100 KHz']):
-                self._data = self._data[:, ::-1, :]
-                log.debug('flipped data because of nonstandard ADC setting ' +\
-                        'or reversed setting')
+        # flip data
+        if all([self.reversed is True, self.adc == '100 KHz']):
+            pass
+        elif any([self.reversed is True, self.adc == '100 KHz']):
+            self._data = self._data[:, ::-1, :]
+            log.debug('flipped data because of nonstandard ADC setting ' +\
+                    'or reversed setting')
 
-            return self._data
+        return self._data
 
     @property
     def xaxis(self):